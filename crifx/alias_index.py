@@ -0,0 +1,48 @@
+"""Case-insensitive lookup of objects by their aliases."""
+
+from collections.abc import Iterable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class AliasIndex(Generic[T]):
+    """
+    Dictionary from lower-cased aliases to the objects that they identify.
+
+    If an alias is added for more than one object, then the object that it
+    was added for first is kept and the collision is recorded.
+    """
+
+    def __init__(self):
+        self._values_by_alias: dict[str, T] = {}
+        # Tuples of the alias, the object kept, and the object not kept.
+        self.collisions: list[tuple[str, T, T]] = []
+
+    @staticmethod
+    def build(items: Iterable[tuple[T, Iterable[str]]]) -> "AliasIndex[T]":
+        """Build an index from pairs of an object and its aliases."""
+        index: AliasIndex[T] = AliasIndex()
+        for value, aliases in items:
+            for alias in aliases:
+                index.add(alias, value)
+        return index
+
+    def add(self, alias: str, value: T):
+        """Add an alias for an object."""
+        key = alias.lower()
+        existing = self._values_by_alias.get(key)
+        if existing is None:
+            self._values_by_alias[key] = value
+        elif existing is not value:
+            self.collisions.append((key, existing, value))
+
+    def get(self, alias: str) -> T | None:
+        """Get the object identified by an alias, if there is one."""
+        return self._values_by_alias.get(alias.lower())
+
+    def __contains__(self, alias: str) -> bool:
+        return alias.lower() in self._values_by_alias
+
+    def __len__(self) -> int:
+        return len(self._values_by_alias)
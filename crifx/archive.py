@@ -0,0 +1,334 @@
+"""Report on every problemset under a directory in one invocation."""
+
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import date
+
+from pygit2 import discover_repository
+
+from crifx.config_parser import CONFIG_FILENAME, Config, ReviewCountRequirements
+from crifx.contest_objects import Judgement
+from crifx.dir_layout_parsing import is_contest_problems_root
+from crifx.git_manager import AttributionMethod, GitManager
+from crifx.problemset_parser import ProblemSetParser
+from crifx.report_writer import ReportWriter, make_crifx_dir
+from crifx.submission_store import SubmissionRow, SubmissionStore
+from crifx.timeline import ProblemMetrics
+
+ARCHIVE_FILENAME = "crifx-archive"
+ARCHIVE_REPOS_DIRNAME = "repos"
+
+# The repository path, attribution method and blame horizon of a git manager.
+GitManagerKey = tuple[str, AttributionMethod, str | None, date | None]
+
+# The git managers and configurations of the current process. Problemsets in
+# the same repository share a git manager, so the repository is opened and
+# its history is walked once per process rather than once per problemset.
+_git_managers: dict[GitManagerKey, GitManager] = {}
+_configs: dict[bytes, Config] = {}
+
+
+@dataclass(frozen=True)
+class ArchiveOptions:
+    """Settings shared by the problemsets of an archive."""
+
+    # The directory that is searched for problemset root directories.
+    archive_root: str
+    # The crifx directory of the archive, which holds the git caches.
+    crifx_dir_path: str
+    # The directory under which to write the reports, or None to write each
+    # report to its problemset root directory.
+    output_dir: str | None = None
+    # Settings that override those in the configuration of each problemset.
+    attribution_method: AttributionMethod | None = None
+    blame_oldest_commit: str | None = None
+    blame_since: date | None = None
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """The outcome of reporting on one problemset of an archive."""
+
+    # The path of the problemset root relative to the archive root.
+    name: str
+    problemset_root: str
+    # The directory the report was written to, or None if it was not written.
+    report_dir: str | None
+    problems: tuple[ProblemMetrics, ...]
+    parse_failures: int
+    requirements: ReviewCountRequirements | None
+    submissions: tuple[SubmissionRow, ...]
+    # The reason reporting failed, if it did.
+    error: str | None = None
+
+    @property
+    def outstanding(self) -> int:
+        """Get the number of submissions and reviews still required."""
+        if self.requirements is None:
+            return 0
+        return sum(problem.outstanding(self.requirements) for problem in self.problems)
+
+
+def find_problemset_roots(path: str) -> list[str]:
+    """
+    Find the problemset root directories under a directory.
+
+    Problemset root directories are not searched for further problemsets,
+    and hidden directories are skipped.
+    """
+    problemset_roots = []
+    for dir_path, dir_names, _ in os.walk(path):
+        if is_contest_problems_root(dir_path):
+            problemset_roots.append(dir_path)
+            dir_names.clear()
+            continue
+        dir_names[:] = sorted(name for name in dir_names if not name.startswith("."))
+    return problemset_roots
+
+
+def _get_config(problemset_root: str) -> Config:
+    """Get the configuration of a problemset, sharing identical configurations."""
+    with open(os.path.join(problemset_root, CONFIG_FILENAME), "rb") as config_file:
+        config_bytes = config_file.read()
+    config = _configs.get(config_bytes)
+    if config is None:
+        config = Config(tomllib.loads(config_bytes.decode("utf-8")))
+        _configs[config_bytes] = config
+    return config
+
+
+def _get_git_manager(
+    problemset_root: str,
+    crifx_dir_path: str,
+    attribution_method: AttributionMethod,
+    blame_oldest_commit: str | None,
+    blame_since: date | None,
+) -> GitManager:
+    """Get the git manager for the repository containing a problemset."""
+    repo_path = discover_repository(problemset_root)
+    if repo_path is None:
+        raise ValueError(f"Path '{problemset_root}' is not in a git repository.")
+    repo_path = os.path.abspath(repo_path)
+    key = (repo_path, attribution_method, blame_oldest_commit, blame_since)
+    git_manager = _git_managers.get(key)
+    if git_manager is None:
+        cache_dir = os.path.join(
+            crifx_dir_path,
+            ARCHIVE_REPOS_DIRNAME,
+            hashlib.sha1(repo_path.encode("utf-8")).hexdigest()[:16],
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        git_manager = GitManager(
+            problemset_root,
+            cache_dir,
+            1,
+            attribution_method,
+            blame_oldest_commit=blame_oldest_commit,
+            blame_since=blame_since,
+        )
+        _git_managers[key] = git_manager
+    else:
+        git_manager.refresh_status()
+    return git_manager
+
+
+def report_problemset(problemset_root: str, options: ArchiveOptions) -> ArchiveEntry:
+    """
+    Parse a problemset of an archive and write its report.
+
+    Errors are logged and recorded in the returned entry rather than raised,
+    so that one broken problemset does not stop the archive.
+    """
+    name = os.path.relpath(problemset_root, options.archive_root)
+    if name == os.curdir:
+        name = os.path.basename(problemset_root)
+    try:
+        config = _get_config(problemset_root)
+        attribution_method = options.attribution_method or config.attribution.method
+        blame_oldest_commit = config.attribution.oldest_commit
+        blame_since = config.attribution.since
+        if options.blame_oldest_commit is not None or options.blame_since is not None:
+            blame_oldest_commit = options.blame_oldest_commit
+            blame_since = options.blame_since
+        git_manager = _get_git_manager(
+            problemset_root,
+            options.crifx_dir_path,
+            attribution_method,
+            blame_oldest_commit,
+            blame_since,
+        )
+        if options.output_dir is None:
+            output_dir = problemset_root
+        else:
+            output_dir = os.path.join(options.output_dir, name)
+            os.makedirs(output_dir, exist_ok=True)
+        crifx_dir_path = make_crifx_dir(output_dir)
+        parser = ProblemSetParser.from_config(
+            problemset_root, config, git_manager, crifx_dir_path
+        )
+        try:
+            problemset = parser.parse_problemset()
+        finally:
+            if parser.data_stats_collector is not None:
+                parser.data_stats_collector.close()
+    except Exception as error:
+        logging.exception("Failed to parse the problemset '%s'.", name)
+        return ArchiveEntry(name, problemset_root, None, (), 0, None, (), str(error))
+    problems = tuple(
+        ProblemMetrics.from_problem(problem, config) for problem in problemset.problems
+    )
+    submissions = tuple(
+        itertools.chain.from_iterable(
+            SubmissionRow.from_problem(problem, name) for problem in problemset.problems
+        )
+    )
+    report_dir = None
+    error_message = None
+    try:
+        writer = ReportWriter(problemset, config, git_manager)
+        writer.build_report(crifx_dir_path)
+        writer.write_tex(crifx_dir_path)
+        writer.write_pdf(output_dir)
+        report_dir = output_dir
+        logging.info("Report for '%s' written to '%s'", name, output_dir)
+    except Exception as error:
+        logging.exception("Failed to write the report for '%s'.", name)
+        error_message = str(error)
+    return ArchiveEntry(
+        name,
+        problemset_root,
+        report_dir,
+        problems,
+        len(problemset.parse_failures),
+        config.review_requirements,
+        submissions,
+        error_message,
+    )
+
+
+def report_problemsets(
+    problemset_roots: list[str], options: ArchiveOptions
+) -> list[ArchiveEntry]:
+    """Report on problemsets one after another."""
+    return [
+        report_problemset(problemset_root, options)
+        for problemset_root in problemset_roots
+    ]
+
+
+def group_by_repository(problemset_roots: list[str]) -> list[list[str]]:
+    """
+    Group problemset root directories by the repository that contains them.
+
+    The groups are in order of their first problemset, and a problemset that
+    is not in a repository is in a group of its own.
+    """
+    groups: dict[str, list[str]] = {}
+    for problemset_root in problemset_roots:
+        repo_path = discover_repository(problemset_root)
+        key = problemset_root if repo_path is None else os.path.abspath(repo_path)
+        groups.setdefault(key, []).append(problemset_root)
+    return list(groups.values())
+
+
+def run_archive(
+    problemset_roots: list[str], options: ArchiveOptions, jobs: int = 1
+) -> list[ArchiveEntry]:
+    """
+    Report on each problemset, using up to `jobs` worker processes.
+
+    Each worker process keeps a git manager per repository and a
+    configuration per distinct configuration file, which are shared by the
+    problemsets that the worker reports on. The problemsets of a repository
+    are reported on by one worker, so that the git caches of the repository
+    have a single writer.
+    """
+    groups = group_by_repository(problemset_roots)
+    if jobs == 1 or len(groups) <= 1:
+        return report_problemsets(problemset_roots, options)
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(groups)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        group_entries = pool.map(report_problemsets, groups, itertools.repeat(options))
+        entries_by_root = {
+            entry.problemset_root: entry
+            for entries in group_entries
+            for entry in entries
+        }
+    return [entries_by_root[problemset_root] for problemset_root in problemset_roots]
+
+
+def write_archive_csv(entries: list[ArchiveEntry], path: str):
+    """Write the metrics of every problem in the archive as a csv file."""
+    metric_names = [
+        field for field in ProblemMetrics.__dataclass_fields__ if field != "name"
+    ]
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["problemset", "problem", *metric_names, "outstanding"])
+        for entry in entries:
+            for problem in entry.problems:
+                writer.writerow(
+                    [
+                        entry.name,
+                        problem.name,
+                        *(getattr(problem, name) for name in metric_names),
+                        problem.outstanding(entry.requirements),
+                    ]
+                )
+
+
+def write_archive_json(entries: list[ArchiveEntry], path: str):
+    """
+    Write a json summary of the archive.
+
+    The summary has the outcome and metrics of each problemset, and the
+    submissions by each author and AC submissions in each language across
+    every problemset.
+    """
+    store = SubmissionStore()
+    for entry in entries:
+        store.add_rows(entry.submissions)
+    ac_counts = store.author_counts(Judgement.ACCEPTED)
+    archive = {
+        "problemsets": [
+            {
+                "name": entry.name,
+                "path": entry.problemset_root,
+                "report": entry.report_dir,
+                "error": entry.error,
+                "parse_failures": entry.parse_failures,
+                "outstanding": entry.outstanding,
+                "problems": [asdict(problem) for problem in entry.problems],
+            }
+            for entry in entries
+        ],
+        "authors": {
+            author_name: {
+                "submissions": count,
+                "accepted": ac_counts.get(author_name, 0),
+            }
+            for author_name, count in sorted(store.author_counts().items())
+        },
+        "ac_languages": {
+            language.value: count
+            for language, count in store.language_histogram(Judgement.ACCEPTED).items()
+        },
+    }
+    with open(path, "w") as json_file:
+        json.dump(archive, json_file, indent=2)
+
+
+def write_archive_index(entries: list[ArchiveEntry], dir_path: str):
+    """Write the cross-problemset index of the archive as csv and json files."""
+    write_archive_csv(entries, os.path.join(dir_path, f"{ARCHIVE_FILENAME}.csv"))
+    write_archive_json(entries, os.path.join(dir_path, f"{ARCHIVE_FILENAME}.json"))
@@ -0,0 +1,73 @@
+"""Persistent caches stored in the crifx directory."""
+
+import json
+import logging
+import os
+from typing import Any
+
+
+class JsonCache:
+    """
+    A dictionary of cache entries persisted as a json file.
+
+    If `path` is None then the cache is only held in memory. Entries written
+    by a different cache `version` are discarded when the cache is loaded.
+    """
+
+    def __init__(self, path: str | None, version: int):
+        self.path = path
+        self.version = version
+        self.entries: dict[str, Any] = {}
+        self._modified = False
+        self._load()
+
+    def _load(self):
+        """Load the cache entries from file, if the file exists."""
+        if self.path is None or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r") as cache_file:
+                cache_dict = json.load(cache_file)
+        except (OSError, ValueError):
+            logging.warning("Ignoring unreadable cache file at '%s'.", self.path)
+            return
+        if not isinstance(cache_dict, dict) or cache_dict.get("version") != (
+            self.version
+        ):
+            logging.debug("Discarding outdated cache file at '%s'.", self.path)
+            return
+        entries = cache_dict.get("entries", {})
+        if isinstance(entries, dict):
+            self.entries = entries
+
+    def get(self, key: str) -> Any:
+        """Get a cache entry, or None if there is no entry for the key."""
+        return self.entries.get(key)
+
+    def set(self, key: str, value: Any):
+        """Set a cache entry."""
+        self.entries[key] = value
+        self._modified = True
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        if self.entries:
+            self.entries = {}
+            self._modified = True
+
+    def save(self):
+        """Write the cache to file if it has been modified."""
+        if self.path is None or not self._modified:
+            return
+        # Processes that share a cache file each write their own temporary file.
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as cache_file:
+                json.dump(
+                    {"version": self.version, "entries": self.entries}, cache_file
+                )
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logging.warning("Failed to write cache file at '%s'.", self.path)
+            return
+        self._modified = False
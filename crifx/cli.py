@@ -4,40 +4,108 @@ import argparse
 import logging
 import os
 import sys
+from datetime import date
 
 from crifx import __version__
+from crifx.archive import (
+    ArchiveOptions,
+    find_problemset_roots,
+    run_archive,
+    write_archive_index,
+)
 from crifx.config_parser import parse_config
+from crifx.contest_objects import ProblemSet
 from crifx.dir_layout_parsing import find_contest_problems_root
-from crifx.git_manager import GitManager
+from crifx.git_manager import AttributionMethod, GitManager
 from crifx.problemset_parser import ProblemSetParser
 from crifx.report_writer import ReportWriter, make_crifx_dir
+from crifx.timeline import compute_timeline, write_timeline
+from crifx.tree_reader import GitTreeReader, TreeReader, WorktreeReader
+from crifx.watch import ProblemSetWatcher
 
 CRIFX_ERROR_EXIT_CODE = 1
+TIMELINE_COMMAND = "timeline"
+ARCHIVE_COMMAND = "archive"
+COMMANDS = [TIMELINE_COMMAND, ARCHIVE_COMMAND]
 
 
-def _dir_path_argparse_type(path):
-    """Check that the provided path is a directory."""
-    if os.path.isdir(path):
-        return path
-    else:
-        raise ValueError(f"{path} is not a directory.")
+def _positive_int_argparse_type(value):
+    """Check that the provided value is a positive integer."""
+    int_value = int(value)
+    if int_value < 1:
+        raise ValueError(f"{value} is not a positive integer.")
+    return int_value
 
 
-def _make_argument_parser() -> argparse.ArgumentParser:
-    """Create an argument parser."""
-    parser = argparse.ArgumentParser(
-        description="ICPC Contest preparation Reporting and Insights tool For anyone.",
-        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-    )
-    parser.add_argument(
-        "path",
-        type=_dir_path_argparse_type,
-        nargs="?",
-        default=None,
-        help="Optional path to a problemset root directory. If not specified then "
-        "crifx will test the current directory and up to 5 parent directories "
-        "to find the first candidate problemset root directory.",
-    )
+def _date_argparse_type(value):
+    """Check that the provided value is a date in the YYYY-MM-DD format."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is not a YYYY-MM-DD date.")
+
+
+def _make_argument_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """Create an argument parser for crifx or for a crifx command."""
+    if command == TIMELINE_COMMAND:
+        parser = argparse.ArgumentParser(
+            prog="crifx timeline",
+            description="Compute the readiness of each problem over the git history "
+            "and write the series as csv and json files, along with a report that "
+            "includes a burndown chart.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        )
+        parser.add_argument(
+            "--every",
+            type=_positive_int_argparse_type,
+            default=1,
+            help="Compute the readiness for every Nth commit of the first-parent "
+            "history.",
+        )
+    elif command == ARCHIVE_COMMAND:
+        parser = argparse.ArgumentParser(
+            prog="crifx archive",
+            description="Find every problemset root directory under a directory, "
+            "write a report for each problemset and write an index of all of the "
+            "problemsets as csv and json files.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            description="ICPC Contest preparation Reporting and Insights tool For "
+            f"anyone. Run `crifx {TIMELINE_COMMAND} --help` or "
+            f"`crifx {ARCHIVE_COMMAND} --help` for the timeline and archive commands.",
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and rebuild the report whenever the problemset "
+            "changes. Only the problems that changed are parsed again.",
+        )
+        parser.add_argument(
+            "--watch-interval",
+            type=float,
+            default=1.0,
+            help="Number of seconds between checks for changes in watch mode.",
+        )
+    if command == ARCHIVE_COMMAND:
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=None,
+            help="Optional path to a directory to search for problemset root "
+            "directories. If not specified then the current directory is searched.",
+        )
+    else:
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=None,
+            help="Optional path to a problemset root directory. If not specified "
+            "then crifx will test the current directory and up to 5 parent "
+            "directories to find the first candidate problemset root directory.",
+        )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -50,7 +118,47 @@ def _make_argument_parser() -> argparse.ArgumentParser:
         default=None,
         help="Optional directory path to which to write the crifx report pdf. "
         "If omitted, then the report will be written to the problemset "
-        "root directory.",
+        "root directory. The archive command writes each report to a "
+        "subdirectory named by the path of the problemset.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int_argparse_type,
+        default=1,
+        help="Number of problems to parse concurrently, and number of worker "
+        "processes to use for attributing submissions to git users. The archive "
+        "command instead reports on this many problemsets concurrently.",
+    )
+    parser.add_argument(
+        "--attribution",
+        choices=[method.value for method in AttributionMethod],
+        default=None,
+        help="Method for attributing submissions to git users. If omitted, then "
+        "the method in the crifx configuration file is used.",
+    )
+    blame_horizon_group = parser.add_mutually_exclusive_group()
+    blame_horizon_group.add_argument(
+        "--blame-oldest-commit",
+        default=None,
+        help="Optional git revision beyond which git blame does not look. Lines "
+        "that are older are attributed to the author of this commit. If omitted, "
+        "then the horizon in the crifx configuration file is used.",
+    )
+    blame_horizon_group.add_argument(
+        "--blame-since",
+        type=_date_argparse_type,
+        default=None,
+        help="Optional YYYY-MM-DD date beyond which git blame does not look. Lines "
+        "that are older are attributed to the author of the newest earlier commit. "
+        "If omitted, then the horizon in the crifx configuration file is used.",
+    )
+    parser.add_argument(
+        "--rev",
+        default=None,
+        help="Optional git revision, such as a commit id, branch or tag, to report "
+        "on. The files of the revision are read from the git object database, so "
+        "the revision does not need to be checked out.",
     )
     parser.add_argument(
         "--version",
@@ -60,9 +168,52 @@ def _make_argument_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _archive(args: argparse.Namespace):
+    """Write a report for every problemset under a directory, and an index."""
+    if args.rev is not None:
+        logging.error("The archive command cannot be used with --rev")
+        sys.exit(CRIFX_ERROR_EXIT_CODE)
+    archive_root = os.path.abspath(args.path or os.getcwd())
+    if not os.path.isdir(archive_root):
+        logging.error("Specified path '%s' is not a directory", args.path)
+        sys.exit(CRIFX_ERROR_EXIT_CODE)
+    if args.output_dir is None:
+        output_dir = archive_root
+    else:
+        output_dir = os.path.abspath(args.output_dir)
+        if not os.path.isdir(output_dir):
+            logging.error("Specified output directory '%s' does not exist", output_dir)
+            sys.exit(CRIFX_ERROR_EXIT_CODE)
+    problemset_roots = find_problemset_roots(archive_root)
+    if not problemset_roots:
+        logging.error("Could not find any problemset root under '%s'", archive_root)
+        sys.exit(CRIFX_ERROR_EXIT_CODE)
+    logging.info("Found %d problemset(s)", len(problemset_roots))
+    options = ArchiveOptions(
+        archive_root,
+        make_crifx_dir(output_dir),
+        None if args.output_dir is None else output_dir,
+        None if args.attribution is None else AttributionMethod(args.attribution),
+        args.blame_oldest_commit,
+        args.blame_since,
+    )
+    entries = run_archive(problemset_roots, options, args.jobs)
+    write_archive_index(entries, output_dir)
+    failed_entries = [entry for entry in entries if entry.error is not None]
+    for entry in failed_entries:
+        logging.error("Failed to report on '%s': %s", entry.name, entry.error)
+    if failed_entries:
+        sys.exit(CRIFX_ERROR_EXIT_CODE)
+
+
 def main():
     """Entry point for crifx."""
-    args = _make_argument_parser().parse_args()
+    argv = sys.argv[1:]
+    command = None
+    if argv and argv[0] in COMMANDS:
+        command = argv[0]
+        argv = argv[1:]
+    args = _make_argument_parser(command).parse_args(argv)
     if args.version:
         print(__version__)
         return
@@ -74,10 +225,25 @@ def main():
     )
     logging.basicConfig(level=log_level, format=log_format)
     logging.debug("Running crifx-cli from %s", os.getcwd())
+    if command == ARCHIVE_COMMAND:
+        _archive(args)
+        return
+    reader: TreeReader
+    if args.rev is None:
+        reader = WorktreeReader()
+    else:
+        try:
+            reader = GitTreeReader.from_rev(args.path or os.getcwd(), args.rev)
+        except (KeyError, ValueError):
+            logging.error("Could not find git revision '%s'", args.rev)
+            sys.exit(CRIFX_ERROR_EXIT_CODE)
     if args.path is None:
-        problemset_root_path = find_contest_problems_root()
+        problemset_root_path = find_contest_problems_root(reader)
     else:
         problemset_root_path = os.path.abspath(args.path)
+        if not reader.is_dir(problemset_root_path):
+            logging.error("Specified path '%s' is not a directory", args.path)
+            sys.exit(CRIFX_ERROR_EXIT_CODE)
     if problemset_root_path is None:
         logging.error(
             "Could not find contest problems root from the current directory: %s",
@@ -86,23 +252,79 @@ def main():
         sys.exit(CRIFX_ERROR_EXIT_CODE)
     if args.output_dir is None:
         output_dir = problemset_root_path
+        if not os.path.isdir(output_dir):
+            logging.error(
+                "The problemset directory '%s' is not checked out. Specify an "
+                "output directory with --output-dir",
+                output_dir,
+            )
+            sys.exit(CRIFX_ERROR_EXIT_CODE)
     else:
         output_dir = os.path.abspath(args.output_dir)
         if not os.path.isdir(output_dir):
             logging.error("Specified output directory '%s' does not exist", output_dir)
             sys.exit(CRIFX_ERROR_EXIT_CODE)
-    config = parse_config(problemset_root_path)
-    git_manager = GitManager(problemset_root_path)
-    track_review_status = config.track_review_status
-    problemset_parser = ProblemSetParser(
-        problemset_root_path,
-        git_manager,
-        config.alias_groups,
-        track_review_status,
+    if getattr(args, "watch", False) and args.rev is not None:
+        logging.error("Watch mode cannot be used with --rev")
+        sys.exit(CRIFX_ERROR_EXIT_CODE)
+    config = parse_config(problemset_root_path, reader)
+    crifx_dir_path = make_crifx_dir(output_dir)
+    if args.attribution is None:
+        attribution_method = config.attribution.method
+    else:
+        attribution_method = AttributionMethod(args.attribution)
+    blame_oldest_commit = config.attribution.oldest_commit
+    blame_since = config.attribution.since
+    if args.blame_oldest_commit is not None or args.blame_since is not None:
+        blame_oldest_commit = args.blame_oldest_commit
+        blame_since = args.blame_since
+    try:
+        git_manager = GitManager(
+            problemset_root_path,
+            crifx_dir_path,
+            args.jobs,
+            attribution_method,
+            args.rev,
+            blame_oldest_commit,
+            blame_since,
+        )
+    except ValueError as error:
+        logging.error("%s", error)
+        sys.exit(CRIFX_ERROR_EXIT_CODE)
+    problemset_parser = ProblemSetParser.from_config(
+        problemset_root_path, config, git_manager, crifx_dir_path, reader, args.jobs
     )
+    data_stats_collector = problemset_parser.data_stats_collector
+    if getattr(args, "watch", False):
+
+        def write_report(problemset: ProblemSet):
+            writer = ReportWriter(problemset, config, git_manager)
+            writer.build_report(crifx_dir_path)
+            writer.write_tex(crifx_dir_path)
+            writer.write_pdf(output_dir)
+            logging.info("Report written to '%s'", output_dir)
+
+        watcher = ProblemSetWatcher(
+            problemset_parser, write_report, args.watch_interval
+        )
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            git_manager.close()
+            if data_stats_collector is not None:
+                data_stats_collector.close()
+        return
     problemset = problemset_parser.parse_problemset()
-    writer = ReportWriter(problemset, config, git_manager)
-    crifx_dir_path = make_crifx_dir(output_dir)
+    timeline = None
+    if command == TIMELINE_COMMAND:
+        timeline = compute_timeline(problemset_parser, config, args.every)
+        write_timeline(timeline, config.review_requirements, output_dir)
+    git_manager.close()
+    if data_stats_collector is not None:
+        data_stats_collector.close()
+    writer = ReportWriter(problemset, config, git_manager, timeline)
     writer.build_report(crifx_dir_path)
     writer.write_tex(crifx_dir_path)
     writer.write_pdf(output_dir)
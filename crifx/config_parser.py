@@ -5,14 +5,18 @@ The configuration file is also used for manually tracking the review status
 of the different parts of each problem.
 """
 
-import itertools
 import logging
 import os
 import tomllib
+from collections import defaultdict
 from dataclasses import dataclass
+from datetime import date, datetime
 from typing import Any
 
-from crifx.contest_objects import LanguageGroup, ProgrammingLanguage
+from crifx.alias_index import AliasIndex
+from crifx.contest_objects import CustomLanguage, LanguageGroup, LanguageRegistry
+from crifx.git_manager import AttributionMethod
+from crifx.tree_reader import TreeReader, WorktreeReader
 
 CONFIG_FILENAME = "crifx.toml"
 
@@ -80,8 +84,17 @@ class LanguageGroupConfig:
     required_ac_count: int = 0
 
     @staticmethod
-    def from_toml_dict(toml_dict: dict[str, Any]) -> "LanguageGroupConfig":
-        """Initialize a LanguageGroupConfig from a toml dict."""
+    def from_toml_dict(
+        toml_dict: dict[str, Any], language_registry: LanguageRegistry | None = None
+    ) -> "LanguageGroupConfig":
+        """
+        Initialize a LanguageGroupConfig from a toml dict.
+
+        Language names are looked up in `language_registry`, which includes
+        any languages defined in the configuration file.
+        """
+        if language_registry is None:
+            language_registry = LanguageRegistry()
         group_identifier = toml_dict.get("name")
         if group_identifier is None:
             raise ValueError(
@@ -90,7 +103,7 @@ class LanguageGroupConfig:
         language_names = toml_dict.get("languages", [])
         languages = []
         for language_name in language_names:
-            language = ProgrammingLanguage.from_language_name(language_name)
+            language = language_registry.from_language_name(language_name)
             if language is None:
                 logging.warning(
                     "Language %s is not recognized by crifx.", language_name
@@ -104,6 +117,28 @@ class LanguageGroupConfig:
         )
 
 
+def parse_custom_language(
+    toml_dict: dict[str, Any], language_registry: LanguageRegistry
+) -> CustomLanguage:
+    """Add a language defined in a `[[language]]` table to a registry."""
+    name = toml_dict.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError("Language in the `crifx.toml` file is missing a 'name'")
+    extensions = toml_dict.get("extensions")
+    if (
+        not isinstance(extensions, list)
+        or not extensions
+        or not all(isinstance(extension, str) and extension for extension in extensions)
+    ):
+        raise ValueError(
+            f"Language '{name}' in the `crifx.toml` file must have a non-empty "
+            "list of 'extensions'."
+        )
+    return language_registry.add_language(
+        name, [extension.removeprefix(".") for extension in extensions]
+    )
+
+
 @dataclass(frozen=True)
 class AliasGroup:
     """Alias group object for parsing alternate names from a config file."""
@@ -125,6 +160,204 @@ class AliasGroup:
         return AliasGroup(primary_name, git_name, aliases)
 
 
+@dataclass(frozen=True)
+class AttributionConfig:
+    """Configuration for attributing submissions to git users."""
+
+    # The method used to guess the git user that authored a submission.
+    method: AttributionMethod = AttributionMethod.BLAME
+    # The oldest commit considered when blaming a submission.
+    oldest_commit: str | None = None
+    # Commits older than this date are not considered when blaming a submission.
+    since: date | None = None
+
+    @staticmethod
+    def from_toml_dict(toml_dict: dict[str, Any]) -> "AttributionConfig":
+        """Initialize an AttributionConfig from a toml dict."""
+        method_name = toml_dict.get("method", AttributionMethod.BLAME.value)
+        try:
+            method = AttributionMethod(method_name)
+        except ValueError:
+            raise ValueError(
+                f"Attribution method '{method_name}' in the `crifx.toml` file is not "
+                f"one of: {', '.join(method.value for method in AttributionMethod)}."
+            )
+        oldest_commit = toml_dict.get("oldest_commit")
+        if oldest_commit is not None and not isinstance(oldest_commit, str):
+            raise ValueError(
+                "Attribution `oldest_commit` in the `crifx.toml` file must be a string."
+            )
+        since = toml_dict.get("since")
+        if isinstance(since, str):
+            try:
+                since = date.fromisoformat(since)
+            except ValueError:
+                raise ValueError(
+                    f"Attribution `since` date '{since}' in the `crifx.toml` file is "
+                    "not in the YYYY-MM-DD format."
+                )
+        elif since is not None and (
+            not isinstance(since, date) or isinstance(since, datetime)
+        ):
+            raise ValueError(
+                "Attribution `since` in the `crifx.toml` file must be a date."
+            )
+        if oldest_commit is not None and since is not None:
+            raise ValueError(
+                "At most one of the attribution `oldest_commit` and `since` can be "
+                "set in the `crifx.toml` file."
+            )
+        return AttributionConfig(
+            method=method, oldest_commit=oldest_commit, since=since
+        )
+
+
+@dataclass(frozen=True)
+class DataConfig:
+    """Configuration for statistics about the test data of each problem."""
+
+    # True iff statistics about the test data should be collected.
+    statistics: bool = False
+    # The maximum total size in bytes of the test data of a problem.
+    max_total_bytes: int | None = None
+    # The maximum size in bytes of a single test data file.
+    max_file_bytes: int | None = None
+
+    @property
+    def collect_statistics(self) -> bool:
+        """Return True iff statistics are needed to report on the test data."""
+        return (
+            self.statistics
+            or self.max_total_bytes is not None
+            or self.max_file_bytes is not None
+        )
+
+    @staticmethod
+    def from_toml_dict(toml_dict: dict[str, Any]) -> "DataConfig":
+        """Initialize a DataConfig from a toml dict."""
+        statistics = toml_dict.get("statistics", False)
+        if not isinstance(statistics, bool):
+            raise ValueError(
+                "Test data `statistics` in the `crifx.toml` file must be a boolean."
+            )
+        budgets = {}
+        for key in ("max_total_bytes", "max_file_bytes"):
+            budget = toml_dict.get(key)
+            if budget is not None and (
+                not isinstance(budget, int) or isinstance(budget, bool) or budget < 0
+            ):
+                raise ValueError(
+                    f"Test data `{key}` in the `crifx.toml` file must be a "
+                    "non-negative integer."
+                )
+            budgets[key] = budget
+        return DataConfig(statistics=statistics, **budgets)
+
+
+@dataclass(frozen=True)
+class SimilarityConfig:
+    """Configuration for detecting AC submissions that are copies."""
+
+    # True iff suspected copies should be detected and reported.
+    detect_copies: bool = False
+    # The minimum similarity, between 0 and 1, of a suspected copy.
+    threshold: float = 0.8
+    # True iff the authors of suspected copies count as one independent author.
+    merge_copy_authors: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        """Return True iff suspected copies are needed."""
+        return self.detect_copies or self.merge_copy_authors
+
+    @staticmethod
+    def from_toml_dict(toml_dict: dict[str, Any]) -> "SimilarityConfig":
+        """Initialize a SimilarityConfig from a toml dict."""
+        flags = {}
+        for key in ("detect_copies", "merge_copy_authors"):
+            flag = toml_dict.get(key, False)
+            if not isinstance(flag, bool):
+                raise ValueError(
+                    f"Similarity `{key}` in the `crifx.toml` file must be a boolean."
+                )
+            flags[key] = flag
+        threshold = toml_dict.get("threshold", 0.8)
+        if (
+            not isinstance(threshold, (int, float))
+            or isinstance(threshold, bool)
+            or not 0 < threshold <= 1
+        ):
+            raise ValueError(
+                "Similarity `threshold` in the `crifx.toml` file must be a number "
+                "greater than 0 and at most 1."
+            )
+        return SimilarityConfig(threshold=float(threshold), **flags)
+
+
+LATEX_COMPILERS = ("latexmk", "pdflatex", "lualatex", "xelatex")
+
+
+@dataclass(frozen=True)
+class LatexConfig:
+    """Configuration for compiling the report pdf."""
+
+    # The LaTeX compiler, or None to use latexmk if it is installed and
+    # pdflatex otherwise.
+    compiler: str | None = None
+    # Extra command line options for the compiler.
+    options: tuple[str, ...] = ()
+    # True iff the build files are kept in the crifx directory between runs.
+    incremental: bool = True
+    # The maximum number of compiler runs for the cross-references to settle.
+    passes_max: int = 5
+    # True iff the runs before the final run do not write the pdf.
+    draft_passes: bool = True
+
+    @staticmethod
+    def from_toml_dict(toml_dict: dict[str, Any]) -> "LatexConfig":
+        """Initialize a LatexConfig from a toml dict."""
+        compiler = toml_dict.get("compiler")
+        if compiler is not None and (
+            not isinstance(compiler, str)
+            or os.path.basename(compiler) not in LATEX_COMPILERS
+        ):
+            raise ValueError(
+                "LaTeX `compiler` in the `crifx.toml` file must be one of "
+                f"{', '.join(LATEX_COMPILERS)}."
+            )
+        options = toml_dict.get("options", [])
+        if not isinstance(options, list) or not all(
+            isinstance(option, str) for option in options
+        ):
+            raise ValueError(
+                "LaTeX `options` in the `crifx.toml` file must be a list of strings."
+            )
+        flags = {}
+        for key in ("incremental", "draft_passes"):
+            flag = toml_dict.get(key, True)
+            if not isinstance(flag, bool):
+                raise ValueError(
+                    f"LaTeX `{key}` in the `crifx.toml` file must be a boolean."
+                )
+            flags[key] = flag
+        passes_max = toml_dict.get("passes_max", 5)
+        if (
+            not isinstance(passes_max, int)
+            or isinstance(passes_max, bool)
+            or passes_max < 1
+        ):
+            raise ValueError(
+                "LaTeX `passes_max` in the `crifx.toml` file must be a positive "
+                "integer."
+            )
+        return LatexConfig(
+            compiler=compiler,
+            options=tuple(options),
+            passes_max=passes_max,
+            **flags,
+        )
+
+
 class Config:
     """Configuration for crifx requirements and review status."""
 
@@ -133,12 +366,25 @@ class Config:
         self.review_requirements = ReviewCountRequirements.from_toml_dict(
             toml_dict.get("review_requirements", {}),
         )
+        self.attribution = AttributionConfig.from_toml_dict(
+            toml_dict.get("attribution", {}),
+        )
+        self.test_data = DataConfig.from_toml_dict(
+            toml_dict.get("test_data", {}),
+        )
+        self.similarity = SimilarityConfig.from_toml_dict(
+            toml_dict.get("similarity", {}),
+        )
+        self.latex = LatexConfig.from_toml_dict(toml_dict.get("latex", {}))
+        self.language_registry = LanguageRegistry()
+        for language_dict in toml_dict.get("language", []):
+            parse_custom_language(language_dict, self.language_registry)
         self.language_group_configs = []
         self.alias_groups = []
         language_groups = toml_dict.get("language_group", [])
         for language_group_dict in language_groups:
             language_group_config = LanguageGroupConfig.from_toml_dict(
-                language_group_dict,
+                language_group_dict, self.language_registry
             )
             if not language_group_config.language_group.languages:
                 # No languages parsed from the language group.
@@ -148,21 +394,22 @@ class Config:
         for alias_group_dict in alias_groups:
             alias_group = AliasGroup.from_toml_dict(alias_group_dict)
             self.alias_groups.append(alias_group)
-        for alias_group_1, alias_group_2 in itertools.product(
-            self.alias_groups, self.alias_groups
-        ):
-            if alias_group_1 == alias_group_2:
-                continue
-            shared_aliases = list(
-                set(alias_group_1.aliases) & set(alias_group_2.aliases)
+        alias_index = AliasIndex.build(
+            (alias_group, alias_group.aliases) for alias_group in self.alias_groups
+        )
+        shared_aliases: defaultdict[tuple[str, str], list[str]] = defaultdict(list)
+        for alias, alias_group_1, alias_group_2 in alias_index.collisions:
+            shared_aliases[(alias_group_1.identifier, alias_group_2.identifier)].append(
+                alias
+            )
+        for (identifier_1, identifier_2), aliases in shared_aliases.items():
+            logging.warning(
+                "Judges '%s' and '%s' share the following aliases: %s. Remove shared "
+                "aliases from the crifx configuration file.",
+                identifier_1,
+                identifier_2,
+                ", ".join(aliases),
             )
-            if shared_aliases:
-                logging.warning(
-                    "Judges '%s' and '%s' share the following aliases: %s. Remove shared "
-                    "aliases from the crifx configuration file.",
-                    alias_group_1.identifier,
-                    alias_group_2.identifier,
-                )
 
     @property
     def track_review_status(self) -> bool:
@@ -174,9 +421,10 @@ class Config:
         )
 
 
-def parse_config(problemset_root_path: str) -> Config:
+def parse_config(problemset_root_path: str, reader: TreeReader | None = None) -> Config:
     """Parse a configuration file into a Config object."""
+    reader = reader or WorktreeReader()
     config_path = os.path.join(problemset_root_path, CONFIG_FILENAME)
-    with open(config_path, "rb") as config_file:
+    with reader.open_binary(config_path) as config_file:
         toml_dict = tomllib.load(config_file)
     return Config(toml_dict)
@@ -1,24 +1,47 @@
 """Objects corresponding to entities in a contest problemset package."""
 
+from crifx.contest_objects.data_stats import (
+    DataGroupStats,
+    DuplicateInputs,
+    FileStats,
+    ProblemDataStats,
+)
 from crifx.contest_objects.judge import UNKNOWN_JUDGE, Judge
 from crifx.contest_objects.judgement import Judgement
+from crifx.contest_objects.lazy_lines import LazyLines
 from crifx.contest_objects.problem import Problem
+from crifx.contest_objects.problem_readiness import ProblemReadiness
 from crifx.contest_objects.problem_test_case import ProblemTestCase
-from crifx.contest_objects.problemset import ProblemSet
+from crifx.contest_objects.problemset import ProblemParseFailure, ProblemSet
 from crifx.contest_objects.programming_language import (
+    CustomLanguage,
+    Language,
     LanguageGroup,
+    LanguageRegistry,
     ProgrammingLanguage,
 )
 from crifx.contest_objects.submission import Submission
+from crifx.contest_objects.suspected_copy import SuspectedCopy
 
 __all__ = [
+    "CustomLanguage",
+    "DataGroupStats",
+    "DuplicateInputs",
+    "FileStats",
     "Judge",
     "Judgement",
+    "Language",
     "LanguageGroup",
+    "LanguageRegistry",
+    "LazyLines",
     "Problem",
+    "ProblemDataStats",
+    "ProblemParseFailure",
+    "ProblemReadiness",
     "ProblemSet",
     "ProblemTestCase",
     "ProgrammingLanguage",
     "Submission",
+    "SuspectedCopy",
     "UNKNOWN_JUDGE",
 ]
@@ -0,0 +1,122 @@
+"""Statistics about the test data of a problem."""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class FileStats:
+    """Statistics about a single test data file."""
+
+    bytes_count: int
+    lines: int
+    # The length in bytes of the longest line, excluding the newline.
+    line_length_max: int
+    # A hex digest of the file content, or None if the file was not read.
+    digest: str | None = None
+
+
+@dataclass(frozen=True)
+class DataGroupStats:
+    """Statistics about the test data in a directory under `data`."""
+
+    # The directory under `data`, such as `sample` or `secret`.
+    group: str
+    test_cases: int
+    input_bytes: int
+    input_bytes_max: int
+    answer_bytes: int
+    answer_bytes_max: int
+    lines: int
+    line_length_max: int
+
+    @staticmethod
+    def from_file_stats(
+        group: str, test_case_stats: list[tuple[FileStats, FileStats]]
+    ) -> "DataGroupStats":
+        """Combine the statistics of the input and answer file of each test case."""
+        input_stats = [stats for stats, _ in test_case_stats]
+        answer_stats = [stats for _, stats in test_case_stats]
+        all_stats = input_stats + answer_stats
+        return DataGroupStats(
+            group=group,
+            test_cases=len(test_case_stats),
+            input_bytes=sum(stats.bytes_count for stats in input_stats),
+            input_bytes_max=max(
+                (stats.bytes_count for stats in input_stats), default=0
+            ),
+            answer_bytes=sum(stats.bytes_count for stats in answer_stats),
+            answer_bytes_max=max(
+                (stats.bytes_count for stats in answer_stats), default=0
+            ),
+            lines=sum(stats.lines for stats in all_stats),
+            line_length_max=max(
+                (stats.line_length_max for stats in all_stats), default=0
+            ),
+        )
+
+    @property
+    def total_bytes(self) -> int:
+        """Get the total size of the input and answer files."""
+        return self.input_bytes + self.answer_bytes
+
+    @property
+    def file_bytes_max(self) -> int:
+        """Get the size of the largest input or answer file."""
+        return max(self.input_bytes_max, self.answer_bytes_max)
+
+
+@dataclass(frozen=True)
+class DuplicateInputs:
+    """Test cases whose input files are byte-identical."""
+
+    # The test cases, as paths relative to `data` without an extension.
+    test_cases: tuple[str, ...]
+    # True iff the answer files of the test cases are not all identical.
+    conflicting_answers: bool
+
+
+@dataclass(frozen=True)
+class ProblemDataStats:
+    """Statistics about the test data of a problem."""
+
+    groups: tuple[DataGroupStats, ...]
+    duplicate_inputs: tuple[DuplicateInputs, ...] = ()
+
+    def get_group(self, group: str) -> DataGroupStats | None:
+        """Get the statistics for a group, if the problem has the group."""
+        return next((stats for stats in self.groups if stats.group == group), None)
+
+    @property
+    def input_bytes(self) -> int:
+        """Get the total size of the input files."""
+        return sum(stats.input_bytes for stats in self.groups)
+
+    @property
+    def input_bytes_max(self) -> int:
+        """Get the size of the largest input file."""
+        return max((stats.input_bytes_max for stats in self.groups), default=0)
+
+    @property
+    def answer_bytes(self) -> int:
+        """Get the total size of the answer files."""
+        return sum(stats.answer_bytes for stats in self.groups)
+
+    @property
+    def answer_bytes_max(self) -> int:
+        """Get the size of the largest answer file."""
+        return max((stats.answer_bytes_max for stats in self.groups), default=0)
+
+    @property
+    def total_bytes(self) -> int:
+        """Get the total size of the input and answer files."""
+        return sum(stats.total_bytes for stats in self.groups)
+
+    @property
+    def file_bytes_max(self) -> int:
+        """Get the size of the largest input or answer file."""
+        return max((stats.file_bytes_max for stats in self.groups), default=0)
+
+    @property
+    def line_length_max(self) -> int:
+        """Get the length of the longest line in any input or answer file."""
+        return max((stats.line_length_max for stats in self.groups), default=0)
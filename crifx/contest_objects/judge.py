@@ -20,11 +20,15 @@ class Judge:
         return name.lower() in self.aliases
 
     def is_same(self, other_judge):
-        """Determine if two Judge objects correspond to the same person."""
+        """
+        Determine if two Judge objects correspond to the same person.
+
+        Judges are the same if they have the same primary name or the same git
+        name. Judges without git names are not the same by that alone.
+        """
         return (
-            self.git_name == other_judge.git_name
-            or self.primary_name == other_judge.primary_name
-        )
+            self.git_name is not None and self.git_name == other_judge.git_name
+        ) or self.primary_name == other_judge.primary_name
 
     def __str__(self):
         return f"{self.primary_name}"
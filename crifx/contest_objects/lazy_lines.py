@@ -0,0 +1,57 @@
+"""Lines of a file that are only read when they are first used."""
+
+from collections.abc import Callable, Sequence
+from typing import Any, overload
+
+
+class LazyLines(Sequence[str]):
+    """
+    Sequence of the lines of a file, read on first access.
+
+    The size of the file is known up front, so whether there are any lines
+    can be checked without reading the file.
+    """
+
+    def __init__(self, load: Callable[[], list[str]], size: int):
+        self._load = load
+        self._size = size
+        self._lines: list[str] | None = None
+
+    @property
+    def size(self) -> int:
+        """Get the size of the file in bytes."""
+        return self._size
+
+    @property
+    def lines(self) -> list[str]:
+        """Get the lines, reading them if they have not been read yet."""
+        if self._lines is None:
+            self._lines = self._load()
+        return self._lines
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index):
+        return self.lines[index]
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazyLines):
+            return self.lines == other.lines
+        if isinstance(other, list):
+            return self.lines == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        if self._lines is None:
+            return f"LazyLines(<{self._size} bytes not read>)"
+        return f"LazyLines({self._lines!r})"
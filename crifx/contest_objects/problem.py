@@ -2,15 +2,16 @@
 
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import cached_property
 
+from crifx.contest_objects.data_stats import ProblemDataStats
 from crifx.contest_objects.judge import Judge
 from crifx.contest_objects.judgement import Judgement
+from crifx.contest_objects.problem_readiness import ProblemReadiness
 from crifx.contest_objects.problem_test_case import ProblemTestCase
-from crifx.contest_objects.programming_language import (
-    LanguageGroup,
-    ProgrammingLanguage,
-)
+from crifx.contest_objects.programming_language import Language, LanguageGroup
 from crifx.contest_objects.submission import Submission
+from crifx.contest_objects.suspected_copy import SuspectedCopy
 from crifx.report_objects import ReviewStatus
 
 
@@ -22,77 +23,75 @@ class Problem:
     test_cases: list[ProblemTestCase]
     submissions: list[Submission]
     review_status: ReviewStatus
+    # Statistics about the test data, if they were collected.
+    data_stats: ProblemDataStats | None = None
+    # AC submissions by different authors that look like copies, if detected.
+    suspected_copies: tuple[SuspectedCopy, ...] = ()
 
-    def _get_submissions_with_judgement(self, judgement):
-        return list(filter(lambda x: x.judgement is judgement, self.submissions))
+    @cached_property
+    def _submissions_by_judgement(self) -> dict[Judgement, list[Submission]]:
+        """
+        Get the submissions with each judgement, bucketed in one pass.
+
+        The buckets are shared, so callers get copies of them.
+        """
+        submissions_by_judgement: dict[Judgement, list[Submission]] = {
+            judgement: [] for judgement in Judgement
+        }
+        for submission in self.submissions:
+            submissions_by_judgement[submission.judgement].append(submission)
+        return submissions_by_judgement
 
     @property
     def ac_submissions(self) -> list[Submission]:
         """Get the AC submissions."""
-        return self._get_submissions_with_judgement(Judgement.ACCEPTED)
+        return list(self._submissions_by_judgement[Judgement.ACCEPTED])
 
     @property
     def wa_submissions(self) -> list[Submission]:
         """Get the WA submissions."""
-        return self._get_submissions_with_judgement(Judgement.WRONG_ANSWER)
+        return list(self._submissions_by_judgement[Judgement.WRONG_ANSWER])
 
     @property
     def tle_submissions(self) -> list[Submission]:
         """Get the TLE submissions."""
-        return self._get_submissions_with_judgement(Judgement.TIME_LIMIT_EXCEEDED)
+        return list(self._submissions_by_judgement[Judgement.TIME_LIMIT_EXCEEDED])
 
     @property
     def rte_submissions(self) -> list[Submission]:
         """Get the RTE submissions."""
-        return self._get_submissions_with_judgement(Judgement.RUN_TIME_ERROR)
+        return list(self._submissions_by_judgement[Judgement.RUN_TIME_ERROR])
+
+    @cached_property
+    def readiness(self) -> ProblemReadiness:
+        """Get the metrics about the AC submissions, computed once."""
+        return ProblemReadiness.from_submissions(
+            self._submissions_by_judgement[Judgement.ACCEPTED], self.suspected_copies
+        )
 
-    def independent_ac_count(self) -> int:
-        """Get the number of AC submissions by different authors."""
-        accepted_authors: list[Judge] = []
-        for submission in self.ac_submissions:
-            if any(submission.author.is_same(author) for author in accepted_authors):
-                continue
-            accepted_authors.append(submission.author)
-        return len(accepted_authors)
+    def independent_ac_count(self, merge_copies: bool = False) -> int:
+        """
+        Get the number of AC submissions by different authors.
+
+        If `merge_copies` is True, then the authors of suspected copies are
+        counted as one author.
+        """
+        if merge_copies:
+            return self.readiness.independent_ac_merged
+        return self.readiness.independent_ac
 
     def ac_lines_of_code_min(self):
         """Get the minimum Lines of Code among AC submissions to this problem."""
-        ac_min = None
-        for submission in self.ac_submissions:
-            if ac_min is None or submission.lines_of_code < ac_min:
-                ac_min = submission.lines_of_code
-        return ac_min
+        return self.readiness.ac_lines_of_code_min
 
     def ac_lines_of_code_median(self):
         """Get the median Lines of Code among AC submissions to this problem."""
-        ac_loc_vals = []
-        for submission in self.ac_submissions:
-            ac_loc_vals.append(submission.lines_of_code)
-        if not ac_loc_vals:
-            return None
-        ac_loc_vals.sort()
-        middle = len(ac_loc_vals) // 2
-        if len(ac_loc_vals) % 2 == 0:
-            return (ac_loc_vals[middle - 1] + ac_loc_vals[middle]) // 2
-        return ac_loc_vals[middle]
-
-    def ac_languages(self) -> defaultdict[ProgrammingLanguage, int]:
+        return self.readiness.ac_lines_of_code_median
+
+    def ac_languages(self) -> defaultdict[Language, int]:
         """Get the number of AC submissions in each language."""
-        language_counts: defaultdict[ProgrammingLanguage, int] = defaultdict(int)
-        for submission in self.ac_submissions:
-            language_counts[submission.language] += 1
-        return language_counts
+        return defaultdict(int, self.readiness.ac_languages)
 
     def language_groups_ac_covered(self, language_groups: list[LanguageGroup]):
         """Get the number of language groups that have at least one AC submission."""
-        groups_covered = []
-        ac_languages = self.ac_languages()
-        for language_group in language_groups:
-            covered = False
-            for language, count in ac_languages.items():
-                if count > 0 and language_group.has_language(language):
-                    covered = True
-                    break
-            if covered:
-                groups_covered.append(language_group)
-        return groups_covered
+        return self.readiness.language_groups_ac_covered(language_groups)
@@ -0,0 +1,130 @@
+"""Readiness metrics of a problem, computed in one pass over its submissions."""
+
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass
+
+from crifx.contest_objects.judge import Judge
+from crifx.contest_objects.programming_language import Language, LanguageGroup
+from crifx.contest_objects.submission import Submission
+from crifx.contest_objects.suspected_copy import SuspectedCopy
+
+
+def _identity_keys(judge: Judge) -> list[Hashable]:
+    """Get the keys that identify a judge: the primary name and git name."""
+    keys: list[Hashable] = [("name", judge.primary_name)]
+    if judge.git_name is not None:
+        keys.append(("git", judge.git_name))
+    return keys
+
+
+class _AuthorUnion:
+    """Union-find over judge identity keys."""
+
+    def __init__(self):
+        self.parents: dict[Hashable, Hashable] = {}
+
+    def find(self, key: Hashable) -> Hashable:
+        """Get the representative key of the set containing a key."""
+        parents = self.parents
+        parents.setdefault(key, key)
+        root = key
+        while parents[root] != root:
+            root = parents[root]
+        while parents[key] != root:
+            parents[key], key = root, parents[key]
+        return root
+
+    def union(self, key: Hashable, other_key: Hashable):
+        """Merge the sets containing two keys."""
+        self.parents[self.find(key)] = self.find(other_key)
+
+    def add_judge(self, judge: Judge) -> Hashable:
+        """Merge the identity keys of a judge and get their representative."""
+        keys = _identity_keys(judge)
+        for key in keys[1:]:
+            self.union(keys[0], key)
+        return self.find(keys[0])
+
+    def count(self, judges: Iterable[Judge]) -> int:
+        """Get the number of distinct people among judges."""
+        return len({self.find(_identity_keys(judge)[0]) for judge in judges})
+
+
+@dataclass(frozen=True)
+class ProblemReadiness:
+    """Metrics about the submissions to a problem, as shown in the report."""
+
+    independent_ac: int
+    # The number of independent AC authors when suspected copies are merged.
+    independent_ac_merged: int
+    ac_lines_of_code_min: int | None
+    ac_lines_of_code_median: int | None
+    # The number of AC submissions in each language.
+    ac_languages: dict[Language, int]
+    # The bits of the languages that have an AC submission.
+    ac_language_mask: int
+    # The sorted primary names of the authors of AC submissions.
+    ac_author_names: tuple[str, ...]
+
+    @staticmethod
+    def from_submissions(
+        ac_submissions: list[Submission],
+        suspected_copies: tuple[SuspectedCopy, ...] = (),
+    ) -> "ProblemReadiness":
+        """Compute the metrics of a problem from its AC submissions."""
+        author_union = _AuthorUnion()
+        ac_authors = []
+        lines_of_code = []
+        ac_languages: dict[Language, int] = {}
+        ac_language_mask = 0
+        for submission in ac_submissions:
+            author_union.add_judge(submission.author)
+            ac_authors.append(submission.author)
+            lines_of_code.append(submission.lines_of_code)
+            language = submission.language
+            ac_languages[language] = ac_languages.get(language, 0) + 1
+            ac_language_mask |= language.bit
+        independent_ac = author_union.count(ac_authors)
+        for suspected_copy in suspected_copies:
+            author_union.union(
+                author_union.add_judge(suspected_copy.submission.author),
+                author_union.add_judge(suspected_copy.other.author),
+            )
+        independent_ac_merged = author_union.count(ac_authors)
+        lines_of_code.sort()
+        lines_of_code_median = None
+        if lines_of_code:
+            middle = len(lines_of_code) // 2
+            if len(lines_of_code) % 2 == 0:
+                lines_of_code_median = (
+                    lines_of_code[middle - 1] + lines_of_code[middle]
+                ) // 2
+            else:
+                lines_of_code_median = lines_of_code[middle]
+        return ProblemReadiness(
+            independent_ac=independent_ac,
+            independent_ac_merged=independent_ac_merged,
+            ac_lines_of_code_min=lines_of_code[0] if lines_of_code else None,
+            ac_lines_of_code_median=lines_of_code_median,
+            ac_languages=ac_languages,
+            ac_language_mask=ac_language_mask,
+            ac_author_names=tuple(sorted({judge.primary_name for judge in ac_authors})),
+        )
+
+    def language_group_ac_count(self, language_group: LanguageGroup) -> int:
+        """Get the number of AC submissions in a language group."""
+        return sum(
+            count
+            for language, count in self.ac_languages.items()
+            if language_group.has_language(language)
+        )
+
+    def language_groups_ac_covered(
+        self, language_groups: list[LanguageGroup]
+    ) -> list[LanguageGroup]:
+        """Get the language groups that have at least one AC submission."""
+        return [
+            language_group
+            for language_group in language_groups
+            if language_group.mask & self.ac_language_mask
+        ]
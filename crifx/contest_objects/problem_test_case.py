@@ -1,6 +1,7 @@
 """Problem test case."""
 
 import os
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 
@@ -11,7 +12,8 @@ class ProblemTestCase:
     name: str
     is_sample: bool
     dir_path: str
-    description_lines: list[str]
+    # The lines of the description file. These may be read lazily.
+    description_lines: Sequence[str]
     image_extension: str | None
 
     @property
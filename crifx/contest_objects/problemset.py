@@ -1,15 +1,31 @@
 """Data structure and manager for a problem set."""
 
+from dataclasses import dataclass
+
 from crifx.contest_objects.judge import Judge
 from crifx.contest_objects.problem import Problem
 
 
+@dataclass(frozen=True)
+class ProblemParseFailure:
+    """A problem that could not be parsed."""
+
+    name: str
+    problem_root_dir: str
+    message: str
+
+
 class ProblemSet:
     """Data structure and manager for a problem set."""
 
-    def __init__(self, problems: list[Problem]):
+    def __init__(
+        self,
+        problems: list[Problem],
+        parse_failures: list[ProblemParseFailure] | None = None,
+    ):
         sorted_problems = sorted(problems, key=lambda x: x.name)
         self.problems = sorted_problems
+        self.parse_failures = sorted(parse_failures or [], key=lambda x: x.name)
 
     def submission_authors(self) -> list[Judge]:
         """Get the set of authors that have contributed at least one submission."""
@@ -1,5 +1,7 @@
 """Programming language enumeration object."""
 
+from collections.abc import Iterable
+from dataclasses import dataclass
 from enum import Enum
 from typing import Union
 
@@ -13,6 +15,10 @@ class ProgrammingLanguage(Enum):
     JAVA = "Java"
     KOTLIN = "Kotlin"
     RUST = "Rust"
+    GO = "Go"
+    HASKELL = "Haskell"
+    CSHARP = "C#"
+    OCAML = "OCaml"
     CTD = "Checktestdata"
     VIVA = "Viva"
 
@@ -31,39 +37,121 @@ class ProgrammingLanguage(Enum):
                 return ["kt"]
             case ProgrammingLanguage.RUST:
                 return ["rs"]
+            case ProgrammingLanguage.GO:
+                return ["go"]
+            case ProgrammingLanguage.HASKELL:
+                return ["hs"]
+            case ProgrammingLanguage.CSHARP:
+                return ["cs"]
+            case ProgrammingLanguage.OCAML:
+                return ["ml"]
             case ProgrammingLanguage.CTD:
                 return ["ctd"]
             case ProgrammingLanguage.VIVA:
                 return ["viva"]
 
+    @property
+    def bit(self) -> int:
+        """Get a distinct power of two for the language, for use in bitmasks."""
+        return _LANGUAGE_BITS[self]
+
     @staticmethod
     def from_filename(filename: str) -> Union["ProgrammingLanguage", None]:
         """Guess the programming language from a file name."""
-        if "." not in filename:
-            return None
-        extension = filename[filename.rindex(".") + 1 :]
-        for programming_language_str in ProgrammingLanguage:
-            programming_language = ProgrammingLanguage(programming_language_str)
-            if extension in programming_language.file_extensions():
-                return programming_language
-        return None
+        return _LANGUAGES_BY_EXTENSION.get(_get_extension(filename))
 
     @staticmethod
     def from_language_name(language_name: str) -> Union["ProgrammingLanguage", None]:
         """Get the programming language from a language name string."""
-        for programming_language in ProgrammingLanguage:
-            if language_name.lower() == programming_language.value.lower():
-                return programming_language
-        return None
+        return _LANGUAGES_BY_NAME.get(language_name.lower())
+
+
+def _get_extension(filename: str) -> str:
+    """Get the extension of a file name, or an empty string if it has none."""
+    _, period, extension = filename.rpartition(".")
+    return extension if period else ""
+
+
+_LANGUAGE_BITS = {
+    language: 1 << index for index, language in enumerate(ProgrammingLanguage)
+}
+_LANGUAGES_BY_EXTENSION = {
+    extension: language
+    for language in ProgrammingLanguage
+    for extension in language.file_extensions()
+}
+_LANGUAGES_BY_NAME = {
+    language.value.lower(): language for language in ProgrammingLanguage
+}
+
+
+@dataclass(frozen=True)
+class CustomLanguage:
+    """A programming language defined in the crifx configuration file."""
+
+    value: str
+    extensions: tuple[str, ...]
+    # A distinct power of two for the language, for use in bitmasks.
+    bit: int
+
+    def file_extensions(self) -> list[str]:
+        """Get a list of recognised file extensions for the language."""
+        return list(self.extensions)
+
+
+Language = ProgrammingLanguage | CustomLanguage
+
+
+class LanguageRegistry:
+    """
+    Lookup of programming languages by file extension and by name.
+
+    The registry starts with the languages known to crifx, and languages
+    defined in the configuration file can be added to it.
+    """
+
+    def __init__(self):
+        self._languages_by_extension: dict[str, Language] = dict(
+            _LANGUAGES_BY_EXTENSION
+        )
+        self._languages_by_name: dict[str, Language] = dict(_LANGUAGES_BY_NAME)
+        self.custom_languages: list[CustomLanguage] = []
+
+    def add_language(self, name: str, extensions: Iterable[str]) -> CustomLanguage:
+        """Add a language, which takes over any extensions it shares."""
+        if name.lower() in self._languages_by_name:
+            raise ValueError(f"Language '{name}' is already defined.")
+        language = CustomLanguage(
+            name,
+            tuple(extensions),
+            1 << (len(ProgrammingLanguage) + len(self.custom_languages)),
+        )
+        self.custom_languages.append(language)
+        self._languages_by_name[name.lower()] = language
+        for extension in language.extensions:
+            self._languages_by_extension[extension] = language
+        return language
+
+    def from_filename(self, filename: str) -> Language | None:
+        """Guess the programming language from a file name."""
+        return self._languages_by_extension.get(_get_extension(filename))
+
+    def from_language_name(self, language_name: str) -> Language | None:
+        """Get the programming language from a language name string."""
+        return self._languages_by_name.get(language_name.lower())
 
 
 class LanguageGroup:
     """A group of programming languages."""
 
-    def __init__(self, *languages: ProgrammingLanguage):
+    def __init__(self, *languages: Language):
         self.languages = tuple(sorted(languages, key=lambda x: x.value))
+        # The bits of the languages in the group.
+        self.mask = 0
+        for language in languages:
+            self.mask |= language.bit
 
-    def has_language(self, language: ProgrammingLanguage) -> bool:
+    def has_language(self, language: Language) -> bool:
         """Return True if the given language is in the group."""
         return language in self.languages
 
@@ -1,10 +1,11 @@
 """Data structure for a problem submission."""
 
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 
 from crifx.contest_objects.judge import Judge
 from crifx.contest_objects.judgement import Judgement
-from crifx.contest_objects.programming_language import ProgrammingLanguage
+from crifx.contest_objects.programming_language import Language
 
 
 @dataclass
@@ -13,7 +14,18 @@ class Submission:
 
     author: Judge
     filename: str
-    language: ProgrammingLanguage
+    language: Language
     judgement: Judgement
     lines_of_code: int
     bytes_count: int
+    # Reads the source code of the submission. The source code is not held in
+    # memory, so it is read again on each call to `read_source`.
+    source_loader: Callable[[], bytes] | None = field(
+        default=None, repr=False, compare=False
+    )
+
+    def read_source(self) -> bytes | None:
+        """Read the source code of the submission, if it can be read."""
+        if self.source_loader is None:
+            return None
+        return self.source_loader()
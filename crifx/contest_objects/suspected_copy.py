@@ -0,0 +1,15 @@
+"""Data structure for a pair of submissions that look like copies."""
+
+from dataclasses import dataclass
+
+from crifx.contest_objects.submission import Submission
+
+
+@dataclass(frozen=True)
+class SuspectedCopy:
+    """A pair of submissions by different authors with very similar code."""
+
+    submission: Submission
+    other: Submission
+    # The estimated similarity of the normalized code, between 0 and 1.
+    similarity: float
@@ -0,0 +1,268 @@
+"""Streaming measurement of the test data of problems."""
+
+import functools
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+from crifx.cache import JsonCache
+from crifx.config_parser import DataConfig
+from crifx.contest_objects import Problem, ProblemTestCase
+from crifx.contest_objects.data_stats import (
+    DataGroupStats,
+    DuplicateInputs,
+    FileStats,
+    ProblemDataStats,
+)
+from crifx.tree_reader import TreeReader
+
+DATA_STATS_CACHE_FILENAME = "data-stats-cache.json"
+DATA_STATS_CACHE_VERSION = 2
+DATA_READ_CHUNK_BYTES = 1 << 20
+DATA_GROUP_ORDER = ["sample", "secret"]
+
+
+def measure_file(binary_file: BinaryIO) -> FileStats:
+    """
+    Measure the size, line count, longest line and digest of a file.
+
+    The file is read in fixed-size chunks, so files of any size can be
+    measured in constant memory. Lines are counted as by `readlines`.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    bytes_count = 0
+    lines = 0
+    line_length_max = 0
+    line_length = 0
+    while chunk := binary_file.read(DATA_READ_CHUNK_BYTES):
+        bytes_count += len(chunk)
+        digest.update(chunk)
+        parts = chunk.split(b"\n")
+        if len(parts) == 1:
+            line_length += len(chunk)
+            continue
+        line_length_max = max(
+            line_length_max,
+            line_length + len(parts[0]),
+            max((len(part) for part in parts[1:-1]), default=0),
+        )
+        line_length = len(parts[-1])
+        lines += len(parts) - 1
+    if line_length > 0:
+        line_length_max = max(line_length_max, line_length)
+        lines += 1
+    return FileStats(bytes_count, lines, line_length_max, digest.hexdigest())
+
+
+def _get_group(problem_root_dir: str, test_case: ProblemTestCase) -> str:
+    """Get the directory under `data` that contains a test case."""
+    data_dir = os.path.join(problem_root_dir, "data")
+    return os.path.relpath(test_case.dir_path, data_dir).split(os.sep)[0]
+
+
+def _group_sort_key(group: str) -> tuple[int, str]:
+    """Get the sort key for a test data group."""
+    if group in DATA_GROUP_ORDER:
+        return DATA_GROUP_ORDER.index(group), group
+    return len(DATA_GROUP_ORDER), group
+
+
+def _find_duplicate_inputs(
+    problem_root_dir: str,
+    test_cases: list[ProblemTestCase],
+    test_case_stats: list[tuple[FileStats, FileStats]],
+) -> tuple[DuplicateInputs, ...]:
+    """Group the test cases whose input files have the same digest."""
+    data_dir = os.path.join(problem_root_dir, "data")
+    indices_by_digest: dict[str, list[int]] = {}
+    for index, (input_stats, _) in enumerate(test_case_stats):
+        if input_stats.digest is not None:
+            indices_by_digest.setdefault(input_stats.digest, []).append(index)
+    duplicate_inputs = []
+    for indices in indices_by_digest.values():
+        if len(indices) < 2:
+            continue
+        answer_digests = {
+            test_case_stats[index][1].digest
+            for index in indices
+            if test_case_stats[index][1].digest is not None
+        }
+        duplicate_inputs.append(
+            DuplicateInputs(
+                tuple(
+                    os.path.relpath(
+                        os.path.join(
+                            test_cases[index].dir_path, test_cases[index].name
+                        ),
+                        data_dir,
+                    )
+                    for index in indices
+                ),
+                len(answer_digests) > 1,
+            )
+        )
+    duplicate_inputs.sort(key=lambda x: x.test_cases)
+    return tuple(duplicate_inputs)
+
+
+class DataStatsCollector:
+    """
+    Collector of statistics about the test data of problems.
+
+    Files are measured in a pool of `jobs` threads. Measurements, including
+    the digest of the file content, are cached by path, and reused while the
+    reader's fingerprint of the file, such as its size and modification
+    time, is unchanged.
+    """
+
+    def __init__(self, cache_dir: str | None = None, jobs: int = 1):
+        cache_path = None
+        if cache_dir is not None:
+            cache_path = os.path.join(cache_dir, DATA_STATS_CACHE_FILENAME)
+        self.cache = JsonCache(cache_path, DATA_STATS_CACHE_VERSION)
+        self.jobs = jobs
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the pool of measurement threads, starting it if necessary."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.jobs)
+            return self._executor
+
+    def close(self):
+        """Shut down the measurement threads, if any were started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def save_cache(self):
+        """Write the cache to file if it has been modified."""
+        with self._lock:
+            self.cache.save()
+
+    def measure_file(self, reader: TreeReader, path: str) -> FileStats:
+        """Measure a file, reusing the cached measurement if it is unchanged."""
+        try:
+            fingerprint = reader.fingerprint(path)
+            entry = self.cache.get(path)
+            if (
+                fingerprint is not None
+                and entry is not None
+                and entry["fingerprint"] == fingerprint
+            ):
+                return FileStats(*entry["stats"])
+            with reader.open_binary(path) as binary_file:
+                file_stats = measure_file(binary_file)
+        except (FileNotFoundError, PermissionError):
+            logging.warning("Could not measure test data file at path '%s'", path)
+            return FileStats(0, 0, 0)
+        if fingerprint is not None:
+            with self._lock:
+                self.cache.set(
+                    path,
+                    {
+                        "fingerprint": fingerprint,
+                        "stats": [
+                            file_stats.bytes_count,
+                            file_stats.lines,
+                            file_stats.line_length_max,
+                            file_stats.digest,
+                        ],
+                    },
+                )
+        return file_stats
+
+    def measure_problem(
+        self,
+        reader: TreeReader,
+        problem_root_dir: str,
+        test_cases: list[ProblemTestCase],
+    ) -> ProblemDataStats:
+        """
+        Measure the input and answer files of the test cases of a problem.
+
+        Test cases with identical input files are found by their digests, so
+        no file is held in memory.
+        """
+        paths = [
+            path
+            for test_case in test_cases
+            for path in (test_case.input_path, test_case.answer_path)
+        ]
+        measure = functools.partial(self.measure_file, reader)
+        if self.jobs > 1 and len(paths) > 1:
+            file_stats = list(self._get_executor().map(measure, paths))
+        else:
+            file_stats = [measure(path) for path in paths]
+        test_case_stats = list(zip(file_stats[::2], file_stats[1::2]))
+        stats_by_group: dict[str, list[tuple[FileStats, FileStats]]] = {}
+        for test_case, stats in zip(test_cases, test_case_stats):
+            group = _get_group(problem_root_dir, test_case)
+            stats_by_group.setdefault(group, []).append(stats)
+        return ProblemDataStats(
+            tuple(
+                DataGroupStats.from_file_stats(group, stats_by_group[group])
+                for group in sorted(stats_by_group, key=_group_sort_key)
+            ),
+            _find_duplicate_inputs(problem_root_dir, test_cases, test_case_stats),
+        )
+
+
+def data_budget_warnings(problem: Problem, data_config: DataConfig) -> list[str]:
+    """Get a warning for each test data size budget that a problem exceeds."""
+    if problem.data_stats is None:
+        return []
+    warnings = []
+    total_bytes = problem.data_stats.total_bytes
+    if data_config.max_total_bytes is not None and (
+        total_bytes > data_config.max_total_bytes
+    ):
+        warnings.append(
+            f"{problem.name} has {format_bytes(total_bytes)} of test data, which "
+            f"exceeds the budget of {format_bytes(data_config.max_total_bytes)}."
+        )
+    file_bytes_max = problem.data_stats.file_bytes_max
+    if data_config.max_file_bytes is not None and (
+        file_bytes_max > data_config.max_file_bytes
+    ):
+        warnings.append(
+            f"{problem.name} has a {format_bytes(file_bytes_max)} test data file, "
+            f"which exceeds the budget of {format_bytes(data_config.max_file_bytes)}."
+        )
+    return warnings
+
+
+def data_duplicate_warnings(problem: Problem) -> list[str]:
+    """Get a warning for each group of test cases with identical inputs."""
+    if problem.data_stats is None:
+        return []
+    warnings = []
+    for duplicate_inputs in problem.data_stats.duplicate_inputs:
+        test_cases = ", ".join(duplicate_inputs.test_cases)
+        if duplicate_inputs.conflicting_answers:
+            warnings.append(
+                f"{problem.name} has test cases {test_cases} with identical inputs "
+                "but different answers."
+            )
+        else:
+            warnings.append(
+                f"{problem.name} has test cases {test_cases} with identical inputs."
+            )
+    return warnings
+
+
+def format_bytes(bytes_count: int) -> str:
+    """Get a human readable representation of a number of bytes."""
+    size = float(bytes_count)
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024 or unit == "GiB":
+            break
+        size /= 1024
+    if unit == "B":
+        return f"{bytes_count} B"
+    return f"{size:.1f} {unit}"
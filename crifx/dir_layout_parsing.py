@@ -2,6 +2,8 @@
 
 import os
 
+from crifx.tree_reader import TreeReader, WorktreeReader
+
 PROBLEM_ROOT_INDICATOR_DIRS = [
     "submissions",
     "problem_statement",
@@ -13,43 +15,41 @@ PROBLEM_ROOT_INDICATOR_FILES = [
 ]
 
 
-def is_problem_root_dir(path: str) -> bool:
+def is_problem_root_dir(path: str, reader: TreeReader | None = None) -> bool:
     """Detect if the given path is the root of a problem directory."""
-    if not os.path.isdir(path):
+    reader = reader or WorktreeReader()
+    if not reader.is_dir(path):
         return False
-    for dir_obj_name in os.listdir(path):
-        dir_obj_path = os.path.join(path, dir_obj_name)
-        if os.path.isdir(dir_obj_path) and dir_obj_name in PROBLEM_ROOT_INDICATOR_DIRS:
+    for entry in reader.list_dir(path):
+        if entry.is_dir and entry.name in PROBLEM_ROOT_INDICATOR_DIRS:
             return True
-        if (
-            os.path.isfile(dir_obj_path)
-            and dir_obj_name in PROBLEM_ROOT_INDICATOR_FILES
-        ):
+        if entry.is_file and entry.name in PROBLEM_ROOT_INDICATOR_FILES:
             return True
     return False
 
 
-def get_problem_root_dirs(path: str) -> list[str]:
+def get_problem_root_dirs(path: str, reader: TreeReader | None = None) -> list[str]:
     """Get the problem root directory paths under the current directory."""
-    if not os.path.isdir(path):
+    reader = reader or WorktreeReader()
+    if not reader.is_dir(path):
         return []
     problem_root_dirs = []
     try:
-        for dir_obj_name in os.listdir(path):
-            dir_obj_path = os.path.join(path, dir_obj_name)
-            if os.path.isdir(dir_obj_path) and is_problem_root_dir(dir_obj_path):
+        for entry in reader.list_dir(path):
+            dir_obj_path = os.path.join(path, entry.name)
+            if entry.is_dir and is_problem_root_dir(dir_obj_path, reader):
                 problem_root_dirs.append(dir_obj_path)
         return problem_root_dirs
     except PermissionError:
         return []
 
 
-def is_contest_problems_root(path: str) -> bool:
+def is_contest_problems_root(path: str, reader: TreeReader | None = None) -> bool:
     """Detect if a path has one or more problem root directories."""
-    return bool(get_problem_root_dirs(path))
+    return bool(get_problem_root_dirs(path, reader))
 
 
-def find_contest_problems_root() -> str | None:
+def find_contest_problems_root(reader: TreeReader | None = None) -> str | None:
     """
     Find the contest problems directory path from the current working directory.
 
@@ -59,7 +59,7 @@ def find_contest_problems_root() -> str | None:
     candidate_dir = current_dir
     parents_max = 5
     for _ in range(parents_max):
-        if is_contest_problems_root(candidate_dir):
+        if is_contest_problems_root(candidate_dir, reader):
             return candidate_dir
         candidate_dir = os.path.dirname(candidate_dir)
     return None
@@ -1,11 +1,35 @@
 """Logic for interacting with git."""
 
+import copy
+import multiprocessing
 import os
+import threading
 from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any
 
-from pygit2 import Repository, Signature, discover_repository
-from pygit2.enums import BlameFlag, FileStatus, SortMode
+from pygit2 import Commit, Oid, Repository, Signature, Tree, discover_repository
+from pygit2.enums import BlameFlag, DiffOption, FileStatus, SortMode
+
+from crifx.cache import JsonCache
+
+BLAME_CACHE_FILENAME = "blame-cache.json"
+BLAME_CACHE_VERSION = 2
+COMMITTERS_CACHE_FILENAME = "committers-cache.json"
+COMMITTERS_CACHE_VERSION = 2
+
+
+class AttributionMethod(Enum):
+    """Method for guessing the git user that authored a file."""
+
+    # The user with the most lines in the git blame of the file.
+    BLAME = "blame"
+    # The user who added the most lines to the file over the git history.
+    HISTORY = "history"
 
 
 @dataclass(frozen=True)
@@ -24,6 +48,25 @@ class GitUser:
             signature.name, signature.email, signature.raw_name, signature.raw_email
         )
 
+    def to_cache_dict(self) -> dict[str, str]:
+        """Get a json serializable representation of the git user."""
+        return {
+            "name": self.name,
+            "email": self.email,
+            "raw_name": self.raw_name.hex(),
+            "raw_email": self.raw_email.hex(),
+        }
+
+    @staticmethod
+    def from_cache_dict(cache_dict: dict[str, str]) -> "GitUser":
+        """Create a GitUser object from its json serializable representation."""
+        return GitUser(
+            cache_dict["name"],
+            cache_dict["email"],
+            bytes.fromhex(cache_dict["raw_name"]),
+            bytes.fromhex(cache_dict["raw_email"]),
+        )
+
     def __str__(self):
         """Get a string representation of a git user."""
         return f"{self.name} <{self.email}>"
@@ -32,60 +75,690 @@ class GitUser:
 class GitManager:
     """Manager class for interacting with git."""
 
-    def __init__(self, path_in_repo: str):
-        repo_path = discover_repository(path_in_repo)
-        if repo_path is None:
-            raise ValueError(f"Path '{path_in_repo}' is not in a git repository.")
-        self.repo = Repository(repo_path)
-        self.repo_root = os.path.abspath(os.path.join(repo_path, os.pardir))
+    def __init__(
+        self,
+        path_in_repo: str,
+        cache_dir: str | None = None,
+        jobs: int = 1,
+        attribution_method: AttributionMethod = AttributionMethod.BLAME,
+        rev: str | None = None,
+        blame_oldest_commit: str | None = None,
+        blame_since: date | None = None,
+    ):
+        self.repo, self.repo_root = open_repository(path_in_repo)
+        # If a revision is given, then files are attributed as of that commit
+        # rather than as of HEAD, and the working tree is not inspected.
+        self.rev = rev
+        self.rev_commit_id = None
+        if rev is not None:
+            self.rev_commit_id = self._revparse_commit(rev)
+        blame_cache_path = None
+        committers_cache_path = None
+        if cache_dir is not None:
+            blame_cache_path = os.path.join(cache_dir, BLAME_CACHE_FILENAME)
+            committers_cache_path = os.path.join(cache_dir, COMMITTERS_CACHE_FILENAME)
+        self.blame_cache = JsonCache(blame_cache_path, BLAME_CACHE_VERSION)
+        self.committers_cache = JsonCache(
+            committers_cache_path, COMMITTERS_CACHE_VERSION
+        )
+        self._descendant_of: dict[tuple[str, str], bool] = {}
+        self.jobs = jobs
+        # Managers made with `at_commit` share the worker pool of the manager
+        # that they were derived from, which owns it.
+        self._root = self
+        self._blame_pool: ProcessPoolExecutor | None = None
+        # Guards the repository and caches when attributing files from
+        # several threads. Blames run in worker processes without the lock.
+        self._lock = threading.RLock()
+        self.attribution_method = attribution_method
+        self._history_indexed_dirs: set[str] = set()
+        self._history_lines_added: dict[str, dict[GitUser, int]] = {}
+        # The commit that the history index was built from.
+        self._history_commit_id: str | None = None
+        self._status: dict[str, FileStatus] | None = None
+        # Paths that differ from HEAD in the working tree, including ignored
+        # paths, which are not in the status snapshot.
+        self._changed_paths: list[str] | None = None
+        self._current_user: GitUser | None = None
+        self._current_user_read = False
+        # Blame does not look further back than the horizon. Lines that are
+        # older than the horizon are attributed to the boundary commit.
+        self.blame_oldest_commit_id = None
+        if blame_oldest_commit is not None:
+            self.blame_oldest_commit_id = self._revparse_commit(blame_oldest_commit)
+        self.blame_since = blame_since
+        self._blame_boundaries: dict[str, str | None] = {}
+
+    def _revparse_commit(self, rev: str) -> Oid:
+        """Get the id of the commit that a revision refers to."""
+        try:
+            return self.repo.revparse_single(rev).peel(Commit).id
+        except (KeyError, ValueError) as error:
+            raise ValueError(f"Could not find git revision '{rev}'.") from error
+
+    def at_commit(self, commit_id: Oid) -> "GitManager":
+        """
+        Get a manager that attributes files as of another commit.
+
+        The returned manager shares the repository, caches and worker pool of
+        this manager. It starts from a copy of the history index of this
+        manager, which is extended rather than rebuilt if the commit is a
+        descendant of the indexed commit.
+        """
+        git_manager = copy.copy(self)
+        # Only the root manager holds the worker pool.
+        git_manager._blame_pool = None
+        git_manager.rev = str(commit_id)
+        git_manager.rev_commit_id = commit_id
+        git_manager._history_indexed_dirs = set(self._history_indexed_dirs)
+        git_manager._history_lines_added = {
+            path: dict(lines_added)
+            for path, lines_added in self._history_lines_added.items()
+        }
+        git_manager._status = None
+        git_manager._changed_paths = None
+        return git_manager
+
+    def save_caches(self):
+        """Write any modified caches to file."""
+        self.blame_cache.save()
+        self.committers_cache.save()
+
+    def close(self):
+        """
+        Shut down the blame worker processes, if any were started.
+
+        The worker pool is shared with the managers made with `at_commit`, so
+        closing any of them closes the pool for all of them.
+        """
+        root = self._root
+        with self._lock:
+            if root._blame_pool is not None:
+                root._blame_pool.shutdown()
+                root._blame_pool = None
+
+    def refresh_status(self):
+        """Discard the working tree status snapshot."""
+        self._status = None
+        self._changed_paths = None
+
+    def get_clean_tree_id(self, abs_dir_path: str) -> Oid | None:
+        """
+        Get the id of the tree of a directory, if the working tree matches it.
+
+        The tree is taken from the commit being reported on. None is returned
+        if the directory is not in the commit, or if any file in the directory
+        is modified, staged, untracked or ignored in the working tree.
+        """
+        path = os.path.relpath(abs_dir_path, self.repo_root)
+        with self._lock:
+            tree = _get_subtree(self.repo[self.get_commit_id()].tree, path)
+            if tree is None:
+                return None
+            if self.rev is not None:
+                return tree.id
+            if self._changed_paths is None:
+                self._changed_paths = list(self.repo.status(ignored=True))
+        prefix = "" if path == os.curdir else f"{path.replace(os.sep, '/')}/"
+        if any(changed.startswith(prefix) for changed in self._changed_paths):
+            return None
+        return tree.id
 
-    def get_committers_and_authors(self) -> list[GitUser]:
-        """Get a list of every git user that has authored or committed a commit."""
-        last_commit = self.repo[self.repo.head.target]  # type: ignore
+    def is_tree_unchanged_since(
+        self, abs_dir_path: str, tree_id: Oid, ancestor_id: str
+    ) -> bool:
+        """
+        Check that a directory has kept its tree since an earlier commit.
+
+        The earlier commit must be in the history of the commit being reported
+        on, and the directory must have the tree at every first-parent commit
+        since then. Files in the directory are then attributed as they were at
+        the earlier commit. A directory that was changed and later reverted
+        to the same tree is not unchanged, since the revert owns its lines.
+        """
+        path = os.path.relpath(abs_dir_path, self.repo_root)
+        commit_id = str(self.get_commit_id())
+        if commit_id == ancestor_id:
+            return True
+        with self._lock:
+            return self._is_descendant_of(
+                commit_id, ancestor_id
+            ) and self._is_unchanged_since(path, str(tree_id), commit_id, ancestor_id)
+
+    def get_file_status(self, path: str) -> FileStatus:
+        """
+        Get the status of a repo-relative path in the working tree.
+
+        The status of every path is read from the index and working tree once,
+        and later calls are answered from that snapshot until
+        `refresh_status` is called.
+        """
+        if self._status is None:
+            self._status = self.repo.status()
+        return self._status.get(path, FileStatus.CURRENT)
+
+    def _get_current_user(self) -> GitUser | None:
+        """Get the git user from the global git config, reading it only once."""
+        if not self._current_user_read:
+            global_config = self.repo.config.get_global_config()  # type: ignore
+            name = global_config["user.name"]
+            email = global_config["user.email"]
+            if name is not None and email is not None:
+                self._current_user = GitUser.from_signature(Signature(name, email))
+            self._current_user_read = True
+        return self._current_user
+
+    def _get_blame_pool(self) -> ProcessPoolExecutor:
+        """Get the pool of blame worker processes, starting it if necessary."""
+        root = self._root
+        if root._blame_pool is None:
+            root._blame_pool = ProcessPoolExecutor(
+                max_workers=root.jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_blame_worker,
+                initargs=(root.repo.path,),
+            )
+        return root._blame_pool
+
+    def get_committers_and_authors(
+        self, abs_dir_path: str | None = None
+    ) -> list[GitUser]:
+        """
+        Get a list of every git user that has authored or committed a commit.
+
+        If a directory path is given, then only commits that change the tree
+        of the directory are considered. Commits are compared by the id of the
+        directory subtree, so unchanged commits are skipped without a diff.
+
+        The users found and the last commit walked are cached, so that only
+        commits that are new since the last call are walked. If the cached
+        commit is no longer in the history then all commits are walked.
+        """
+        dir_path = ""
+        if abs_dir_path is not None:
+            dir_path = os.path.relpath(abs_dir_path, self.repo_root)
+            if dir_path == os.curdir:
+                dir_path = ""
+        head_id = str(self.get_commit_id())
         git_users = set()
-        for commit in self.repo.walk(last_commit.id, SortMode.TIME):
+        walker = self.repo.walk(head_id, SortMode.TIME)
+        entry = self.committers_cache.get(dir_path)
+        if entry is not None and (
+            entry["commit"] == head_id
+            or self._is_descendant_of(head_id, entry["commit"])
+        ):
+            git_users.update(GitUser.from_cache_dict(user) for user in entry["users"])
+            walker.hide(entry["commit"])
+        for commit in walker:
+            if dir_path and not _changes_subtree(commit, dir_path):
+                continue
             author = commit.author
             committer = commit.committer
             git_users.add(GitUser.from_signature(author))
             git_users.add(GitUser.from_signature(committer))
-        return sorted(git_users, key=lambda x: x.name)
+        sorted_users = sorted(git_users, key=lambda x: x.name)
+        if entry is None or entry["commit"] != head_id:
+            self.committers_cache.set(
+                dir_path,
+                {
+                    "commit": head_id,
+                    "users": [user.to_cache_dict() for user in sorted_users],
+                },
+            )
+        return sorted_users
 
     def guess_file_author(self, abs_path: str) -> GitUser | None:
         """Guess the author of a file path."""
-        if not os.path.isfile(abs_path):
-            raise ValueError(f"Path '{abs_path}' is not a file.")
-        path = os.path.relpath(abs_path, self.repo_root)
-        file_status = self.repo.status_file(path)
-        if file_status in (FileStatus.WT_NEW, FileStatus.INDEX_NEW):
-            # Handle cases where the file is new and untracked or staged but
-            # not committed. Assume that the current git user is the author.
-            name = self.repo.config.get_global_config()["user.name"]  # type: ignore
-            email = self.repo.config.get_global_config()["user.email"]  # type: ignore
-            if name is not None and email is not None:
-                return GitUser.from_signature(Signature(name, email))
-            return None
-        blame = self.repo.blame(  # type: ignore
-            path, flags=BlameFlag.NORMAL | BlameFlag.IGNORE_WHITESPACE
+        return self.guess_file_authors([abs_path])[abs_path]
+
+    def guess_file_authors(self, abs_paths: list[str]) -> dict[str, GitUser | None]:
+        """Guess the authors of several file paths with the attribution method."""
+        if self.attribution_method is AttributionMethod.HISTORY:
+            return self.guess_file_authors_by_history(abs_paths)
+        return self.guess_file_authors_by_blame(abs_paths)
+
+    def prepare_attribution(self, abs_dir_paths: list[str]):
+        """
+        Prepare to guess the authors of files in the given directories.
+
+        For the history attribution method, the history is walked once for all
+        of the directories, rather than once per call to `guess_file_authors`.
+        """
+        if self.attribution_method is AttributionMethod.HISTORY:
+            with self._lock:
+                self._index_history(
+                    [os.path.relpath(path, self.repo_root) for path in abs_dir_paths]
+                )
+
+    def _split_new_files(
+        self, abs_paths: list[str]
+    ) -> tuple[dict[str, GitUser | None], list[tuple[str, str]]]:
+        """
+        Guess the authors of new files and get the remaining tracked files.
+
+        The tracked files are returned as pairs of absolute and repo-relative
+        paths.
+        """
+        authors: dict[str, GitUser | None] = {}
+        tracked = []
+        for abs_path in abs_paths:
+            path = os.path.relpath(abs_path, self.repo_root)
+            if self.rev is not None:
+                tracked.append((abs_path, path))
+                continue
+            if not os.path.isfile(abs_path):
+                raise ValueError(f"Path '{abs_path}' is not a file.")
+            file_status = self.get_file_status(path)
+            if file_status in (FileStatus.WT_NEW, FileStatus.INDEX_NEW):
+                # Handle cases where the file is new and untracked or staged but
+                # not committed. Assume that the current git user is the author.
+                authors[abs_path] = self._get_current_user()
+                continue
+            tracked.append((abs_path, path))
+        return authors, tracked
+
+    def guess_file_authors_by_blame(
+        self, abs_paths: list[str]
+    ) -> dict[str, GitUser | None]:
+        """
+        Guess the authors of several file paths using git blame.
+
+        Files that need to be blamed are blamed in a pool of `jobs` worker
+        processes, largest files first. The results are the same as guessing
+        the author of each file individually.
+        """
+        with self._lock:
+            authors, tracked = self._split_new_files(abs_paths)
+            if not tracked:
+                return authors
+            commit_id = str(self.get_commit_id())
+            oldest_commit_id = self._get_blame_boundary(commit_id)
+            to_blame = []
+            for abs_path, path in tracked:
+                blob_id = self._get_blob_id(path)
+                cached_entry = self._get_cached_blame(
+                    path, blob_id, commit_id, oldest_commit_id
+                )
+                if cached_entry is not None:
+                    if cached_entry["user"] is None:
+                        authors[abs_path] = None
+                    else:
+                        authors[abs_path] = GitUser.from_cache_dict(
+                            cached_entry["user"]
+                        )
+                    continue
+                to_blame.append((abs_path, path, blob_id))
+            if self.jobs > 1 and len(to_blame) > 1:
+                to_blame.sort(key=lambda x: self._get_blob_size(x[2]), reverse=True)
+                pool = self._get_blame_pool()
+                futures = [
+                    pool.submit(_blame_worker, path, commit_id, oldest_commit_id)
+                    for _, path, _ in to_blame
+                ]
+            else:
+                futures = None
+                results = [
+                    _blame_path(self.repo, path, commit_id, oldest_commit_id)
+                    for _, path, _ in to_blame
+                ]
+        if futures is not None:
+            results = [future.result() for future in futures]
+        with self._lock:
+            for (abs_path, path, blob_id), (user_max, lines_modified) in zip(
+                to_blame, results
+            ):
+                if blob_id is not None:
+                    self._set_cached_blame(
+                        path,
+                        blob_id,
+                        commit_id,
+                        oldest_commit_id,
+                        user_max,
+                        lines_modified,
+                    )
+                authors[abs_path] = user_max
+        return authors
+
+    def guess_file_authors_by_history(
+        self, abs_paths: list[str]
+    ) -> dict[str, GitUser | None]:
+        """
+        Guess the authors of several file paths from the lines added by commits.
+
+        The author of a file is the committer who added the most lines to the
+        file over the history of the repository. The history is walked once for
+        all of the directories containing the files.
+        """
+        with self._lock:
+            authors, tracked = self._split_new_files(abs_paths)
+            self._index_history([os.path.dirname(path) for _, path in tracked])
+            for abs_path, path in tracked:
+                lines_added = self._history_lines_added.get(path, {})
+                user_max = None
+                lines_max = 0
+                for git_user, lines in lines_added.items():
+                    if lines > lines_max:
+                        lines_max = lines
+                        user_max = git_user
+                authors[abs_path] = user_max
+        return authors
+
+    def _index_history(self, dir_paths: list[str]):
+        """
+        Count the lines added by each committer to files in the directories.
+
+        The history is walked once from the current commit. If the index was
+        built from an ancestor of the current commit, then only the commits
+        since that ancestor are walked for the directories already indexed.
+        """
+        commit_id = self.get_commit_id()
+        if self._history_commit_id != str(commit_id):
+            if self._history_commit_id is not None and self._is_descendant_of(
+                str(commit_id), self._history_commit_id
+            ):
+                walker = self.repo.walk(commit_id, SortMode.TIME)
+                walker.hide(self._history_commit_id)
+                self._count_lines_added(walker, sorted(self._history_indexed_dirs))
+            else:
+                self._history_indexed_dirs = set()
+                self._history_lines_added = {}
+            self._history_commit_id = str(commit_id)
+        dir_paths = sorted(
+            {"" if path == os.curdir else path for path in dir_paths}
+            - self._history_indexed_dirs
         )
-        lines_modified: defaultdict[GitUser, int] = defaultdict(int)
-        lines_max = 0
-        user_max = None
-        for hunk in blame:
-            committer = hunk.final_committer
-            if committer is None:
+        if not dir_paths:
+            return
+        self._history_indexed_dirs.update(dir_paths)
+        self._count_lines_added(self.repo.walk(commit_id, SortMode.TIME), dir_paths)
+
+    def _count_lines_added(self, commits: Iterable[Commit], dir_paths: list[str]):
+        """
+        Add the lines added by the commits to files in the directories.
+
+        Only the subtrees for the directories that differ from the first
+        parent commit are diffed. Merge commits are skipped since the lines
+        that they bring in are counted in the merged commits.
+        """
+        if not dir_paths:
+            return
+        diff_flags = DiffOption.NORMAL | DiffOption.IGNORE_WHITESPACE
+        for commit in commits:
+            if len(commit.parents) > 1:
                 continue
-            git_user = GitUser.from_signature(committer)
-            lines_modified[git_user] += hunk.lines_in_hunk
-            if lines_modified[git_user] > lines_max:
-                lines_max = lines_modified[git_user]
-                user_max = git_user
-        return user_max
+            parent_tree = commit.parents[0].tree if commit.parents else None
+            git_user = GitUser.from_signature(commit.committer)
+            for dir_path in dir_paths:
+                subtree = _get_subtree(commit.tree, dir_path)
+                parent_subtree = _get_subtree(parent_tree, dir_path)
+                if subtree is None:
+                    continue
+                if parent_subtree is None:
+                    diff = subtree.diff_to_tree(flags=diff_flags, swap=True)
+                elif parent_subtree.id == subtree.id:
+                    continue
+                else:
+                    diff = parent_subtree.diff_to_tree(subtree, flags=diff_flags)
+                for patch in diff:
+                    if patch is None:
+                        continue
+                    _, additions, _ = patch.line_stats
+                    if additions == 0:
+                        continue
+                    path = os.path.join(dir_path, patch.delta.new_file.path)
+                    lines_added = self._history_lines_added.setdefault(path, {})
+                    lines_added[git_user] = lines_added.get(git_user, 0) + additions
+
+    def _get_blob_size(self, blob_id: str | None) -> int:
+        """Get the size of a blob in bytes."""
+        if blob_id is None:
+            return 0
+        return self.repo[blob_id].size  # type: ignore
+
+    def _get_blob_id(self, path: str) -> str | None:
+        """Get the id of the blob for a repo-relative path in the HEAD tree."""
+        tree = self.repo[self.get_commit_id()].tree  # type: ignore
+        try:
+            return str(tree[path].id)
+        except KeyError:
+            return None
+
+    def _is_descendant_of(self, commit_id: str, ancestor_id: str) -> bool:
+        """Return True iff `ancestor_id` is reachable from `commit_id`."""
+        key = (commit_id, ancestor_id)
+        if key not in self._descendant_of:
+            try:
+                self._descendant_of[key] = self.repo.descendant_of(
+                    commit_id, ancestor_id
+                )
+            except (KeyError, ValueError):
+                # The ancestor commit no longer exists. History was rewritten.
+                self._descendant_of[key] = False
+        return self._descendant_of[key]
+
+    def _get_blame_boundary(self, commit_id: str) -> str | None:
+        """
+        Get the oldest commit to consider when blaming files as of a commit.
+
+        If a since-date is set, then the boundary is the newest commit on the
+        first-parent history of the commit that is older than the date. None
+        is returned if the blame is not bounded.
+        """
+        if self.blame_oldest_commit_id is not None:
+            return str(self.blame_oldest_commit_id)
+        if self.blame_since is None:
+            return None
+        if commit_id not in self._blame_boundaries:
+            since_time = datetime.combine(
+                self.blame_since, datetime.min.time(), tzinfo=timezone.utc
+            ).timestamp()
+            walker = self.repo.walk(commit_id, SortMode.TOPOLOGICAL)
+            walker.simplify_first_parent()
+            boundary = None
+            for commit in walker:
+                if commit.commit_time < since_time:
+                    boundary = str(commit.id)
+                    break
+            self._blame_boundaries[commit_id] = boundary
+        return self._blame_boundaries[commit_id]
+
+    def _get_cached_blame(
+        self,
+        path: str,
+        blob_id: str | None,
+        commit_id: str,
+        oldest_commit_id: str | None,
+    ) -> dict[str, Any] | None:
+        """
+        Get the cached blame entry for a file, if it is still valid.
+
+        A cached result is valid if the file content is unchanged, the blame
+        was computed with the same horizon, the commit the blame was computed
+        for is still in the history of the current commit, and the file has
+        the same content at every first-parent commit since then. Blame is
+        then passed on to the first parent at each of those commits, so the
+        result carries forward. A file that was changed and later reverted
+        to the same content is blamed again, since the revert now owns its
+        lines.
+        """
+        entry = self.blame_cache.get(path)
+        if blob_id is None or entry is None or entry["blob"] != blob_id:
+            return None
+        if entry["oldest"] != oldest_commit_id:
+            return None
+        if entry["commit"] != commit_id:
+            if not self._is_descendant_of(
+                commit_id, entry["commit"]
+            ) or not self._is_unchanged_since(
+                path, blob_id, commit_id, entry["commit"]
+            ):
+                return None
+            entry["commit"] = commit_id
+            self.blame_cache.set(path, entry)
+        return entry
+
+    def _is_unchanged_since(
+        self, path: str, object_id: str, commit_id: str, ancestor_id: str
+    ) -> bool:
+        """
+        Check that a path has the same blob or tree at every first-parent commit.
+
+        The commits are those on the first-parent history of `commit_id` that
+        are not in the history of `ancestor_id`.
+        """
+        walker = self.repo.walk(commit_id, SortMode.TOPOLOGICAL)
+        walker.simplify_first_parent()
+        walker.hide(ancestor_id)
+        for commit in walker:
+            try:
+                if path == os.curdir:
+                    entry_id = commit.tree.id
+                else:
+                    entry_id = commit.tree[path].id
+            except KeyError:
+                return False
+            if str(entry_id) != object_id:
+                return False
+        return True
+
+    def _set_cached_blame(
+        self,
+        path: str,
+        blob_id: str,
+        commit_id: str,
+        oldest_commit_id: str | None,
+        user: GitUser | None,
+        lines_modified: dict[GitUser, int],
+    ):
+        """Store the blame result for a file in the cache."""
+        entry: dict[str, Any] = {
+            "blob": blob_id,
+            "commit": commit_id,
+            "oldest": oldest_commit_id,
+            "user": None if user is None else user.to_cache_dict(),
+            "lines": [
+                [git_user.to_cache_dict(), lines]
+                for git_user, lines in lines_modified.items()
+            ],
+        }
+        self.blame_cache.set(path, entry)
 
     def get_commit_id(self):
-        """Get the current commit id."""
+        """Get the id of the commit being reported on."""
+        if self.rev_commit_id is not None:
+            return self.rev_commit_id
         return self.repo.head.target
 
     def get_short_commit_id(self):
         """Get the first 8 characters of the current commit id."""
         commid_id_str = str(self.get_commit_id())
         return commid_id_str[:8]
+
+
+def open_repository(path_in_repo: str) -> tuple[Repository, str]:
+    """
+    Open the repository containing a path and get its root directory path.
+
+    The path does not need to exist, so that paths in the tree of a bare
+    repository can be used.
+    """
+    discover_path = os.path.abspath(path_in_repo)
+    while not os.path.exists(discover_path) and discover_path != os.path.dirname(
+        discover_path
+    ):
+        discover_path = os.path.dirname(discover_path)
+    repo_path = discover_repository(discover_path)
+    if repo_path is None:
+        raise ValueError(f"Path '{path_in_repo}' is not in a git repository.")
+    repo = Repository(repo_path)
+    if repo.is_bare:
+        # The tree of a bare repository is rooted at the repository directory.
+        return repo, os.path.abspath(repo_path)
+    return repo, os.path.abspath(os.path.join(repo_path, os.pardir))
+
+
+def _get_subtree(tree: Tree | None, dir_path: str) -> Tree | None:
+    """Get the subtree at a relative directory path, if there is one."""
+    if tree is None:
+        return None
+    if dir_path in ("", os.curdir):
+        return tree
+    try:
+        subtree = tree[dir_path]
+    except KeyError:
+        return None
+    if not isinstance(subtree, Tree):
+        return None
+    return subtree
+
+
+def _changes_subtree(commit: Commit, dir_path: str) -> bool:
+    """
+    Return True iff a commit changes the subtree at a relative directory path.
+
+    A commit changes the subtree if the subtree differs from the subtree in
+    every parent commit, matching the default history simplification of
+    `git log -- <path>`.
+    """
+    subtree = _get_subtree(commit.tree, dir_path)
+    subtree_id = None if subtree is None else subtree.id
+    if not commit.parents:
+        return subtree_id is not None
+    for parent in commit.parents:
+        parent_subtree = _get_subtree(parent.tree, dir_path)
+        parent_subtree_id = None if parent_subtree is None else parent_subtree.id
+        if parent_subtree_id == subtree_id:
+            return False
+    return True
+
+
+_worker_repo: Repository | None = None
+
+
+def _init_blame_worker(repo_path: str):
+    """Open the repository in a blame worker process."""
+    global _worker_repo
+    _worker_repo = Repository(repo_path)
+
+
+def _blame_worker(
+    path: str, commit_id: str, oldest_commit_id: str | None = None
+) -> tuple[GitUser | None, dict[GitUser, int]]:
+    """Blame a file in a blame worker process."""
+    assert _worker_repo is not None
+    return _blame_path(_worker_repo, path, commit_id, oldest_commit_id)
+
+
+def _blame_path(
+    repo: Repository, path: str, commit_id: str, oldest_commit_id: str | None = None
+) -> tuple[GitUser | None, dict[GitUser, int]]:
+    """
+    Blame a repo-relative path as of a commit and tally the lines per user.
+
+    If an oldest commit is given, then lines that are older than that commit
+    are attributed to it.
+    """
+    blame = repo.blame(  # type: ignore
+        path,
+        flags=BlameFlag.NORMAL | BlameFlag.IGNORE_WHITESPACE,
+        newest_commit=commit_id,
+        oldest_commit=oldest_commit_id,
+    )
+    return _tally_blame(blame)
+
+
+def _tally_blame(blame) -> tuple[GitUser | None, dict[GitUser, int]]:
+    """Get the user with the most lines in a blame and the lines per user."""
+    lines_modified: defaultdict[GitUser, int] = defaultdict(int)
+    lines_max = 0
+    user_max = None
+    for hunk in blame:
+        committer = hunk.final_committer
+        if committer is None:
+            continue
+        git_user = GitUser.from_signature(committer)
+        lines_modified[git_user] += hunk.lines_in_hunk
+        if lines_modified[git_user] > lines_max:
+            lines_max = lines_modified[git_user]
+            user_max = git_user
+    return user_max, dict(lines_modified)
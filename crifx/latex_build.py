@@ -0,0 +1,232 @@
+"""Incremental compilation of the report with build files kept between runs."""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+
+from pylatex.errors import CompilerError
+
+from crifx.cache import JsonCache
+from crifx.config_parser import LatexConfig
+
+LATEX_BUILD_CACHE_FILENAME = "latex-build-cache.json"
+LATEX_BUILD_CACHE_VERSION = 1
+# Build files whose content decides whether another compiler run is needed.
+LATEX_STATE_EXTENSIONS = ["aux", "toc", "out", "lof", "lot"]
+# Options that make a compiler run skip writing the pdf.
+LATEX_DRAFT_OPTIONS = {
+    "pdflatex": ["-draftmode"],
+    "lualatex": ["-draftmode"],
+    "xelatex": ["-no-pdf"],
+}
+LATEX_LOG_LINES_MAX = 20
+
+
+def _file_digest(path: str) -> str | None:
+    """Get a hex digest of the content of a file, or None if it does not exist."""
+    try:
+        with open(path, "rb") as digested_file:
+            return hashlib.file_digest(digested_file, "blake2b").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _file_fingerprint(path: str) -> list[int] | None:
+    """Get the size and modification time of a file, or None if it is missing."""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return [stat_result.st_size, stat_result.st_mtime_ns]
+
+
+class LatexBuilder:
+    """
+    Compiler of a tex file whose build files are kept in a build directory.
+
+    The compiler is only run again while the auxiliary files change, so
+    cross-references settle without a fixed number of runs. The runs before
+    the final run can skip writing the pdf. If neither the tex file nor any
+    file that the last build read has changed, then the compiler is not run.
+    latexmk decides the runs itself, so it is always run exactly once.
+    """
+
+    def __init__(self, build_dir: str, config: LatexConfig):
+        self.build_dir = build_dir
+        self.config = config
+        self.compiler = config.compiler
+        if self.compiler is None:
+            self.compiler = "latexmk" if shutil.which("latexmk") else "pdflatex"
+        self.cache = JsonCache(
+            os.path.join(build_dir, LATEX_BUILD_CACHE_FILENAME),
+            LATEX_BUILD_CACHE_VERSION,
+        )
+        # The number of compiler runs in the most recent build.
+        self.runs = 0
+
+    @property
+    def _compiler_name(self) -> str:
+        """Get the name of the compiler executable."""
+        return os.path.basename(self.compiler)
+
+    def _build_path(self, jobname: str, extension: str) -> str:
+        """Get the path of a build file."""
+        return os.path.join(self.build_dir, f"{jobname}.{extension}")
+
+    def _settings(self) -> list[str]:
+        """Get the settings that invalidate every earlier build."""
+        return [self.compiler, *self.config.options]
+
+    def _get_state(self, jobname: str) -> list[str | None]:
+        """Get the digests of the auxiliary files of the previous run."""
+        return [
+            _file_digest(self._build_path(jobname, extension))
+            for extension in LATEX_STATE_EXTENSIONS
+        ]
+
+    def _is_up_to_date(self, jobname: str, tex_digest: str | None) -> bool:
+        """Check whether the pdf of the last build is still valid."""
+        entry = self.cache.get(jobname)
+        return (
+            entry is not None
+            and entry["settings"] == self._settings()
+            and entry["tex"] == tex_digest
+            and os.path.isfile(self._build_path(jobname, "pdf"))
+            and all(
+                _file_fingerprint(path) == fingerprint
+                for path, fingerprint in entry["inputs"].items()
+            )
+        )
+
+    def _get_inputs(self, jobname: str) -> dict[str, list[int] | None]:
+        """
+        Get the fingerprints of the files read by the last run.
+
+        The files are listed in the `.fls` file written by the compiler's
+        recorder. Build files of the job are excluded, since they are
+        covered by the tex digest and the auxiliary state.
+        """
+        inputs: dict[str, list[int] | None] = {}
+        working_dir = self.build_dir
+        try:
+            with open(self._build_path(jobname, "fls"), "r") as fls_file:
+                for line in fls_file:
+                    kind, _, path = line.rstrip("\n").partition(" ")
+                    if kind == "PWD":
+                        working_dir = path
+                        continue
+                    if kind != "INPUT":
+                        continue
+                    path = os.path.normpath(os.path.join(working_dir, path))
+                    if os.path.dirname(path) == os.path.normpath(
+                        self.build_dir
+                    ) and os.path.basename(path).startswith(f"{jobname}."):
+                        continue
+                    inputs[path] = _file_fingerprint(path)
+        except FileNotFoundError:
+            logging.debug("No LaTeX recorder file for '%s'.", jobname)
+        return inputs
+
+    def _run(self, jobname: str, draft: bool):
+        """Run the compiler once."""
+        command = [self.compiler]
+        if self._compiler_name == "latexmk":
+            command.append("-pdf")
+        elif draft:
+            command.extend(LATEX_DRAFT_OPTIONS.get(self._compiler_name, []))
+        command.extend(
+            [
+                "-interaction=nonstopmode",
+                "-halt-on-error",
+                "-recorder",
+                f"-output-directory={self.build_dir}",
+                *self.config.options,
+                self._build_path(jobname, "tex"),
+            ]
+        )
+        logging.debug("Running %s", " ".join(command))
+        self.runs += 1
+        try:
+            subprocess.run(
+                command,
+                cwd=self.build_dir,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                check=True,
+            )
+        except FileNotFoundError:
+            raise CompilerError(f"The LaTeX compiler '{self.compiler}' was not found.")
+        except subprocess.CalledProcessError as error:
+            output_lines = error.stdout.decode(errors="replace").splitlines()
+            logging.error(
+                "LaTeX compilation failed:\n%s",
+                "\n".join(output_lines[-LATEX_LOG_LINES_MAX:]),
+            )
+            # A failed run can leave auxiliary files that break the next run.
+            for extension in LATEX_STATE_EXTENSIONS:
+                try:
+                    os.remove(self._build_path(jobname, extension))
+                except FileNotFoundError:
+                    pass
+            raise CompilerError(
+                f"The LaTeX compiler '{self.compiler}' failed with exit code "
+                f"{error.returncode}."
+            )
+
+    def _compile(self, jobname: str):
+        """Run the compiler until the auxiliary files are stable."""
+        if self._compiler_name == "latexmk":
+            self._run(jobname, False)
+            return
+        draft_supported = (
+            self.config.draft_passes and self._compiler_name in LATEX_DRAFT_OPTIONS
+        )
+        state = self._get_state(jobname)
+        # Without auxiliary files from an earlier build, another run is
+        # certainly needed, so the first run does not need to write the pdf.
+        draft = draft_supported and all(digest is None for digest in state)
+        for _ in range(self.config.passes_max):
+            self._run(jobname, draft)
+            new_state = self._get_state(jobname)
+            stable = new_state == state
+            state = new_state
+            if stable:
+                break
+            draft = draft_supported
+        else:
+            logging.warning(
+                "The cross-references of '%s' did not settle after %d runs.",
+                jobname,
+                self.config.passes_max,
+            )
+        if draft:
+            self._run(jobname, False)
+
+    def build(self, jobname: str) -> str:
+        """
+        Compile `<jobname>.tex` in the build directory.
+
+        Return the path of the pdf, which is also in the build directory.
+        """
+        self.runs = 0
+        tex_digest = _file_digest(self._build_path(jobname, "tex"))
+        if self._is_up_to_date(jobname, tex_digest):
+            logging.info("The report is up to date. Skipping LaTeX compilation.")
+            return self._build_path(jobname, "pdf")
+        self.cache.set(jobname, None)
+        self.cache.save()
+        self._compile(jobname)
+        self.cache.set(
+            jobname,
+            {
+                "settings": self._settings(),
+                "tex": tex_digest,
+                "inputs": self._get_inputs(jobname),
+            },
+        )
+        self.cache.save()
+        logging.debug("Compiled '%s' with %d run(s).", jobname, self.runs)
+        return self._build_path(jobname, "pdf")
@@ -0,0 +1,259 @@
+"""Cache of parsed problems, keyed by the git tree of each problem directory."""
+
+import functools
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import Any
+
+from pygit2 import Oid
+
+from crifx.cache import JsonCache
+from crifx.contest_objects import (
+    UNKNOWN_JUDGE,
+    DataGroupStats,
+    DuplicateInputs,
+    Judge,
+    Judgement,
+    Language,
+    LazyLines,
+    Problem,
+    ProblemDataStats,
+    ProblemTestCase,
+    Submission,
+    SuspectedCopy,
+)
+from crifx.report_objects import ReviewStatus
+
+PROBLEM_CACHE_FILENAME = "problem-cache.json"
+PROBLEM_CACHE_VERSION = 4
+
+
+class ProblemCache:
+    """
+    Cache of parsed problems.
+
+    A cached problem is valid if the id of the git tree of the problem
+    directory and the parser settings are unchanged, and the directory has
+    kept that tree since the commit that the problem was cached at, so that
+    its submissions are still attributed to the same authors. The caller
+    must ensure that the working tree matches the git tree.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        cache_path = None
+        if cache_dir is not None:
+            cache_path = os.path.join(cache_dir, PROBLEM_CACHE_FILENAME)
+        self.cache = JsonCache(cache_path, PROBLEM_CACHE_VERSION)
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        problem_root_dir: str,
+        tree_id: Oid,
+        settings_key: str,
+        commit_id: Oid,
+        is_unchanged_since: Callable[[str], bool],
+    ) -> dict[str, Any] | None:
+        """
+        Get the serialized problem for a problem directory, if it is valid.
+
+        `is_unchanged_since` is called with the commit that the problem was
+        cached at, and checks that the tree has been kept since that commit.
+        """
+        with self._lock:
+            entry = self.cache.get(problem_root_dir)
+        if (
+            entry is None
+            or entry["tree"] != str(tree_id)
+            or entry["settings"] != settings_key
+        ):
+            return None
+        if entry["commit"] != str(commit_id):
+            if not is_unchanged_since(entry["commit"]):
+                return None
+            with self._lock:
+                self.cache.set(problem_root_dir, {**entry, "commit": str(commit_id)})
+        return entry["problem"]
+
+    def set(
+        self,
+        problem_root_dir: str,
+        tree_id: Oid,
+        settings_key: str,
+        commit_id: Oid,
+        problem: Problem,
+    ):
+        """Store a problem parsed at a commit in the cache."""
+        entry = {
+            "tree": str(tree_id),
+            "commit": str(commit_id),
+            "settings": settings_key,
+            "problem": problem_to_cache_dict(problem),
+        }
+        with self._lock:
+            self.cache.set(problem_root_dir, entry)
+
+    def save(self):
+        """Write the cache to file if it has been modified."""
+        with self._lock:
+            self.cache.save()
+
+
+def problem_to_cache_dict(problem: Problem) -> dict[str, Any]:
+    """Get a json serializable representation of a problem."""
+    test_cases = []
+    for test_case in problem.test_cases:
+        test_case_dict: dict[str, Any] = {
+            "name": test_case.name,
+            "is_sample": test_case.is_sample,
+            "dir_path": test_case.dir_path,
+            "image_extension": test_case.image_extension,
+        }
+        if isinstance(test_case.description_lines, LazyLines):
+            test_case_dict["description_size"] = test_case.description_lines.size
+        else:
+            test_case_dict["description_lines"] = list(test_case.description_lines)
+        test_cases.append(test_case_dict)
+    return {
+        "name": problem.name,
+        "test_cases": test_cases,
+        "submissions": [
+            {
+                "author": [submission.author.primary_name, submission.author.git_name],
+                "filename": submission.filename,
+                "language": submission.language.value,
+                "judgement": submission.judgement.value,
+                "lines_of_code": submission.lines_of_code,
+                "bytes_count": submission.bytes_count,
+            }
+            for submission in problem.submissions
+        ],
+        "review_status": asdict(problem.review_status),
+        "data_stats": (
+            None
+            if problem.data_stats is None
+            else {
+                "groups": [asdict(group) for group in problem.data_stats.groups],
+                "duplicate_inputs": [
+                    [
+                        list(duplicate_inputs.test_cases),
+                        duplicate_inputs.conflicting_answers,
+                    ]
+                    for duplicate_inputs in problem.data_stats.duplicate_inputs
+                ],
+            }
+        ),
+        "suspected_copies": [
+            [
+                _submission_index(problem, suspected_copy.submission),
+                _submission_index(problem, suspected_copy.other),
+                suspected_copy.similarity,
+            ]
+            for suspected_copy in problem.suspected_copies
+        ],
+    }
+
+
+def _submission_index(problem: Problem, submission: Submission) -> int:
+    """Get the index of a submission in the submissions of a problem."""
+    return next(
+        index
+        for index, problem_submission in enumerate(problem.submissions)
+        if problem_submission is submission
+    )
+
+
+def problem_from_cache_dict(
+    cache_dict: dict[str, Any],
+    problem_root_dir: str,
+    resolve_judge: Callable[[str, str | None], Judge | None],
+    resolve_language: Callable[[str], Language | None],
+    read_lines: Callable[[str], list[str]],
+    read_bytes: Callable[[str], bytes],
+) -> Problem | None:
+    """
+    Create a problem from its json serializable representation.
+
+    Submission authors are resolved to judges by primary name and git name,
+    and languages by name. None is returned if an author or language cannot
+    be resolved, since the configuration has changed since the problem was
+    cached.
+    """
+    test_cases = []
+    for test_case_dict in cache_dict["test_cases"]:
+        dir_path = test_case_dict["dir_path"]
+        name = test_case_dict["name"]
+        description_lines: LazyLines | list[str]
+        if "description_size" in test_case_dict:
+            description_lines = LazyLines(
+                functools.partial(read_lines, os.path.join(dir_path, f"{name}.desc")),
+                test_case_dict["description_size"],
+            )
+        else:
+            description_lines = test_case_dict["description_lines"]
+        test_cases.append(
+            ProblemTestCase(
+                name,
+                test_case_dict["is_sample"],
+                dir_path,
+                description_lines,
+                test_case_dict["image_extension"],
+            )
+        )
+    submissions = []
+    for submission_dict in cache_dict["submissions"]:
+        primary_name, git_name = submission_dict["author"]
+        if primary_name == UNKNOWN_JUDGE.primary_name and git_name is None:
+            author = UNKNOWN_JUDGE
+        else:
+            resolved_author = resolve_judge(primary_name, git_name)
+            if resolved_author is None:
+                return None
+            author = resolved_author
+        language = resolve_language(submission_dict["language"])
+        if language is None:
+            return None
+        judgement = Judgement(submission_dict["judgement"])
+        submission_path = os.path.join(
+            problem_root_dir,
+            "submissions",
+            judgement.value,
+            submission_dict["filename"],
+        )
+        submissions.append(
+            Submission(
+                author,
+                submission_dict["filename"],
+                language,
+                judgement,
+                submission_dict["lines_of_code"],
+                submission_dict["bytes_count"],
+                functools.partial(read_bytes, submission_path),
+            )
+        )
+    data_stats = None
+    if cache_dict["data_stats"] is not None:
+        data_stats_dict = cache_dict["data_stats"]
+        data_stats = ProblemDataStats(
+            tuple(DataGroupStats(**group) for group in data_stats_dict["groups"]),
+            tuple(
+                DuplicateInputs(tuple(test_cases), conflicting_answers)
+                for test_cases, conflicting_answers in data_stats_dict[
+                    "duplicate_inputs"
+                ]
+            ),
+        )
+    suspected_copies = tuple(
+        SuspectedCopy(submissions[index], submissions[other_index], similarity)
+        for index, other_index, similarity in cache_dict["suspected_copies"]
+    )
+    return Problem(
+        cache_dict["name"],
+        test_cases,
+        submissions,
+        ReviewStatus(**cache_dict["review_status"]),
+        data_stats,
+        suspected_copies,
+    )
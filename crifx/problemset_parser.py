@@ -1,33 +1,108 @@
 """Logic for parsing a ProblemSet object from a git directory."""
 
+import copy
+import functools
+import hashlib
+import io
+import itertools
+import json
 import logging
 import os
 import re
 import tomllib
-from typing import Any, Optional
+from collections import deque
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Optional
 
-from crifx.config_parser import AliasGroup
+from crifx.alias_index import AliasIndex
+from crifx.config_parser import AliasGroup, Config
 from crifx.contest_objects import (
     UNKNOWN_JUDGE,
     Judge,
     Judgement,
+    LanguageRegistry,
+    LazyLines,
     Problem,
+    ProblemParseFailure,
     ProblemSet,
     ProblemTestCase,
-    ProgrammingLanguage,
     Submission,
+    SuspectedCopy,
 )
+from crifx.data_measurement import DataStatsCollector
 from crifx.dir_layout_parsing import get_problem_root_dirs, is_contest_problems_root
 from crifx.git_manager import GitManager, GitUser
+from crifx.problem_cache import ProblemCache, problem_from_cache_dict
 from crifx.report_objects import (
     DEFAULT_REVIEW_STATUS,
     DEFAULT_REVIEW_STATUS_TOML,
     ReviewStatus,
 )
+from crifx.similarity import SimilarityDetector
+from crifx.tree_reader import TreeReader, WorktreeReader
 
 TEST_CASE_IMAGE_EXTENSIONS = ["png", "jpg", "jpeg"]
 PROBLEM_REVIEW_STATUS_FILENAME = "crifx-problem-status.toml"
-CRIFX_AUTHOR_PATTERN = "crifx!\(author=([a-zA-Z0-9_ ]+)\)"
+CRIFX_AUTHOR_NAME_LENGTH_MAX = 100
+CRIFX_AUTHOR_PATTERN = re.compile(
+    rb"crifx!\(author=([a-zA-Z0-9_ ]{1,%d})\)" % CRIFX_AUTHOR_NAME_LENGTH_MAX
+)
+# The length of the longest author override, which bounds the bytes of a chunk
+# that are carried over to be searched with the next chunk.
+CRIFX_AUTHOR_BYTES_MAX = len(b"crifx!(author=)") + CRIFX_AUTHOR_NAME_LENGTH_MAX
+SUBMISSION_READ_CHUNK_BYTES = 1 << 16
+# The number of problems per parser thread that are parsed ahead of the problem
+# being yielded.
+PARSE_AHEAD_PER_JOB = 2
+
+
+@dataclass(frozen=True)
+class SubmissionScan:
+    """The result of scanning a submission file."""
+
+    lines_of_code: int
+    file_bytes: int
+    author_name_override: str | None
+    # The 1-indexed line number of the author override, if there is one.
+    author_line_number: int | None
+
+
+def scan_submission(binary_file: BinaryIO) -> SubmissionScan:
+    """
+    Scan a submission file for its size, line count and author override.
+
+    The file is read once, in chunks, and never decoded, so files of any size
+    and encoding can be scanned. Lines are counted as by `readlines`, so a
+    final line without a trailing newline is counted.
+    """
+    lines_of_code = 0
+    file_bytes = 0
+    author_name_override = None
+    author_line_number = None
+    # The end of the previous chunk, which may hold the start of an author
+    # override that continues in the next chunk.
+    tail = b""
+    last_byte = b""
+    while chunk := binary_file.read(SUBMISSION_READ_CHUNK_BYTES):
+        file_bytes += len(chunk)
+        lines_of_code += chunk.count(b"\n")
+        if author_name_override is None:
+            searched = tail + chunk
+            author_match = CRIFX_AUTHOR_PATTERN.search(searched)
+            if author_match is not None:
+                author_name_override = author_match.group(1).decode()
+                author_line_number = (
+                    lines_of_code - searched.count(b"\n", author_match.start()) + 1
+                )
+            tail = searched[-(CRIFX_AUTHOR_BYTES_MAX - 1) :]
+        last_byte = chunk[-1:]
+    if last_byte not in (b"", b"\n"):
+        lines_of_code += 1
+    return SubmissionScan(
+        lines_of_code, file_bytes, author_name_override, author_line_number
+    )
 
 
 class ProblemSetParser:
@@ -39,19 +114,77 @@ class ProblemSetParser:
         git_manager: GitManager,
         alias_groups: list[AliasGroup],
         track_review_status: bool,
+        reader: TreeReader | None = None,
+        jobs: int = 1,
+        data_stats_collector: DataStatsCollector | None = None,
+        problem_cache: ProblemCache | None = None,
+        similarity_detector: SimilarityDetector | None = None,
+        language_registry: LanguageRegistry | None = None,
     ):
-        if not is_contest_problems_root(problemset_root_path):
+        self.reader = reader or WorktreeReader()
+        if not is_contest_problems_root(problemset_root_path, self.reader):
             raise ValueError(
                 f"Path '{problemset_root_path}' is not a problemset root path."
             )
         self.problemset_root_path = problemset_root_path
         self.git_manager = git_manager
         self.track_review_status = track_review_status
+        # The maximum number of problems to parse concurrently.
+        self.jobs = jobs
+        # Collects statistics about the test data, if they are needed.
+        self.data_stats_collector = data_stats_collector
+        # Caches parsed problems whose directories are unchanged.
+        self.problem_cache = problem_cache
+        # Detects AC submissions that are copies, if they are needed.
+        self.similarity_detector = similarity_detector
+        # Identifies the language of each submission by its file extension.
+        self.language_registry = language_registry or LanguageRegistry()
+        self._problem_cache_settings_key: str | None = None
         self.judges_by_name: dict[str, Judge] = {}
+        self.judges_by_alias: AliasIndex[Judge] = AliasIndex()
+        self.alias_groups = alias_groups
         self._set_judges_by_name(alias_groups)
 
+    @staticmethod
+    def from_config(
+        problemset_root_path: str,
+        config: Config,
+        git_manager: GitManager,
+        crifx_dir_path: str,
+        reader: TreeReader | None = None,
+        jobs: int = 1,
+    ) -> "ProblemSetParser":
+        """
+        Create a parser for a problemset with the settings of its configuration.
+
+        The caches of parsed problems, test data measurements and code
+        similarity are kept in the crifx directory.
+        """
+        data_stats_collector = None
+        if config.test_data.collect_statistics:
+            data_stats_collector = DataStatsCollector(crifx_dir_path, jobs)
+        similarity_detector = None
+        if config.similarity.enabled:
+            similarity_detector = SimilarityDetector(
+                crifx_dir_path, config.similarity.threshold
+            )
+        return ProblemSetParser(
+            problemset_root_path,
+            git_manager,
+            config.alias_groups,
+            config.track_review_status,
+            reader,
+            jobs,
+            data_stats_collector,
+            ProblemCache(crifx_dir_path),
+            similarity_detector,
+            config.language_registry,
+        )
+
     def _set_judges_by_name(self, alias_groups: list[AliasGroup]):
-        git_users = self.git_manager.get_committers_and_authors()
+        git_users = self.git_manager.get_committers_and_authors(
+            self.problemset_root_path
+        )
         git_users_by_name: dict[str, GitUser] = {}
         for user in git_users:
             if user.name in git_users:
@@ -99,24 +232,228 @@ class ProblemSetParser:
                     alias_group.identifier, None, *alias_group.aliases
                 )
         logging.debug("Identified judges: %s", str(self.judges_by_name))
+        self.judges_by_alias = AliasIndex.build(
+            (judge, judge.aliases) for judge in self.judges_by_name.values()
+        )
+        for alias, judge, other_judge in self.judges_by_alias.collisions:
+            logging.debug(
+                "Alias '%s' identifies judges '%s' and '%s'. Using '%s'.",
+                alias,
+                judge,
+                other_judge,
+                judge,
+            )
+
+    def refresh_judges(self):
+        """Identify the judges again, including any new git users."""
+        self._set_judges_by_name(self.alias_groups)
+        self._problem_cache_settings_key = None
+
+    def at_revision(
+        self, reader: TreeReader, git_manager: GitManager
+    ) -> "ProblemSetParser":
+        """
+        Get a parser that reads problems with another reader and git manager.
+
+        The returned parser shares the judges of this parser, so the git
+        history is not walked again.
+        """
+        parser = copy.copy(self)
+        parser.reader = reader
+        parser.git_manager = git_manager
+        # The cache holds one entry per problem, for the current commit.
+        parser.problem_cache = None
+        return parser
 
     def parse_problemset(self) -> ProblemSet:
         """Parse a ProblemSet."""
-        problem_root_dirs = get_problem_root_dirs(self.problemset_root_path)
         problems = []
-        for problem_root_dir in problem_root_dirs:
-            problem = self._parse_problem(problem_root_dir)
-            problems.append(problem)
-        return ProblemSet(problems)
+        parse_failures = []
+        for result in self.iter_problems():
+            if isinstance(result, Problem):
+                problems.append(result)
+            else:
+                parse_failures.append(result)
+        return ProblemSet(problems, parse_failures)
+
+    def iter_problems(
+        self, problem_root_dirs: list[str] | None = None
+    ) -> Iterator[Problem | ProblemParseFailure]:
+        """
+        Parse the problems of the problemset, yielding each one once parsed.
+
+        Problems are yielded in sorted order of their directories as soon as
+        they are parsed, so each problem can be processed while later
+        problems are still being parsed. A problem that could not be parsed
+        is yielded as a ProblemParseFailure. If `problem_root_dirs` is given,
+        then only those problems are parsed, in the given order.
+        """
+        if problem_root_dirs is None:
+            problem_root_dirs = sorted(
+                get_problem_root_dirs(self.problemset_root_path, self.reader)
+            )
+        self.git_manager.prepare_attribution(
+            [
+                os.path.join(problem_root_dir, "submissions", judgement.value)
+                for problem_root_dir in problem_root_dirs
+                for judgement in Judgement
+            ]
+        )
+        if self.jobs > 1 and len(problem_root_dirs) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.jobs, len(problem_root_dirs))
+            ) as executor:
+                # Only a few problems are parsed ahead of the one being
+                # yielded, so a slow consumer does not hold every problem.
+                root_dir_iter = iter(problem_root_dirs)
+                pending = deque(
+                    executor.submit(self._try_parse_problem, problem_root_dir)
+                    for problem_root_dir in itertools.islice(
+                        root_dir_iter, self.jobs * PARSE_AHEAD_PER_JOB
+                    )
+                )
+                while pending:
+                    result = pending.popleft().result()
+                    problem_root_dir = next(root_dir_iter, None)
+                    if problem_root_dir is not None:
+                        pending.append(
+                            executor.submit(self._try_parse_problem, problem_root_dir)
+                        )
+                    yield result
+        else:
+            for problem_root_dir in problem_root_dirs:
+                yield self._try_parse_problem(problem_root_dir)
+        self.git_manager.save_caches()
+        if self.data_stats_collector is not None:
+            self.data_stats_collector.save_cache()
+        if self.similarity_detector is not None:
+            self.similarity_detector.save_cache()
+        if self.problem_cache is not None:
+            self.problem_cache.save()
+
+    def _try_parse_problem(
+        self, problem_root_dir: str
+    ) -> Problem | ProblemParseFailure:
+        """Parse a problem, or describe why it could not be parsed."""
+        try:
+            return self.parse_problem(problem_root_dir)
+        except Exception as exc:
+            logging.exception("Failed to parse problem at '%s'.", problem_root_dir)
+            return ProblemParseFailure(
+                os.path.basename(problem_root_dir),
+                problem_root_dir,
+                f"{type(exc).__name__}: {exc}",
+            )
+
+    def parse_problem(self, problem_root_dir: str) -> Problem:
+        """
+        Parse a problem object from a problem directory.
+
+        If the problem directory is unchanged since it was cached, then the
+        cached problem is used instead.
+        """
+        if self.problem_cache is None:
+            return self._parse_problem(problem_root_dir)
+        tree_id = self.git_manager.get_clean_tree_id(problem_root_dir)
+        if tree_id is None:
+            return self._parse_problem(problem_root_dir)
+        settings_key = self._get_problem_cache_settings_key()
+        commit_id = self.git_manager.get_commit_id()
+        cache_dict = self.problem_cache.get(
+            problem_root_dir,
+            tree_id,
+            settings_key,
+            commit_id,
+            functools.partial(
+                self.git_manager.is_tree_unchanged_since, problem_root_dir, tree_id
+            ),
+        )
+        if cache_dict is not None:
+            problem = problem_from_cache_dict(
+                cache_dict,
+                problem_root_dir,
+                self._resolve_judge,
+                self.language_registry.from_language_name,
+                self._read_lines,
+                self.reader.read_bytes,
+            )
+            if problem is not None:
+                logging.debug("Using cached problem at '%s'.", problem_root_dir)
+                return problem
+        problem = self._parse_problem(problem_root_dir)
+        self.problem_cache.set(
+            problem_root_dir, tree_id, settings_key, commit_id, problem
+        )
+        return problem
+
+    def _get_problem_cache_settings_key(self) -> str:
+        """
+        Get a hash of the settings that affect how a problem is parsed.
+
+        These are the judges and their aliases, the languages defined in the
+        configuration, whether review status is tracked, how submissions are
+        attributed, whether test data statistics are collected and how
+        suspected copies are detected.
+        """
+        if self._problem_cache_settings_key is None:
+            git_manager = self.git_manager
+            settings = {
+                "judges": sorted(
+                    [judge.primary_name, judge.git_name, sorted(judge.aliases)]
+                    for judge in self.judges_by_name.values()
+                ),
+                "track_review_status": self.track_review_status,
+                "languages": [
+                    [language.value, list(language.extensions)]
+                    for language in self.language_registry.custom_languages
+                ],
+                "attribution": git_manager.attribution_method.value,
+                "blame_oldest_commit": str(git_manager.blame_oldest_commit_id),
+                "blame_since": str(git_manager.blame_since),
+                "data_stats": self.data_stats_collector is not None,
+                "similarity_threshold": (
+                    None
+                    if self.similarity_detector is None
+                    else self.similarity_detector.threshold
+                ),
+            }
+            self._problem_cache_settings_key = hashlib.sha256(
+                json.dumps(settings, sort_keys=True).encode()
+            ).hexdigest()
+        return self._problem_cache_settings_key
+
+    def _resolve_judge(self, primary_name: str, git_name: str | None) -> Judge | None:
+        """Get the judge with a primary name and git name, if there is one."""
+        for judge in self.judges_by_name.values():
+            if judge.primary_name == primary_name and judge.git_name == git_name:
+                return judge
+        return None
 
     def _parse_problem(self, problem_root_dir: str) -> Problem:
-        """Parse a problem object from a problem directory."""
+        """Parse a problem object from the files in a problem directory."""
         _, name = os.path.split(problem_root_dir)
         problem_test_cases = self._parse_problem_test_cases(problem_root_dir)
         problem_test_cases.sort(key=lambda x: x.sort_key())
         submissions = self._parse_submissions(problem_root_dir)
         review_status = self._parse_review_status(problem_root_dir)
-        return Problem(name, problem_test_cases, submissions, review_status)
+        data_stats = None
+        if self.data_stats_collector is not None:
+            data_stats = self.data_stats_collector.measure_problem(
+                self.reader, problem_root_dir, problem_test_cases
+            )
+        suspected_copies: tuple[SuspectedCopy, ...] = ()
+        if self.similarity_detector is not None:
+            suspected_copies = self.similarity_detector.find_suspected_copies(
+                submissions
+            )
+        return Problem(
+            name,
+            problem_test_cases,
+            submissions,
+            review_status,
+            data_stats,
+            suspected_copies,
+        )
 
     def _parse_problem_test_cases(self, problem_root_dir: str) -> list[ProblemTestCase]:
         """Parse the problem test cases from a problem directory."""
@@ -128,19 +465,21 @@ class ProblemSetParser:
 
     def _parse_test_case_dir(self, test_case_dir: str):
         """Parse the test cases from a test case directory."""
-        if not os.path.exists(test_case_dir):
+        if not self.reader.is_dir(test_case_dir):
             return []
         in_files = set()
         ans_files = set()
+        filenames = set()
         test_cases = []
-        for filename in os.listdir(test_case_dir):
-            file_path = os.path.join(test_case_dir, filename)
-            if os.path.isfile(file_path):
+        for entry in self.reader.list_dir(test_case_dir):
+            filename = entry.name
+            if entry.is_file:
+                filenames.add(filename)
                 if filename.endswith(".in"):
                     in_files.add(filename[:-3])
                 elif filename.endswith(".ans"):
                     ans_files.add(filename[:-4])
-            elif os.path.isdir(file_path):
+            elif entry.is_dir:
                 nested_dir = os.path.join(test_case_dir, filename)
                 test_cases.extend(self._parse_test_case_dir(nested_dir))
         for in_filename in in_files:
@@ -160,22 +499,21 @@ class ProblemSetParser:
                 continue
             name = filename
             is_sample = test_case_dir.startswith("sample")
-            desc_lines = []
+            desc_lines: Sequence[str] = []
             image_extension = None
-            try:
+            for extension in TEST_CASE_IMAGE_EXTENSIONS:
+                if f"{filename}.{extension}" in filenames:
+                    image_extension = extension
+                    break
+            if f"{filename}.desc" in filenames:
                 desc_file_path = os.path.join(test_case_dir, f"{filename}.desc")
-                image_extension = None
-                for extension in TEST_CASE_IMAGE_EXTENSIONS:
-                    if os.path.exists(
-                        os.path.join(test_case_dir, f"{filename}.{extension}")
-                    ):
-                        image_extension = extension
-                        break
-                if os.path.exists(desc_file_path):
-                    with open(desc_file_path) as desc_file:
-                        desc_lines = list(desc_file.readlines())
-            except (FileExistsError, FileNotFoundError, PermissionError):
-                logging.exception("Test case file could not be read.")
+                try:
+                    desc_lines = LazyLines(
+                        functools.partial(self._read_lines, desc_file_path),
+                        self.reader.size(desc_file_path),
+                    )
+                except (FileExistsError, FileNotFoundError, PermissionError):
+                    logging.exception("Test case file could not be read.")
             test_case = ProblemTestCase(
                 name,
                 is_sample,
@@ -186,6 +524,15 @@ class ProblemSetParser:
             test_cases.append(test_case)
         return test_cases
 
+    def _read_lines(self, path: str) -> list[str]:
+        """Read the lines of a text file, or no lines if it cannot be read."""
+        try:
+            with io.TextIOWrapper(self.reader.open_binary(path)) as text_file:
+                return text_file.readlines()
+        except (FileExistsError, FileNotFoundError, PermissionError):
+            logging.exception("File '%s' could not be read.", path)
+            return []
+
     def _parse_submissions(self, problem_root_dir: str) -> list[Submission]:
         """Parse the submissions from a problem directory."""
         ac_dir = os.path.join(problem_root_dir, "submissions", "accepted")
@@ -193,25 +540,49 @@ class ProblemSetParser:
         tle_dir = os.path.join(problem_root_dir, "submissions", "time_limit_exceeded")
         rte_dir = os.path.join(problem_root_dir, "submissions", "run_time_error")
         submissions = []
-        submissions.extend(self._parse_submissions_dir(ac_dir, Judgement.ACCEPTED))
-        submissions.extend(self._parse_submissions_dir(wa_dir, Judgement.WRONG_ANSWER))
+        unattributed: dict[str, Submission] = {}
+        submissions.extend(
+            self._parse_submissions_dir(ac_dir, Judgement.ACCEPTED, unattributed)
+        )
+        submissions.extend(
+            self._parse_submissions_dir(wa_dir, Judgement.WRONG_ANSWER, unattributed)
+        )
         submissions.extend(
-            self._parse_submissions_dir(tle_dir, Judgement.TIME_LIMIT_EXCEEDED)
+            self._parse_submissions_dir(
+                tle_dir, Judgement.TIME_LIMIT_EXCEEDED, unattributed
+            )
         )
         submissions.extend(
-            self._parse_submissions_dir(rte_dir, Judgement.RUN_TIME_ERROR)
+            self._parse_submissions_dir(rte_dir, Judgement.RUN_TIME_ERROR, unattributed)
         )
+        git_user_guesses = self.git_manager.guess_file_authors(list(unattributed))
+        for submission_path, submission in unattributed.items():
+            git_user_guess = git_user_guesses[submission_path]
+            submission.author = (
+                self.judges_by_name.get(getattr(git_user_guess, "name"))
+                or UNKNOWN_JUDGE
+            )
         return submissions
 
     def _parse_submissions_dir(
-        self, submissions_dir: str, judgement: Judgement
+        self,
+        submissions_dir: str,
+        judgement: Judgement,
+        unattributed: dict[str, Submission],
     ) -> list[Submission]:
-        """Parse the Submission objects from a directory."""
-        if not os.path.exists(submissions_dir):
+        """
+        Parse the Submission objects from a directory.
+
+        Submissions that are not attributed to a judge by a `crifx!(author=...)`
+        string or by the filename are added to `unattributed`, keyed by path, so
+        that they can be attributed using git in a single batch.
+        """
+        if not self.reader.exists(submissions_dir):
             return []
         submissions = []
-        for filename in os.listdir(submissions_dir):
-            language = ProgrammingLanguage.from_filename(filename)
+        for entry in self.reader.list_dir(submissions_dir):
+            filename = entry.name
+            language = self.language_registry.from_filename(filename)
             if language is None:
                 continue
             submission_path = os.path.join(submissions_dir, filename)
@@ -219,50 +590,41 @@ class ProblemSetParser:
             file_bytes = 0
             author_name_override = None
             try:
-                with open(submission_path, "r") as submission_file:
-                    submission_lines = submission_file.readlines()
-                    for line_number, line in enumerate(submission_lines):
-                        author_match = re.search(CRIFX_AUTHOR_PATTERN, line)
-                        if author_match is not None:
-                            author_name_override = author_match.group(1)
-                            logging.debug(
-                                "Found author override for file %s on line %d. Override name is '%s'",
-                                submission_path,
-                                line_number + 1,
-                                author_name_override,
-                            )
-                            break
-                    lines_of_code = len(submission_lines)
-                file_bytes = os.stat(submission_path).st_size
+                with self.reader.open_binary(submission_path) as submission_file:
+                    submission_scan = scan_submission(submission_file)
+                lines_of_code = submission_scan.lines_of_code
+                file_bytes = submission_scan.file_bytes
+                author_name_override = submission_scan.author_name_override
+                if author_name_override is not None:
+                    logging.debug(
+                        "Found author override for file %s on line %d. Override "
+                        "name is '%s'",
+                        submission_path,
+                        submission_scan.author_line_number,
+                        author_name_override,
+                    )
             except (FileExistsError, FileNotFoundError, PermissionError):
                 logging.warning(
                     "Could not determine size of submission at path '%s'",
                     submission_path,
                 )
-            git_user_guess = self.git_manager.guess_file_author(submission_path)
             filename_guess = self.guess_author_by_filename(filename)
+            judge = None
             if author_name_override is not None:
-                judge = UNKNOWN_JUDGE
-                for candidate_judge in self.judges_by_name.values():
-                    if candidate_judge.has_alias(author_name_override):
-                        judge = candidate_judge
-                        break
+                judge = self.judges_by_alias.get(author_name_override) or UNKNOWN_JUDGE
             elif filename_guess is not None:
                 judge = filename_guess
-
-            else:
-                judge = (
-                    self.judges_by_name.get(getattr(git_user_guess, "name"))
-                    or UNKNOWN_JUDGE
-                )
             submission = Submission(
-                judge,
+                judge or UNKNOWN_JUDGE,
                 filename,
                 language,
                 judgement,
                 lines_of_code,
                 file_bytes,
+                functools.partial(self.reader.read_bytes, submission_path),
             )
+            if judge is None:
+                unattributed[submission_path] = submission
             submissions.append(submission)
         return submissions
 
@@ -277,11 +639,14 @@ class ProblemSetParser:
             problem_root_dir,
             PROBLEM_REVIEW_STATUS_FILENAME,
         )
-        if not os.path.exists(review_status_path):
+        if not self.reader.exists(review_status_path):
+            if not self.reader.writable:
+                return DEFAULT_REVIEW_STATUS
             with open(review_status_path, "w") as review_status_file:
                 review_status_file.write(DEFAULT_REVIEW_STATUS_TOML)
+            self.reader.invalidate(problem_root_dir)
         try:
-            with open(review_status_path, "rb") as review_status_file:
+            with self.reader.open_binary(review_status_path) as review_status_file:
                 toml_dict = tomllib.load(review_status_file)
         except (PermissionError, FileNotFoundError, FileExistsError):
             logging.exception(
@@ -317,9 +682,9 @@ class ProblemSetParser:
             filename_without_extension = filename
         underscore_split_filename = filename_without_extension.split("_")
         for part in underscore_split_filename:
-            for judge in self.judges_by_name.values():
-                if judge.has_alias(part):
-                    return judge
+            judge = self.judges_by_alias.get(part)
+            if judge is not None:
+                return judge
         return None
 
 
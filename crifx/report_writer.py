@@ -1,30 +1,50 @@
 """Module for writing the report to file."""
 
+import hashlib
+import json
 import logging
 import os
+import re
+import shutil
+from dataclasses import asdict
 
 from pylatex import (
+    Axis,
     Command,
     Document,
     Enumerate,
     Itemize,
     MultiColumn,
     NoEscape,
+    Plot,
     Section,
     Subsection,
     Subsubsection,
     Tabular,
+    TikZ,
 )
-from pylatex.base_classes import Environment
+from pylatex.base_classes import Container, Environment
 from pylatex.package import Package
 
 from crifx import __version__
+from crifx.cache import JsonCache
 from crifx.config_parser import Config
-from crifx.contest_objects import Problem, ProblemSet
+from crifx.contest_objects import Problem, ProblemSet, ProblemTestCase
+from crifx.data_measurement import (
+    data_budget_warnings,
+    data_duplicate_warnings,
+    format_bytes,
+)
 from crifx.git_manager import GitManager
+from crifx.latex_build import LatexBuilder
+from crifx.problem_cache import problem_to_cache_dict
+from crifx.timeline import TimelinePoint
 
 MARGIN = "2cm"
 REPORT_FILENAME = "crifx-report"
+FRAGMENTS_DIRNAME = "fragments"
+FRAGMENT_CACHE_FILENAME = "fragment-cache.json"
+FRAGMENT_CACHE_VERSION = 1
 INPUT_FILE_LINES_MAX = 10
 INPUT_FILE_WIDTH_MAX = 90
 
@@ -44,6 +64,31 @@ def truncate(word, characters_max=10):
     return word
 
 
+def _write_if_changed(path: str, content: str) -> bool:
+    """
+    Write a text file unless it already has the content.
+
+    Leaving an unchanged file untouched keeps its modification time, which
+    LaTeX tooling relies on. Return True iff the file was written.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as existing_file:
+            if existing_file.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, "w", encoding="utf-8") as written_file:
+        written_file.write(content)
+    return True
+
+
+def _fragment_filename(problem_name: str) -> str:
+    """Get a file name for the fragment of a problem that is safe in TeX."""
+    safe_name = re.sub(r"[^A-Za-z0-9-]", "-", problem_name)
+    name_digest = hashlib.sha1(problem_name.encode("utf-8")).hexdigest()[:8]
+    return f"problem-{safe_name}-{name_digest}.tex"
+
+
 class LstListing(Environment):
     """LstListing environment."""
 
@@ -52,16 +97,36 @@ class LstListing(Environment):
     content_separator = "\n"
 
 
+class TexFragment(Container):
+    """
+    Content that is written to its own file and input by the report.
+
+    Packages used by the content are not propagated to the report, so the
+    content may only use packages that the report preamble loads.
+    """
+
+    def dumps(self) -> str:
+        """Represent the fragment as a string in LaTeX syntax."""
+        return self.dumps_content() + "%\n"
+
+
 class ReportWriter:
     """Manager class for writing the crifx report."""
 
     def __init__(
-        self, problem_set: ProblemSet, config: Config, git_manager: GitManager
+        self,
+        problem_set: ProblemSet,
+        config: Config,
+        git_manager: GitManager,
+        timeline: list[TimelinePoint] | None = None,
     ):
         self.problem_set = problem_set
         self.crifx_config = config
         self.git_manager = git_manager
+        self.timeline = timeline
         self.doc: Document | None = None
+        self._fragments_dir_path: str | None = None
+        self._fragment_cache: JsonCache | None = None
 
     def build_report(self, crifx_dir_path: str) -> Document:
         """Build the report."""
@@ -73,8 +138,15 @@ class ReportWriter:
             "bmargin": MARGIN,
         }
         self.doc = Document(report_tex_path, geometry_options=geometry_options)
+        self._fragments_dir_path = os.path.join(crifx_dir_path, FRAGMENTS_DIRNAME)
+        os.makedirs(self._fragments_dir_path, exist_ok=True)
+        self._fragment_cache = JsonCache(
+            os.path.join(crifx_dir_path, FRAGMENT_CACHE_FILENAME),
+            FRAGMENT_CACHE_VERSION,
+        )
         self._set_preamble()
         self._write_body()
+        self._fragment_cache.save()
         return self.doc
 
     def _set_preamble(self):
@@ -122,11 +194,32 @@ class ReportWriter:
     def _write_body(self):
         """Write the body of the document."""
         self.doc.append(NoEscape(r"\maketitle"))
+        if self.problem_set.parse_failures:
+            self._write_parse_failures()
         self._write_summary_table()
+        if any(problem.data_stats for problem in self.problem_set.problems):
+            self._write_data_stats_table()
+        if any(problem.suspected_copies for problem in self.problem_set.problems):
+            self._write_suspected_copies()
         self._write_manual_reviews_table()
+        if self.timeline:
+            self._write_timeline_chart()
         self._write_how_can_i_help()
+        fragment_filenames = set()
         for problem in self.problem_set.problems:
-            self._write_problem_details(problem)
+            fragment_filenames.add(self._input_problem_details(problem))
+        self._remove_stale_fragments(fragment_filenames)
+
+    def _write_parse_failures(self):
+        """Write the list of problems that could not be parsed."""
+        with self.doc.create(Section("Parse failures", numbering=False)):
+            self.doc.append(
+                "The following problems could not be parsed and are omitted from "
+                "this report."
+            )
+            with self.doc.create(Itemize()) as itemize:
+                for parse_failure in self.problem_set.parse_failures:
+                    itemize.add_item(f"{parse_failure.name}: {parse_failure.message}")
 
     def _write_summary_table(self):
         """Write the summary table for the document."""
@@ -189,6 +282,7 @@ class ReportWriter:
                 )
                 table.add_hline()
                 for problem in self.problem_set.problems:
+                    readiness = problem.readiness
                     row = [
                         Command(
                             "hyperref",
@@ -196,19 +290,18 @@ class ReportWriter:
                             (f"sec:{problem.name}",),
                         ),
                         self._coloured_cell(
-                            problem.independent_ac_count(), requirements.independent_ac
+                            self._independent_ac_count(problem),
+                            requirements.independent_ac,
                         ),
                         self._coloured_cell(
-                            len(problem.language_groups_ac_covered(language_groups)),
+                            len(readiness.language_groups_ac_covered(language_groups)),
                             requirements.language_groups_ac,
                         ),
                     ]
                     for language_group_config in language_group_configs:
-                        language_group = language_group_config.language_group
-                        count = 0
-                        for ac_submission in problem.ac_submissions:
-                            if language_group.has_language(ac_submission.language):
-                                count += 1
+                        count = readiness.language_group_ac_count(
+                            language_group_config.language_group
+                        )
                         row.append(
                             self._coloured_cell(
                                 count, language_group_config.required_ac_count
@@ -219,14 +312,106 @@ class ReportWriter:
                             len(problem.ac_submissions),
                             len(problem.wa_submissions),
                             len(problem.tle_submissions),
-                            str(problem.ac_lines_of_code_min()),
-                            str(problem.ac_lines_of_code_median()),
+                            str(readiness.ac_lines_of_code_min),
+                            str(readiness.ac_lines_of_code_median),
                             len(problem.test_cases),
                         ]
                     )
                     table.add_row(row)
                     table.add_hline()
 
+    def _write_data_stats_table(self):
+        """Write a table with statistics about the test data of each problem."""
+        num_columns = 8
+        column_spec = "|l|" + "c|" * (num_columns - 1)
+        with self.doc.create(Section("Test data", numbering=False)):
+            with self.doc.create(Tabular(column_spec)) as table:
+                table.add_hline()
+                header_row = [
+                    NoEscape(r"{\tiny Problem}"),
+                    NoEscape(r"{\tiny Sample}"),
+                    NoEscape(r"{\tiny Secret}"),
+                    NoEscape(r"{\tiny Input Total}"),
+                    NoEscape(r"{\tiny Input Max.}"),
+                    NoEscape(r"{\tiny Answer Total}"),
+                    NoEscape(r"{\tiny Answer Max.}"),
+                    NoEscape(r"{\tiny Longest Line}"),
+                ]
+                table.add_row(
+                    header_row,
+                    color="cyan",
+                )
+                table.add_hline()
+                for problem in self.problem_set.problems:
+                    data_stats = problem.data_stats
+                    if data_stats is None:
+                        continue
+                    sample_stats = data_stats.get_group("sample")
+                    secret_stats = data_stats.get_group("secret")
+                    row = [
+                        Command(
+                            "hyperref",
+                            (truncate(problem.name, 16),),
+                            (f"sec:{problem.name}",),
+                        ),
+                        0 if sample_stats is None else sample_stats.test_cases,
+                        0 if secret_stats is None else secret_stats.test_cases,
+                        format_bytes(data_stats.input_bytes),
+                        format_bytes(data_stats.input_bytes_max),
+                        format_bytes(data_stats.answer_bytes),
+                        format_bytes(data_stats.answer_bytes_max),
+                        data_stats.line_length_max,
+                    ]
+                    table.add_row(row)
+                    table.add_hline()
+            data_warnings = [
+                warning
+                for problem in self.problem_set.problems
+                for warning in data_budget_warnings(
+                    problem, self.crifx_config.test_data
+                )
+                + data_duplicate_warnings(problem)
+            ]
+            if data_warnings:
+                with self.doc.create(Itemize()) as itemize:
+                    for warning in data_warnings:
+                        itemize.add_item(warning)
+
+    def _write_suspected_copies(self):
+        """Write the list of AC submissions that look like copies."""
+        with self.doc.create(Section("Suspected copies", numbering=False)):
+            self.doc.append(
+                "The following AC submissions by different authors have very "
+                "similar code. "
+            )
+            if self.crifx_config.similarity.merge_copy_authors:
+                self.doc.append(
+                    "Their authors are counted as one author in the number of "
+                    "independent AC submissions."
+                )
+            else:
+                self.doc.append(
+                    "They are counted as independent AC submissions, but may not "
+                    "be independent."
+                )
+            with self.doc.create(Itemize()) as itemize:
+                for problem in self.problem_set.problems:
+                    for suspected_copy in problem.suspected_copies:
+                        submission = suspected_copy.submission
+                        other = suspected_copy.other
+                        itemize.add_item(
+                            f"{problem.name}: {submission.filename} by "
+                            f"{submission.author} and {other.filename} by "
+                            f"{other.author} are "
+                            f"{suspected_copy.similarity:.0%} similar."
+                        )
+
+    def _independent_ac_count(self, problem: Problem) -> int:
+        """Get the number of independent AC submissions to a problem."""
+        if self.crifx_config.similarity.merge_copy_authors:
+            return problem.readiness.independent_ac_merged
+        return problem.readiness.independent_ac
+
     def _write_manual_reviews_table(self):
         """Write a table with a summary tracking manual reviews."""
         requirements = self.crifx_config.review_requirements
@@ -285,6 +470,35 @@ class ReportWriter:
                     table.add_row(row)
                     table.add_hline()
 
+    def _write_timeline_chart(self):
+        """Write a burndown chart of the outstanding requirements over time."""
+        assert self.timeline
+        requirements = self.crifx_config.review_requirements
+        first_date = self.timeline[0].commit_datetime.date().isoformat()
+        last_date = self.timeline[-1].commit_datetime.date().isoformat()
+        with self.doc.create(Section("Readiness timeline", numbering=False)):
+            self.doc.append(
+                f"The number of submissions and reviews still required by all "
+                f"problems, for {len(self.timeline)} commits from {first_date} "
+                f"to {last_date}."
+            )
+            self.doc.append(NoEscape(r"\\"))
+            with self.doc.create(TikZ()):
+                axis_options = NoEscape(
+                    r"xlabel={Commit}, ylabel={Outstanding requirements}, "
+                    r"width=\textwidth, height=6cm, ymin=0"
+                )
+                with self.doc.create(Axis(options=axis_options)) as axis:
+                    axis.append(
+                        Plot(
+                            options="const plot, mark=none, thick",
+                            coordinates=[
+                                (index, point.outstanding(requirements))
+                                for index, point in enumerate(self.timeline)
+                            ],
+                        )
+                    )
+
     @staticmethod
     def _coloured_cell(value: int, requirement: int) -> int | str | NoEscape:
         if requirement == 0:
@@ -315,13 +529,10 @@ class ReportWriter:
     def _add_independent_ac_needs(self, enum_env, problem):
         """Add text list of independent AC submission needs."""
         requirements = self.crifx_config.review_requirements
-        if problem.independent_ac_count() < requirements.independent_ac:
-            independent_needed = (
-                requirements.independent_ac - problem.independent_ac_count()
-            )
-            ac_judge_names = {
-                submission.author.primary_name for submission in problem.ac_submissions
-            }
+        independent_ac_count = self._independent_ac_count(problem)
+        if independent_ac_count < requirements.independent_ac:
+            independent_needed = requirements.independent_ac - independent_ac_count
+            ac_judge_names = problem.readiness.ac_author_names
             if not ac_judge_names:
                 if independent_needed == 1:
                     enum_env.add_item(f"{problem.name} needs an AC submission.")
@@ -336,13 +547,13 @@ class ReportWriter:
                     enum_env.add_item(
                         f"{problem.name} needs at least one more AC submission "
                         f"from someone other than "
-                        f"{self._oxford_and(sorted(ac_judge_names))}."
+                        f"{self._oxford_and(list(ac_judge_names))}."
                     )
             else:
                 enum_env.add_item(
                     f"{problem.name} needs at least {independent_needed} more "
                     f"AC submissions from people other than "
-                    f"{self._oxford_and(sorted(ac_judge_names))}."
+                    f"{self._oxford_and(list(ac_judge_names))}."
                 )
 
     def _add_language_group_ac_needs(self, enum_env, problem):
@@ -352,7 +563,7 @@ class ReportWriter:
         language_groups = [
             group_config.language_group for group_config in language_group_configs
         ]
-        groups_covered = problem.language_groups_ac_covered(language_groups)
+        groups_covered = problem.readiness.language_groups_ac_covered(language_groups)
         if len(groups_covered) < requirements.language_groups_ac:
             groups_needed_num = requirements.language_groups_ac - len(groups_covered)
             groups_not_covered_names = [
@@ -487,15 +698,96 @@ class ReportWriter:
                 enum_env.add_item("Add test data")
                 enum_env.add_item("Add input validators")
 
-    def _write_problem_details(self, problem: Problem):
-        """Write the details for a problem."""
+    def _problem_fragment_key(self, problem: Problem) -> str:
+        """
+        Get a digest of everything that the details of a problem depend on.
+
+        This is the parsed problem, the requirements and language groups of
+        the configuration, and the crifx version, which covers changes to
+        the layout of the details.
+        """
+        config = self.crifx_config
+        key_dict = {
+            "version": __version__,
+            "problem": problem_to_cache_dict(problem),
+            "requirements": asdict(config.review_requirements),
+            "language_groups": [
+                [
+                    group_config.identifier,
+                    [
+                        language.value
+                        for language in group_config.language_group.languages
+                    ],
+                    group_config.required_ac_count,
+                ]
+                for group_config in config.language_group_configs
+            ],
+            "merge_copy_authors": config.similarity.merge_copy_authors,
+            # Descriptions are only included in the fragment for a revision.
+            # Otherwise, the description files are read by LaTeX.
+            "descriptions": (
+                None
+                if self.git_manager.rev is None
+                else [
+                    list(test_case.description_lines)
+                    for test_case in problem.test_cases
+                    if test_case.has_description
+                ]
+            ),
+        }
+        return hashlib.sha256(
+            json.dumps(key_dict, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _input_problem_details(self, problem: Problem) -> str:
+        """
+        Input the details for a problem from its fragment file.
+
+        The fragment is only rendered and written again if anything that it
+        depends on changed since it was written. Return the file name of the
+        fragment.
+        """
         assert self.doc is not None
-        self.doc.append(Command(r"newpage"))
-        with self.doc.create(Section(problem.name)):
-            with self.doc.create(
+        assert self._fragments_dir_path is not None
+        assert self._fragment_cache is not None
+        filename = _fragment_filename(problem.name)
+        path = os.path.join(self._fragments_dir_path, filename)
+        key = self._problem_fragment_key(problem)
+        if self._fragment_cache.get(filename) != key or not os.path.isfile(path):
+            logging.debug("Rendering the details of %s", problem.name)
+            fragment = TexFragment()
+            self._write_problem_details(fragment, problem)
+            _write_if_changed(path, fragment.dumps())
+            self._fragment_cache.set(filename, key)
+        self.doc.append(Command("input", NoEscape(path)))
+        return filename
+
+    def _remove_stale_fragments(self, fragment_filenames: set[str]):
+        """Remove the fragments of problems that are no longer in the report."""
+        assert self._fragments_dir_path is not None
+        assert self._fragment_cache is not None
+        stale_filenames = set(os.listdir(self._fragments_dir_path)) - (
+            fragment_filenames
+        )
+        for filename in stale_filenames:
+            os.remove(os.path.join(self._fragments_dir_path, filename))
+        if set(self._fragment_cache.entries) - fragment_filenames:
+            entries = {
+                filename: self._fragment_cache.get(filename)
+                for filename in fragment_filenames
+            }
+            self._fragment_cache.clear()
+            for filename, key in entries.items():
+                self._fragment_cache.set(filename, key)
+
+    def _write_problem_details(self, container: Container, problem: Problem):
+        """Write the details for a problem."""
+        container.append(Command(r"newpage"))
+        with container.create(Section(problem.name)):
+            with container.create(
                 Subsection("How can I help?", numbering=False, label=False)
             ):
-                with self.doc.create(Enumerate()) as enum_env:
+                with container.create(Enumerate()) as enum_env:
                     self._add_independent_ac_needs(enum_env, problem)
                     self._add_language_group_ac_needs(enum_env, problem)
                     self._add_tle_needs(enum_env, problem)
@@ -503,82 +795,122 @@ class ReportWriter:
                     self._add_statement_review_needs(enum_env, problem)
                     self._add_validator_review_needs(enum_env, problem)
                     self._add_data_review_needs(enum_env, problem)
-            with self.doc.create(
+            with container.create(
                 Subsection("Submissions", numbering=False, label=False)
             ):
-                with self.doc.create(
+                with container.create(
                     Subsubsection("Accepted", numbering=False, label=False)
                 ):
                     if not problem.ac_submissions:
-                        self.doc.append("No accepted submissions.")
-                    with self.doc.create(Itemize()) as itemize:
+                        container.append("No accepted submissions.")
+                    with container.create(Itemize()) as itemize:
                         for submission in problem.ac_submissions:
                             itemize.add_item(
                                 f"{submission.filename} by {submission.author}. "
                                 f"{submission.lines_of_code} lines of code."
                             )
-                with self.doc.create(
+                with container.create(
                     Subsubsection("Wrong Answer", numbering=False, label=False)
                 ):
                     if not problem.wa_submissions:
-                        self.doc.append("No wrong answer submissions.")
-                    with self.doc.create(Itemize()) as itemize:
+                        container.append("No wrong answer submissions.")
+                    with container.create(Itemize()) as itemize:
                         for submission in problem.wa_submissions:
                             itemize.add_item(
                                 f"{submission.filename} by {submission.author}. "
                                 f"{submission.lines_of_code} lines of code."
                             )
-                with self.doc.create(
+                with container.create(
                     Subsubsection("Time Limit Exceeded", numbering=False, label=False)
                 ):
                     if not problem.tle_submissions:
-                        self.doc.append("No time limit exceeded submissions.")
-                    with self.doc.create(Itemize()) as itemize:
+                        container.append("No time limit exceeded submissions.")
+                    with container.create(Itemize()) as itemize:
                         for submission in problem.tle_submissions:
                             itemize.add_item(
                                 f"{submission.filename} by {submission.author}. "
                                 f"{submission.lines_of_code} lines of code."
                             )
-            with self.doc.create(
+            with container.create(
                 Subsection("Test Cases", numbering=False, label=False)
             ):
-                self.doc.append(
+                container.append(
                     "Test case descriptions are rendered below if .desc files exist."
                 )
-                with self.doc.create(Itemize()) as itemize:
+                with container.create(Itemize()) as itemize:
                     for test_case in problem.test_cases:
                         itemize.add_item(test_case.name)
                         if test_case.has_description:
-                            desc_filepath = os.path.join(
-                                test_case.dir_path, f"{test_case.name}.desc"
-                            )
-                            itemize.append(
-                                Command(
-                                    "lstinputlisting",
-                                    NoEscape(desc_filepath),
-                                    options=LISTING_OPTIONS,
-                                )
-                            )
+                            itemize.append(self._test_case_description(test_case))
+
+    def _test_case_description(
+        self, test_case: ProblemTestCase
+    ) -> Command | LstListing:
+        """Get a listing of the description of a test case."""
+        if self.git_manager.rev is not None:
+            # The description file in the working tree may differ from the
+            # revision being reported on, so include the description inline.
+            return LstListing(
+                options=LISTING_OPTIONS,
+                data=[
+                    NoEscape(line.rstrip("\n")) for line in test_case.description_lines
+                ],
+            )
+        desc_filepath = os.path.join(test_case.dir_path, f"{test_case.name}.desc")
+        return Command(
+            "lstinputlisting",
+            NoEscape(desc_filepath),
+            options=LISTING_OPTIONS,
+        )
 
     def write_tex(self, dirpath: str):
-        """Write the tex output."""
+        """
+        Write the tex output.
+
+        The file is only rewritten if its content changed, so that its
+        modification time can be relied on by LaTeX tooling.
+        """
         if self.doc is None:
             raise ValueError(
                 "The tex file cannot be written yet. The document has not been built."
             )
-        filepath = os.path.join(dirpath, REPORT_FILENAME)
-        logging.debug("Writing tex to %s", filepath)
-        self.doc.generate_tex(filepath)
+        filepath = os.path.join(dirpath, f"{REPORT_FILENAME}.tex")
+        if _write_if_changed(filepath, self.doc.dumps()):
+            logging.debug("Wrote tex to %s", filepath)
+        else:
+            logging.debug("Tex at %s is unchanged", filepath)
 
     def write_pdf(self, dirpath: str):
-        """Write a pdf file from the tex file."""
+        """
+        Write a pdf file from the tex file.
+
+        In an incremental build, the tex file and the build files are kept in
+        the directory the report was built for, and the pdf is copied to
+        `dirpath`. Otherwise, the pdf is compiled from scratch in `dirpath`
+        and the build files are removed.
+        """
         if self.doc is None:
             raise ValueError(
                 "The pdf file cannot be written yet. The document has not been built."
             )
+        latex_config = self.crifx_config.latex
         filepath = os.path.join(dirpath, REPORT_FILENAME)
+        if not latex_config.incremental:
+            logging.debug("Writing pdf to %s", filepath)
+            self.doc.generate_pdf(
+                filepath,
+                clean=True,
+                clean_tex=True,
+                compiler=latex_config.compiler,
+                compiler_args=list(latex_config.options),
+            )
+            return
+        build_dir = os.path.dirname(self.doc.default_filepath)
+        self.write_tex(build_dir)
+        pdf_path = LatexBuilder(build_dir, latex_config).build(REPORT_FILENAME)
         logging.debug("Writing pdf to %s", filepath)
-        self.doc.generate_pdf(filepath, clean=True, clean_tex=True)
+        if os.path.abspath(pdf_path) != os.path.abspath(f"{filepath}.pdf"):
+            shutil.copyfile(pdf_path, f"{filepath}.pdf")
 
 
 def make_crifx_dir(containing_dir_path: str) -> str:
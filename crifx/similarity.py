@@ -0,0 +1,362 @@
+"""Detection of AC submissions that are near-duplicates of each other."""
+
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+from collections import defaultdict
+
+import pygit2
+
+from crifx.cache import JsonCache
+from crifx.contest_objects import (
+    Judgement,
+    Language,
+    ProgrammingLanguage,
+    Submission,
+    SuspectedCopy,
+)
+
+SIMILARITY_CACHE_FILENAME = "similarity-cache.json"
+SIMILARITY_CACHE_VERSION = 1
+# The number of consecutive tokens in each shingle.
+SHINGLE_TOKENS = 5
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+# The coefficients of the hash functions that simulate random permutations.
+# They are seeded so that cached signatures remain comparable between runs.
+_PERMUTATION_RNG = random.Random(0)
+_PERMUTATIONS = [
+    (
+        _PERMUTATION_RNG.randrange(1, _MERSENNE_PRIME),
+        _PERMUTATION_RNG.randrange(0, _MERSENNE_PRIME),
+    )
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+_C_STYLE_COMMENT = r"//[^\n]*|/\*[\s\S]*?\*/"
+_HASH_COMMENT = r"#[^\n]*"
+_HASKELL_COMMENT = r"--[^\n]*|\{-[\s\S]*?-\}"
+_OCAML_COMMENT = r"\(\*[\s\S]*?\*\)"
+_TOKEN_PATTERN = (
+    r"(?P<string>\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*')"
+    r"|(?P<number>\d[\w.]*)"
+    r"|(?P<identifier>[A-Za-z_]\w*)"
+    r"|(?P<symbol>\S)"
+)
+_C_KEYWORDS = {
+    "break",
+    "case",
+    "char",
+    "const",
+    "continue",
+    "do",
+    "double",
+    "else",
+    "for",
+    "if",
+    "int",
+    "long",
+    "return",
+    "short",
+    "sizeof",
+    "static",
+    "struct",
+    "switch",
+    "unsigned",
+    "void",
+    "while",
+}
+_CPP_KEYWORDS = _C_KEYWORDS | {
+    "auto",
+    "bool",
+    "class",
+    "false",
+    "namespace",
+    "new",
+    "template",
+    "true",
+    "typename",
+    "using",
+}
+_JAVA_KEYWORDS = _C_KEYWORDS | {
+    "boolean",
+    "class",
+    "false",
+    "final",
+    "import",
+    "new",
+    "null",
+    "public",
+    "private",
+    "true",
+}
+_KOTLIN_KEYWORDS = {
+    "break",
+    "class",
+    "continue",
+    "else",
+    "false",
+    "for",
+    "fun",
+    "if",
+    "in",
+    "null",
+    "return",
+    "true",
+    "val",
+    "var",
+    "when",
+    "while",
+}
+_RUST_KEYWORDS = {
+    "break",
+    "continue",
+    "else",
+    "false",
+    "fn",
+    "for",
+    "if",
+    "impl",
+    "in",
+    "let",
+    "loop",
+    "match",
+    "mut",
+    "return",
+    "struct",
+    "true",
+    "use",
+    "while",
+}
+_GO_KEYWORDS = {
+    "break",
+    "continue",
+    "else",
+    "false",
+    "for",
+    "func",
+    "if",
+    "package",
+    "range",
+    "return",
+    "true",
+    "var",
+}
+_CSHARP_KEYWORDS = _JAVA_KEYWORDS | {"namespace", "using", "var"}
+_HASKELL_KEYWORDS = {
+    "case",
+    "do",
+    "else",
+    "if",
+    "import",
+    "in",
+    "let",
+    "of",
+    "then",
+    "where",
+}
+_OCAML_KEYWORDS = {
+    "else",
+    "for",
+    "fun",
+    "function",
+    "if",
+    "in",
+    "let",
+    "match",
+    "rec",
+    "then",
+    "with",
+}
+_PYTHON_KEYWORDS = {
+    "and",
+    "break",
+    "class",
+    "continue",
+    "def",
+    "elif",
+    "else",
+    "False",
+    "for",
+    "from",
+    "if",
+    "import",
+    "in",
+    "is",
+    "lambda",
+    "None",
+    "not",
+    "or",
+    "return",
+    "True",
+    "while",
+    "yield",
+}
+
+
+def _make_tokenizer(comment_pattern: str | None) -> re.Pattern[str]:
+    """Compile a tokenizer that matches comments before any other token."""
+    if comment_pattern is None:
+        return re.compile(_TOKEN_PATTERN)
+    return re.compile(f"(?P<comment>{comment_pattern})|{_TOKEN_PATTERN}")
+
+
+_C_STYLE_TOKENIZER = _make_tokenizer(_C_STYLE_COMMENT)
+_HASH_TOKENIZER = _make_tokenizer(_HASH_COMMENT)
+_HASKELL_TOKENIZER = _make_tokenizer(_HASKELL_COMMENT)
+_OCAML_TOKENIZER = _make_tokenizer(_OCAML_COMMENT)
+_DEFAULT_TOKENIZER = _make_tokenizer(None)
+_LANGUAGE_SYNTAX: dict[Language, tuple[re.Pattern[str], set[str]]] = {
+    ProgrammingLanguage.C: (_C_STYLE_TOKENIZER, _C_KEYWORDS),
+    ProgrammingLanguage.CPP: (_C_STYLE_TOKENIZER, _CPP_KEYWORDS),
+    ProgrammingLanguage.JAVA: (_C_STYLE_TOKENIZER, _JAVA_KEYWORDS),
+    ProgrammingLanguage.KOTLIN: (_C_STYLE_TOKENIZER, _KOTLIN_KEYWORDS),
+    ProgrammingLanguage.RUST: (_C_STYLE_TOKENIZER, _RUST_KEYWORDS),
+    ProgrammingLanguage.GO: (_C_STYLE_TOKENIZER, _GO_KEYWORDS),
+    ProgrammingLanguage.CSHARP: (_C_STYLE_TOKENIZER, _CSHARP_KEYWORDS),
+    ProgrammingLanguage.HASKELL: (_HASKELL_TOKENIZER, _HASKELL_KEYWORDS),
+    ProgrammingLanguage.OCAML: (_OCAML_TOKENIZER, _OCAML_KEYWORDS),
+    ProgrammingLanguage.PYTHON: (_HASH_TOKENIZER, _PYTHON_KEYWORDS),
+}
+
+
+def normalize_tokens(source: bytes, language: Language) -> list[str]:
+    """
+    Get the tokens of source code with the details of light edits removed.
+
+    Comments and whitespace are dropped, and literals and identifiers other
+    than keywords are replaced by placeholders, so renaming variables or
+    changing constants does not change the tokens.
+    """
+    tokenizer, keywords = _LANGUAGE_SYNTAX.get(language, (_DEFAULT_TOKENIZER, set()))
+    tokens = []
+    for match in tokenizer.finditer(source.decode(errors="replace")):
+        match match.lastgroup:
+            case "comment":
+                continue
+            case "string":
+                tokens.append("S")
+            case "number":
+                tokens.append("N")
+            case "identifier":
+                token = match.group()
+                tokens.append(token if token in keywords else "I")
+            case _:
+                tokens.append(match.group())
+    return tokens
+
+
+def minhash_signature(tokens: list[str]) -> list[int] | None:
+    """
+    Get the MinHash signature of the shingles of a list of tokens.
+
+    The fraction of equal entries in two signatures estimates the Jaccard
+    similarity of the sets of shingles. None is returned if there are no
+    tokens.
+    """
+    if not tokens:
+        return None
+    shingle_hashes = {
+        int.from_bytes(
+            hashlib.blake2b(
+                "\x1f".join(tokens[index : index + SHINGLE_TOKENS]).encode(),
+                digest_size=8,
+            ).digest()
+        )
+        for index in range(max(1, len(tokens) - SHINGLE_TOKENS + 1))
+    }
+    return [
+        min((a * shingle_hash + b) % _MERSENNE_PRIME for shingle_hash in shingle_hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def estimate_similarity(signature: list[int], other_signature: list[int]) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures."""
+    equal = sum(1 for a, b in zip(signature, other_signature) if a == b)
+    return equal / len(signature)
+
+
+class SimilarityDetector:
+    """
+    Detector of AC submissions that are lightly edited copies of each other.
+
+    Candidate pairs are found by LSH banding of MinHash signatures, so only
+    submissions that share a band are compared. Signatures are cached by the
+    git blob id of the source code, so only new code is hashed.
+    """
+
+    def __init__(self, cache_dir: str | None = None, threshold: float = 0.8):
+        cache_path = None
+        if cache_dir is not None:
+            cache_path = os.path.join(cache_dir, SIMILARITY_CACHE_FILENAME)
+        self.cache = JsonCache(cache_path, SIMILARITY_CACHE_VERSION)
+        # The minimum estimated similarity of a suspected copy.
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+    def save_cache(self):
+        """Write the cache to file if it has been modified."""
+        with self._lock:
+            self.cache.save()
+
+    def get_signature(self, submission: Submission) -> list[int] | None:
+        """Get the MinHash signature of a submission, if it can be read."""
+        try:
+            source = submission.read_source()
+        except OSError:
+            logging.warning("Could not read submission '%s'", submission.filename)
+            return None
+        if source is None:
+            return None
+        key = f"{pygit2.hash(source)}:{submission.language.value}"
+        signature = self.cache.get(key)
+        if signature is not None:
+            return signature
+        signature = minhash_signature(normalize_tokens(source, submission.language))
+        if signature is not None:
+            with self._lock:
+                self.cache.set(key, signature)
+        return signature
+
+    def find_suspected_copies(
+        self, submissions: list[Submission]
+    ) -> tuple[SuspectedCopy, ...]:
+        """Find pairs of AC submissions by different authors with similar code."""
+        ac_submissions = [
+            submission
+            for submission in submissions
+            if submission.judgement is Judgement.ACCEPTED
+        ]
+        signatures = [self.get_signature(submission) for submission in ac_submissions]
+        buckets: defaultdict[tuple, list[int]] = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            language = ac_submissions[index].language
+            for band in range(LSH_BANDS):
+                band_values = tuple(signature[band * LSH_ROWS : (band + 1) * LSH_ROWS])
+                buckets[(language, band, band_values)].append(index)
+        candidate_pairs = set()
+        for indices in buckets.values():
+            for position, index in enumerate(indices):
+                for other_index in indices[position + 1 :]:
+                    candidate_pairs.add((index, other_index))
+        suspected_copies = []
+        for index, other_index in sorted(candidate_pairs):
+            submission = ac_submissions[index]
+            other = ac_submissions[other_index]
+            if submission.author.is_same(other.author):
+                continue
+            similarity = estimate_similarity(
+                signatures[index], signatures[other_index]  # type: ignore[arg-type]
+            )
+            if similarity >= self.threshold:
+                suspected_copies.append(SuspectedCopy(submission, other, similarity))
+        suspected_copies.sort(key=lambda x: -x.similarity)
+        return tuple(suspected_copies)
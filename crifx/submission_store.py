@@ -0,0 +1,394 @@
+"""Columnar storage of submissions for statistics across many problemsets."""
+
+import math
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any, NamedTuple
+
+from crifx.contest_objects import Judgement, Language, Problem, ProblemSet
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_JUDGEMENTS = list(Judgement)
+_JUDGEMENT_CODES = {judgement: code for code, judgement in enumerate(_JUDGEMENTS)}
+
+
+def _percentile(sorted_values: Sequence[int], percentile: float) -> float:
+    """Get a percentile of sorted values, interpolating linearly as NumPy does."""
+    rank = percentile / 100 * (len(sorted_values) - 1)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        rank - lower
+    )
+
+
+class SubmissionRow(NamedTuple):
+    """The column values of a submission, which are cheap to pickle."""
+
+    problemset_name: str
+    problem_name: str
+    author_name: str
+    language: Language
+    judgement: Judgement
+    lines_of_code: int
+    bytes_count: int
+
+    @staticmethod
+    def from_problem(problem: Problem, problemset_name: str) -> list["SubmissionRow"]:
+        """Get the rows of the submissions to a problem."""
+        return [
+            SubmissionRow(
+                problemset_name,
+                problem.name,
+                submission.author.primary_name,
+                submission.language,
+                submission.judgement,
+                submission.lines_of_code,
+                submission.bytes_count,
+            )
+            for submission in problem.submissions
+        ]
+
+
+class SubmissionStore:
+    """
+    Submissions of many problems, stored as parallel arrays.
+
+    Each submission is a row of small integers: the problem, the author, the
+    language, the judgement, the lines of code and the size in bytes. Authors
+    are interned by primary name, problems by problemset and problem name,
+    and languages by value, so no per-submission objects are kept. Aggregates
+    are computed with NumPy if it is installed, and by scanning the arrays
+    otherwise.
+    """
+
+    def __init__(self, use_numpy: bool | None = None):
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy and numpy is None:
+            raise ValueError("NumPy is not installed. Install crifx[numpy].")
+        self.use_numpy = use_numpy
+        self.author_names: list[str] = []
+        self._author_ids: dict[str, int] = {}
+        self.languages: list[Language] = []
+        self._language_codes: dict[Language, int] = {}
+        # The problemset name and problem name of each problem.
+        self.problem_keys: list[tuple[str, str]] = []
+        self._problem_ids: dict[tuple[str, str], int] = {}
+        # The rows of each problem, or None if they are not contiguous. The
+        # rows of a problem added with `add_problem` are always contiguous.
+        self._problem_rows: list[range | None] = []
+        self.problem_column = array("i")
+        self.author_column = array("i")
+        self.language_column = array("H")
+        self.judgement_column = array("B")
+        self.lines_of_code_column = array("q")
+        self.bytes_column = array("q")
+
+    def __len__(self) -> int:
+        return len(self.problem_column)
+
+    def _intern_author(self, author_name: str) -> int:
+        """Get the id of an author, adding the author if it is new."""
+        author_id = self._author_ids.get(author_name)
+        if author_id is None:
+            author_id = len(self.author_names)
+            self._author_ids[author_name] = author_id
+            self.author_names.append(author_name)
+        return author_id
+
+    def _intern_language(self, language: Language) -> int:
+        """Get the code of a language, adding the language if it is new."""
+        language_code = self._language_codes.get(language)
+        if language_code is None:
+            language_code = len(self.languages)
+            self._language_codes[language] = language_code
+            self.languages.append(language)
+        return language_code
+
+    def _intern_problem(self, problem_key: tuple[str, str]) -> int:
+        """Get the id of a problem, adding the problem if it is new."""
+        problem_id = self._problem_ids.get(problem_key)
+        if problem_id is None:
+            problem_id = len(self.problem_keys)
+            self._problem_ids[problem_key] = problem_id
+            self.problem_keys.append(problem_key)
+            self._problem_rows.append(range(0))
+        return problem_id
+
+    def add_rows(self, rows: Iterable["SubmissionRow"]):
+        """Add submissions from their column values."""
+        for row in rows:
+            problem_id = self._intern_problem((row.problemset_name, row.problem_name))
+            problem_rows = self._problem_rows[problem_id]
+            if problem_rows is not None:
+                if not problem_rows:
+                    self._problem_rows[problem_id] = range(len(self), len(self) + 1)
+                elif problem_rows.stop == len(self):
+                    self._problem_rows[problem_id] = range(
+                        problem_rows.start, len(self) + 1
+                    )
+                else:
+                    self._problem_rows[problem_id] = None
+            self.problem_column.append(problem_id)
+            self.author_column.append(self._intern_author(row.author_name))
+            self.language_column.append(self._intern_language(row.language))
+            self.judgement_column.append(_JUDGEMENT_CODES[row.judgement])
+            self.lines_of_code_column.append(row.lines_of_code)
+            self.bytes_column.append(row.bytes_count)
+
+    def add_problem(self, problem: Problem, problemset_name: str = "") -> "ProblemView":
+        """Add the submissions of a problem to the store."""
+        problem_key = (problemset_name, problem.name)
+        if problem_key in self._problem_ids:
+            raise ValueError(
+                f"Problem '{problem.name}' of problemset '{problemset_name}' is "
+                "already in the store."
+            )
+        problem_id = self._intern_problem(problem_key)
+        self.add_rows(SubmissionRow.from_problem(problem, problemset_name))
+        return ProblemView(self, problem_id)
+
+    def add_problemset(self, problemset: ProblemSet, name: str) -> "ProblemSetView":
+        """Add the submissions of every problem in a problemset to the store."""
+        problem_ids = tuple(
+            self.add_problem(problem, name).problem_id
+            for problem in problemset.problems
+        )
+        return ProblemSetView(self, name, problem_ids)
+
+    def get_problem(self, problemset_name: str, problem_name: str) -> "ProblemView":
+        """Get the view of a problem in the store."""
+        return ProblemView(self, self._problem_ids[(problemset_name, problem_name)])
+
+    def _numpy_column(self, column: array) -> Any:
+        """
+        Get a NumPy array that shares the memory of a column.
+
+        The column cannot grow while the array exists, so the array must not
+        be kept after the aggregate that uses it.
+        """
+        return numpy.frombuffer(column, dtype=column.typecode)
+
+    def _get_rows(self, problem_ids: Iterable[int]) -> list[range] | None:
+        """Get the rows of problems, or None if some rows are not contiguous."""
+        rows = []
+        for problem_id in sorted(set(problem_ids)):
+            problem_rows = self._problem_rows[problem_id]
+            if problem_rows is None:
+                return None
+            rows.append(problem_rows)
+        return rows
+
+    def _select(
+        self,
+        judgement: Judgement | None = None,
+        problem_ids: Iterable[int] | None = None,
+    ) -> Any:
+        """
+        Select the rows with a judgement and in a set of problems.
+
+        If the rows of the problems are contiguous, then only those rows are
+        checked. Otherwise, every row is checked, and a boolean mask is
+        returned with NumPy. Row indices are returned in every other case.
+        """
+        judgement_code = None if judgement is None else _JUDGEMENT_CODES[judgement]
+        problem_id_set = None if problem_ids is None else set(problem_ids)
+        rows = None if problem_id_set is None else self._get_rows(problem_id_set)
+        if rows is not None:
+            if self.use_numpy:
+                row_indices = numpy.empty(0, dtype=numpy.intp)
+                if rows:
+                    row_indices = numpy.concatenate(
+                        [
+                            numpy.arange(problem_rows.start, problem_rows.stop)
+                            for problem_rows in rows
+                        ]
+                    )
+                if judgement_code is not None:
+                    judgement_column = self._numpy_column(self.judgement_column)
+                    row_indices = row_indices[
+                        judgement_column[row_indices] == judgement_code
+                    ]
+                return row_indices
+            return [
+                row
+                for problem_rows in rows
+                for row in problem_rows
+                if judgement_code is None
+                or self.judgement_column[row] == judgement_code
+            ]
+        if self.use_numpy:
+            mask = numpy.ones(len(self), dtype=bool)
+            if judgement_code is not None:
+                mask &= self._numpy_column(self.judgement_column) == judgement_code
+            if problem_id_set is not None:
+                mask &= numpy.isin(
+                    self._numpy_column(self.problem_column), list(problem_id_set)
+                )
+            return mask
+        return [
+            row
+            for row in range(len(self))
+            if (judgement_code is None or self.judgement_column[row] == judgement_code)
+            and (problem_id_set is None or self.problem_column[row] in problem_id_set)
+        ]
+
+    def _count_codes(self, column: array, selection: Any, codes: int) -> list[int]:
+        """Count the selected rows with each code in a column."""
+        if self.use_numpy:
+            counts = numpy.bincount(
+                self._numpy_column(column)[selection], minlength=codes
+            )
+            return [int(count) for count in counts]
+        counter = Counter(column[row] for row in selection)
+        return [counter[code] for code in range(codes)]
+
+    def author_counts(
+        self,
+        judgement: Judgement | None = None,
+        problem_ids: Iterable[int] | None = None,
+    ) -> dict[str, int]:
+        """Get the number of submissions by each author who has any."""
+        counts = self._count_codes(
+            self.author_column,
+            self._select(judgement, problem_ids),
+            len(self.author_names),
+        )
+        return {
+            author_name: count
+            for author_name, count in zip(self.author_names, counts)
+            if count > 0
+        }
+
+    def language_histogram(
+        self,
+        judgement: Judgement | None = None,
+        problem_ids: Iterable[int] | None = None,
+    ) -> dict[Language, int]:
+        """Get the number of submissions in each language that has any."""
+        counts = self._count_codes(
+            self.language_column,
+            self._select(judgement, problem_ids),
+            len(self.languages),
+        )
+        return {
+            language: count
+            for language, count in zip(self.languages, counts)
+            if count > 0
+        }
+
+    def judgement_counts(
+        self, problem_ids: Iterable[int] | None = None
+    ) -> dict[Judgement, int]:
+        """Get the number of submissions with each judgement."""
+        counts = self._count_codes(
+            self.judgement_column,
+            self._select(problem_ids=problem_ids),
+            len(_JUDGEMENTS),
+        )
+        return dict(zip(_JUDGEMENTS, counts))
+
+    def lines_of_code_percentiles(
+        self,
+        percentiles: Sequence[float],
+        judgement: Judgement | None = Judgement.ACCEPTED,
+    ) -> dict[tuple[str, str], list[float]]:
+        """
+        Get percentiles of the lines of code of the submissions to each problem.
+
+        Problems without any submissions with the judgement are omitted.
+        """
+        selection = self._select(judgement)
+        lines_of_code_by_problem: dict[int, Sequence[int]] = {}
+        if self.use_numpy:
+            problem_column = self._numpy_column(self.problem_column)[selection]
+            lines_of_code = self._numpy_column(self.lines_of_code_column)[selection]
+            order = numpy.lexsort((lines_of_code, problem_column))
+            problem_column = problem_column[order]
+            lines_of_code = lines_of_code[order]
+            problem_ids, starts = numpy.unique(problem_column, return_index=True)
+            ends = list(starts[1:]) + [len(problem_column)]
+            for problem_id, start, end in zip(problem_ids, starts, ends):
+                lines_of_code_by_problem[int(problem_id)] = lines_of_code[
+                    start:end
+                ].tolist()
+        else:
+            lines_of_code_lists: dict[int, list[int]] = {}
+            for row in selection:
+                lines_of_code_lists.setdefault(self.problem_column[row], []).append(
+                    self.lines_of_code_column[row]
+                )
+            for problem_id, values in lines_of_code_lists.items():
+                lines_of_code_by_problem[problem_id] = sorted(values)
+        return {
+            self.problem_keys[problem_id]: [
+                _percentile(values, percentile) for percentile in percentiles
+            ]
+            for problem_id, values in sorted(lines_of_code_by_problem.items())
+        }
+
+
+@dataclass(frozen=True)
+class ProblemView:
+    """The submissions to a problem in a submission store."""
+
+    store: SubmissionStore
+    problem_id: int
+
+    @property
+    def problemset_name(self) -> str:
+        """Get the name of the problemset of the problem."""
+        return self.store.problem_keys[self.problem_id][0]
+
+    @property
+    def name(self) -> str:
+        """Get the name of the problem."""
+        return self.store.problem_keys[self.problem_id][1]
+
+    def judgement_counts(self) -> dict[Judgement, int]:
+        """Get the number of submissions with each judgement."""
+        return self.store.judgement_counts([self.problem_id])
+
+    def ac_author_count(self) -> int:
+        """
+        Get the number of authors with an AC submission.
+
+        Authors are told apart by primary name only, since the store does not
+        keep git names or suspected copies. This can be more than
+        `Problem.independent_ac_count`, which merges judges with the same git
+        name.
+        """
+        return len(self.store.author_counts(Judgement.ACCEPTED, [self.problem_id]))
+
+    def ac_languages(self) -> dict[Language, int]:
+        """Get the number of AC submissions in each language."""
+        return self.store.language_histogram(Judgement.ACCEPTED, [self.problem_id])
+
+
+@dataclass(frozen=True)
+class ProblemSetView:
+    """The submissions to the problems of a problemset in a submission store."""
+
+    store: SubmissionStore
+    name: str
+    problem_ids: tuple[int, ...]
+
+    @property
+    def problems(self) -> list[ProblemView]:
+        """Get the views of the problems."""
+        return [ProblemView(self.store, problem_id) for problem_id in self.problem_ids]
+
+    def submission_authors(self) -> list[str]:
+        """Get the names of the authors with at least one submission."""
+        return sorted(self.store.author_counts(problem_ids=self.problem_ids))
+
+    def author_counts(self, judgement: Judgement | None = None) -> dict[str, int]:
+        """Get the number of submissions by each author."""
+        return self.store.author_counts(judgement, self.problem_ids)
@@ -0,0 +1,207 @@
+"""Contest readiness metrics computed over the git history of a problemset."""
+
+import csv
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+from pygit2 import Commit, Oid
+from pygit2.enums import SortMode
+
+from crifx.config_parser import Config, ReviewCountRequirements
+from crifx.contest_objects import Problem
+from crifx.dir_layout_parsing import get_problem_root_dirs
+from crifx.problemset_parser import ProblemSetParser
+from crifx.tree_reader import GitTreeReader
+
+TIMELINE_FILENAME = "crifx-timeline"
+
+
+@dataclass(frozen=True)
+class ProblemMetrics:
+    """Readiness metrics for a problem, as shown in the summary table."""
+
+    name: str
+    independent_ac: int
+    language_groups_ac: int
+    submissions_wa: int
+    submissions_tle: int
+    statement_reviewers: int
+    validator_reviewers: int
+    data_reviewers: int
+
+    @staticmethod
+    def from_problem(problem: Problem, config: Config) -> "ProblemMetrics":
+        """Compute the readiness metrics for a problem."""
+        language_groups = [
+            group_config.language_group
+            for group_config in config.language_group_configs
+        ]
+        readiness = problem.readiness
+        return ProblemMetrics(
+            name=problem.name,
+            independent_ac=(
+                readiness.independent_ac_merged
+                if config.similarity.merge_copy_authors
+                else readiness.independent_ac
+            ),
+            language_groups_ac=len(
+                readiness.language_groups_ac_covered(language_groups)
+            ),
+            submissions_wa=len(problem.wa_submissions),
+            submissions_tle=len(problem.tle_submissions),
+            statement_reviewers=len(problem.review_status.statement_reviewed_by),
+            validator_reviewers=len(problem.review_status.validators_reviewed_by),
+            data_reviewers=len(problem.review_status.data_reviewed_by),
+        )
+
+    def outstanding(self, requirements: ReviewCountRequirements) -> int:
+        """Get the number of submissions and reviews still required."""
+        return sum(
+            max(0, getattr(requirements, field) - getattr(self, field))
+            for field in (
+                "independent_ac",
+                "language_groups_ac",
+                "submissions_wa",
+                "submissions_tle",
+                "statement_reviewers",
+                "validator_reviewers",
+                "data_reviewers",
+            )
+        )
+
+
+@dataclass(frozen=True)
+class TimelinePoint:
+    """The readiness metrics of every problem as of a commit."""
+
+    commit_id: str
+    commit_time: int
+    problems: tuple[ProblemMetrics, ...]
+
+    def outstanding(self, requirements: ReviewCountRequirements) -> int:
+        """Get the number of submissions and reviews still required."""
+        return sum(problem.outstanding(requirements) for problem in self.problems)
+
+    @property
+    def commit_datetime(self) -> datetime:
+        """Get the time of the commit."""
+        return datetime.fromtimestamp(self.commit_time, tz=timezone.utc)
+
+
+def compute_timeline(
+    parser: ProblemSetParser, config: Config, every: int = 1
+) -> list[TimelinePoint]:
+    """
+    Compute the readiness metrics of each problem over the git history.
+
+    The metrics are computed for every `every`th commit on the first-parent
+    history of the current commit, and always for the current commit itself.
+    A problem is only parsed again if the id of its tree has changed since
+    the previous commit that was evaluated.
+    """
+    git_manager = parser.git_manager
+    repo = git_manager.repo
+    walker = repo.walk(
+        git_manager.get_commit_id(), SortMode.TOPOLOGICAL | SortMode.REVERSE
+    )
+    walker.simplify_first_parent()
+    commits: list[Commit] = list(walker)
+    sampled_commits = commits[::every]
+    if commits and sampled_commits[-1].id != commits[-1].id:
+        sampled_commits.append(commits[-1])
+    root_path = parser.problemset_root_path
+    points: list[TimelinePoint] = []
+    root_tree_id: Oid | None = None
+    tree_ids: dict[str, Oid | None] = {}
+    metrics_by_dir: dict[str, ProblemMetrics] = {}
+    # The commits are evaluated oldest first, so each manager extends the
+    # history index of the previous one rather than walking the history again.
+    revision_git_manager = git_manager
+    for commit in sampled_commits:
+        reader = GitTreeReader(repo, commit, git_manager.repo_root)
+        commit_root_tree_id = reader.tree_id(root_path)
+        if commit_root_tree_id != root_tree_id:
+            root_tree_id = commit_root_tree_id
+            problem_root_dirs = get_problem_root_dirs(root_path, reader)
+            revision_git_manager = revision_git_manager.at_commit(commit.id)
+            revision_parser = parser.at_revision(reader, revision_git_manager)
+            commit_tree_ids = {
+                problem_root_dir: reader.tree_id(problem_root_dir)
+                for problem_root_dir in problem_root_dirs
+            }
+            for problem_root_dir, tree_id in commit_tree_ids.items():
+                if tree_ids.get(problem_root_dir) == tree_id:
+                    continue
+                problem = revision_parser.parse_problem(problem_root_dir)
+                metrics_by_dir[problem_root_dir] = ProblemMetrics.from_problem(
+                    problem, config
+                )
+            tree_ids = commit_tree_ids
+            metrics_by_dir = {
+                problem_root_dir: metrics
+                for problem_root_dir, metrics in metrics_by_dir.items()
+                if problem_root_dir in tree_ids
+            }
+        points.append(
+            TimelinePoint(
+                str(commit.id),
+                commit.commit_time,
+                tuple(sorted(metrics_by_dir.values(), key=lambda x: x.name)),
+            )
+        )
+    git_manager.save_caches()
+    return points
+
+
+def write_timeline_csv(
+    points: list[TimelinePoint], requirements: ReviewCountRequirements, path: str
+):
+    """Write the timeline as a csv file with one row per commit and problem."""
+    metric_names = [
+        field for field in ProblemMetrics.__dataclass_fields__ if field != "name"
+    ]
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["commit", "time", "problem", *metric_names, "outstanding"])
+        for point in points:
+            for problem in point.problems:
+                writer.writerow(
+                    [
+                        point.commit_id,
+                        point.commit_datetime.isoformat(),
+                        problem.name,
+                        *(getattr(problem, name) for name in metric_names),
+                        problem.outstanding(requirements),
+                    ]
+                )
+
+
+def write_timeline_json(
+    points: list[TimelinePoint], requirements: ReviewCountRequirements, path: str
+):
+    """Write the timeline as a json file with one object per commit."""
+    timeline = [
+        {
+            "commit": point.commit_id,
+            "time": point.commit_datetime.isoformat(),
+            "outstanding": point.outstanding(requirements),
+            "problems": [asdict(problem) for problem in point.problems],
+        }
+        for point in points
+    ]
+    with open(path, "w") as json_file:
+        json.dump(timeline, json_file, separators=(",", ":"))
+
+
+def write_timeline(
+    points: list[TimelinePoint], requirements: ReviewCountRequirements, dir_path: str
+):
+    """Write the timeline as csv and json files in a directory."""
+    write_timeline_csv(
+        points, requirements, os.path.join(dir_path, f"{TIMELINE_FILENAME}.csv")
+    )
+    write_timeline_json(
+        points, requirements, os.path.join(dir_path, f"{TIMELINE_FILENAME}.json")
+    )
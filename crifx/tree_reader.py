@@ -0,0 +1,254 @@
+"""Readers for the files of a problemset in a working tree or in a git commit."""
+
+import io
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from pygit2 import Blob, Commit, Oid, Repository, Tree
+
+from crifx.git_manager import open_repository
+
+
+@dataclass(frozen=True)
+class TreeEntry:
+    """An entry in a directory listing."""
+
+    name: str
+    is_dir: bool
+    is_file: bool
+
+
+class TreeReader(ABC):
+    """
+    Interface for reading files and directories.
+
+    Paths are absolute paths, as they would be in a checked out working tree.
+    """
+
+    # True iff files can be written to the tree being read.
+    writable = False
+
+    @abstractmethod
+    def list_dir(self, path: str) -> list[TreeEntry]:
+        """Get the entries of a directory."""
+
+    @abstractmethod
+    def is_dir(self, path: str) -> bool:
+        """Return True iff the path is a directory."""
+
+    @abstractmethod
+    def is_file(self, path: str) -> bool:
+        """Return True iff the path is a file."""
+
+    def exists(self, path: str) -> bool:
+        """Return True iff the path is a file or a directory."""
+        return self.is_dir(path) or self.is_file(path)
+
+    @abstractmethod
+    def size(self, path: str) -> int:
+        """Get the size of a file in bytes."""
+
+    def mtime(self, path: str) -> float | None:
+        """Get the modification time of a file, or None if it is not known."""
+        return None
+
+    def fingerprint(self, path: str) -> str | None:
+        """
+        Get a string that changes whenever the contents of a file change.
+
+        None is returned if changes to the file cannot be detected cheaply.
+        """
+        return None
+
+    def invalidate(self, path: str | None = None):
+        """Discard anything cached about a directory, or about every directory."""
+
+    @abstractmethod
+    def open_binary(self, path: str) -> BinaryIO:
+        """Open a file for reading bytes."""
+
+    def read_bytes(self, path: str) -> bytes:
+        """Read the contents of a file."""
+        with self.open_binary(path) as binary_file:
+            return binary_file.read()
+
+
+class WorktreeReader(TreeReader):
+    """
+    Reader for files in the working tree.
+
+    Each directory is scanned at most once, when it is listed, and the scan
+    is used to answer later questions about its entries, so that a file
+    that is probed several times does not cost a system call each time.
+    Sizes and modification times are read lazily, once per file. Call
+    `invalidate` after modifying a directory.
+    """
+
+    writable = True
+
+    def __init__(self):
+        self._scans: dict[str, dict[str, os.DirEntry]] = {}
+
+    def _scan(self, path: str) -> dict[str, os.DirEntry]:
+        """Get the entries of a directory by name, scanning it if needed."""
+        path = os.path.normpath(path)
+        scan = self._scans.get(path)
+        if scan is None:
+            with os.scandir(path) as entries:
+                scan = {entry.name: entry for entry in entries}
+            self._scans[path] = scan
+        return scan
+
+    def _get_parent_scan(self, path: str) -> tuple[dict[str, os.DirEntry] | None, str]:
+        """
+        Get the scan of the parent directory of a path and the name of the path.
+
+        The scan is None if the parent directory has not been scanned, so that
+        probing a single path does not scan its whole parent directory, or if
+        the path is a root directory.
+        """
+        parent_path, name = os.path.split(os.path.normpath(path))
+        if not name:
+            return None, name
+        return self._scans.get(parent_path or os.curdir), name
+
+    def list_dir(self, path: str) -> list[TreeEntry]:
+        """Get the entries of a directory."""
+        return [
+            TreeEntry(entry.name, entry.is_dir(), entry.is_file())
+            for entry in self._scan(path).values()
+        ]
+
+    def is_dir(self, path: str) -> bool:
+        """Return True iff the path is a directory."""
+        scan, name = self._get_parent_scan(path)
+        if scan is None:
+            return os.path.isdir(path)
+        entry = scan.get(name)
+        return entry is not None and entry.is_dir()
+
+    def is_file(self, path: str) -> bool:
+        """Return True iff the path is a file."""
+        scan, name = self._get_parent_scan(path)
+        if scan is None:
+            return os.path.isfile(path)
+        entry = scan.get(name)
+        return entry is not None and entry.is_file()
+
+    def _stat(self, path: str) -> os.stat_result:
+        """Get the status of a file, reusing the status of a scanned entry."""
+        scan, name = self._get_parent_scan(path)
+        entry = None if scan is None else scan.get(name)
+        if entry is None:
+            return os.stat(path)
+        return entry.stat()
+
+    def size(self, path: str) -> int:
+        """Get the size of a file in bytes."""
+        return self._stat(path).st_size
+
+    def mtime(self, path: str) -> float | None:
+        """Get the modification time of a file."""
+        return self._stat(path).st_mtime
+
+    def fingerprint(self, path: str) -> str | None:
+        """Get the size and modification time of a file."""
+        stat_result = self._stat(path)
+        return f"{stat_result.st_size}:{stat_result.st_mtime_ns}"
+
+    def invalidate(self, path: str | None = None):
+        """Discard the scan of a directory, or the scans of every directory."""
+        if path is None:
+            self._scans = {}
+        else:
+            self._scans.pop(os.path.normpath(path), None)
+
+    def open_binary(self, path: str) -> BinaryIO:
+        """Open a file for reading bytes."""
+        return open(path, "rb")
+
+
+class GitTreeReader(TreeReader):
+    """
+    Reader for files in the tree of a git commit.
+
+    File contents are read from the git object database, so the commit does
+    not need to be checked out.
+    """
+
+    def __init__(self, repo: Repository, commit: Commit, repo_root: str):
+        self.repo = repo
+        self.commit = commit
+        self.repo_root = repo_root
+
+    @staticmethod
+    def from_rev(path_in_repo: str, rev: str) -> "GitTreeReader":
+        """Create a reader for a revision of the repository containing a path."""
+        repo, repo_root = open_repository(path_in_repo)
+        commit = repo.revparse_single(rev).peel(Commit)
+        return GitTreeReader(repo, commit, repo_root)
+
+    def _get_object(self, path: str) -> Tree | Blob | None:
+        """Get the tree or blob at an absolute path, if there is one."""
+        relative_path = os.path.relpath(path, self.repo_root)
+        if relative_path == os.curdir:
+            return self.commit.tree
+        if relative_path.startswith(os.pardir):
+            return None
+        try:
+            tree_object = self.commit.tree[relative_path]
+        except KeyError:
+            return None
+        if isinstance(tree_object, (Tree, Blob)):
+            return tree_object
+        return None
+
+    def list_dir(self, path: str) -> list[TreeEntry]:
+        """Get the entries of a directory."""
+        tree = self._get_object(path)
+        if not isinstance(tree, Tree):
+            raise FileNotFoundError(f"Directory '{path}' is not in the git tree.")
+        return [
+            TreeEntry(
+                tree_object.name,
+                tree_object.type_str == "tree",
+                tree_object.type_str == "blob",
+            )
+            for tree_object in tree
+        ]
+
+    def is_dir(self, path: str) -> bool:
+        """Return True iff the path is a directory."""
+        return isinstance(self._get_object(path), Tree)
+
+    def tree_id(self, path: str) -> Oid | None:
+        """Get the id of the tree for a directory, if there is one."""
+        tree = self._get_object(path)
+        if not isinstance(tree, Tree):
+            return None
+        return tree.id
+
+    def is_file(self, path: str) -> bool:
+        """Return True iff the path is a file."""
+        return isinstance(self._get_object(path), Blob)
+
+    def _get_blob(self, path: str) -> Blob:
+        """Get the blob at an absolute path."""
+        blob = self._get_object(path)
+        if not isinstance(blob, Blob):
+            raise FileNotFoundError(f"File '{path}' is not in the git tree.")
+        return blob
+
+    def size(self, path: str) -> int:
+        """Get the size of a file in bytes."""
+        return self._get_blob(path).size
+
+    def fingerprint(self, path: str) -> str | None:
+        """Get the id of the blob for a file."""
+        return str(self._get_blob(path).id)
+
+    def open_binary(self, path: str) -> BinaryIO:
+        """Open a file for reading bytes."""
+        return io.BytesIO(self._get_blob(path).data)
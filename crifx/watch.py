@@ -0,0 +1,160 @@
+"""Rebuild the report whenever the problemset changes."""
+
+import logging
+import os
+import time
+from collections.abc import Callable
+
+from pygit2 import GitError, Oid
+
+from crifx.contest_objects import Problem, ProblemParseFailure, ProblemSet
+from crifx.dir_layout_parsing import get_problem_root_dirs
+from crifx.problemset_parser import ProblemSetParser
+from crifx.tree_reader import WorktreeReader
+
+# The path, size and modification time of each file and directory.
+ProblemSignature = tuple[tuple[str, int, int], ...]
+
+
+def problem_signature(problem_root_dir: str) -> ProblemSignature:
+    """
+    Get the size and modification time of everything in a problem directory.
+
+    The signature changes whenever a file in the directory is added, removed,
+    renamed or modified.
+    """
+    signature = []
+    dir_paths = [problem_root_dir]
+    while dir_paths:
+        dir_path = dir_paths.pop()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        dir_paths.append(entry.path)
+                    try:
+                        stat_result = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    signature.append(
+                        (entry.path, stat_result.st_size, stat_result.st_mtime_ns)
+                    )
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+    signature.sort()
+    return tuple(signature)
+
+
+class ProblemSetWatcher:
+    """
+    Watcher that parses problems again when their directories change.
+
+    The parser, git manager and judges are kept between rebuilds, so only
+    the problems that changed are parsed again. If the git index or HEAD
+    changes, then every problem is parsed again, since the attribution of
+    any submission may have changed. Unchanged problems are then usually
+    served from the problem cache.
+    """
+
+    def __init__(
+        self,
+        parser: ProblemSetParser,
+        on_change: Callable[[ProblemSet], None],
+        interval: float = 1.0,
+    ):
+        self.parser = parser
+        self.on_change = on_change
+        self.interval = interval
+        self._signatures: dict[str, ProblemSignature] = {}
+        self._results: dict[str, Problem | ProblemParseFailure] = {}
+        self._git_state: tuple[Oid | None, int | None] | None = None
+
+    def _get_git_state(self) -> tuple[Oid | None, int | None]:
+        """Get the HEAD commit id and the modification time of the git index."""
+        repo = self.parser.git_manager.repo
+        try:
+            head_id = repo.head.target
+        except GitError:
+            head_id = None
+        try:
+            index_mtime = os.stat(os.path.join(repo.path, "index")).st_mtime_ns
+        except FileNotFoundError:
+            index_mtime = None
+        return head_id, index_mtime
+
+    def poll(self) -> bool:
+        """
+        Parse the problems that changed since the last poll.
+
+        Return True iff any problem was added, removed or parsed again.
+        """
+        problem_root_dirs = sorted(
+            get_problem_root_dirs(self.parser.problemset_root_path, WorktreeReader())
+        )
+        signatures = {
+            problem_root_dir: problem_signature(problem_root_dir)
+            for problem_root_dir in problem_root_dirs
+        }
+        git_state = self._get_git_state()
+        if git_state != self._git_state:
+            head_moved = (
+                self._git_state is not None and git_state[0] != self._git_state[0]
+            )
+            self._git_state = git_state
+            self.parser.git_manager.refresh_status()
+            if head_moved:
+                logging.info("HEAD moved. Refreshing the judges.")
+                self.parser.refresh_judges()
+            changed_dirs = problem_root_dirs
+        else:
+            changed_dirs = [
+                problem_root_dir
+                for problem_root_dir in problem_root_dirs
+                if signatures[problem_root_dir]
+                != self._signatures.get(problem_root_dir)
+            ]
+            if changed_dirs:
+                self.parser.git_manager.refresh_status()
+        removed_dirs = set(self._results) - set(problem_root_dirs)
+        self._signatures = signatures
+        for problem_root_dir in removed_dirs:
+            del self._results[problem_root_dir]
+        if not changed_dirs:
+            return bool(removed_dirs)
+        logging.info("Parsing %d changed problem(s).", len(changed_dirs))
+        self.parser.reader.invalidate()
+        results = self.parser.iter_problems(changed_dirs)
+        # The results are exhausted so that the parser saves its caches.
+        for problem_root_dir, result in zip(changed_dirs, results, strict=True):
+            self._results[problem_root_dir] = result
+        return True
+
+    def get_problemset(self) -> ProblemSet:
+        """Get the problemset from the most recent parse of each problem."""
+        problems = []
+        parse_failures = []
+        for result in self._results.values():
+            if isinstance(result, Problem):
+                problems.append(result)
+            else:
+                parse_failures.append(result)
+        return ProblemSet(problems, parse_failures)
+
+    def run(self, polls_max: int | None = None):
+        """
+        Poll for changes and call `on_change` after each change.
+
+        The problemset is parsed and `on_change` is called once before
+        polling starts. Errors raised by `on_change` are logged, and
+        watching continues.
+        """
+        polls = 0
+        while polls_max is None or polls < polls_max:
+            if polls > 0:
+                time.sleep(self.interval)
+            if self.poll() or polls == 0:
+                try:
+                    self.on_change(self.get_problemset())
+                except Exception:
+                    logging.exception("Failed to rebuild the report.")
+            polls += 1
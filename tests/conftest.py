@@ -53,6 +53,35 @@ def empty_repo(tmp_path):
         yield pygit2.Repository(path)
 
 
+@pytest.fixture
+def commit_files():
+    """Write files into a repository working tree and commit them to HEAD."""
+
+    def _func(
+        repo: pygit2.Repository,
+        files: dict[str, str],
+        author_name: str = "Test User",
+        message: str = "Test commit",
+    ) -> pygit2.Oid:
+        for relative_path, content in files.items():
+            file_path = os.path.join(repo.workdir, relative_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as written_file:
+                written_file.write(content)
+            repo.index.add(relative_path)
+        repo.index.write()
+        tree_id = repo.index.write_tree()
+        signature = pygit2.Signature(
+            author_name, f"{author_name.lower().replace(' ', '')}@example.com"
+        )
+        parents = [] if repo.head_is_unborn else [repo.head.target]
+        return repo.create_commit(
+            "HEAD", signature, signature, message, tree_id, parents
+        )
+
+    yield _func
+
+
 @pytest.fixture
 def global_git_config_path(tmp_path):
     """Set and return a global git config path."""
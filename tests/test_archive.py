@@ -0,0 +1,116 @@
+"""Tests for reporting on many problemsets at once."""
+
+import csv
+import json
+import os
+import unittest.mock as mock
+
+import pygit2
+
+from crifx import archive
+from crifx.archive import (
+    ArchiveOptions,
+    find_problemset_roots,
+    group_by_repository,
+    run_archive,
+    write_archive_index,
+)
+from crifx.report_writer import ReportWriter
+
+CONFIG = """
+[[language_group]]
+name = "c/c++"
+languages = ["C", "C++"]
+
+[[language_group]]
+name = "python"
+languages = ["Python"]
+"""
+
+
+def test_archive(empty_repo, commit_files, tmp_path):
+    """Problemsets in one repository share a git manager and are indexed."""
+    commit_files(
+        empty_repo,
+        {
+            "2024/crifx.toml": CONFIG,
+            "2024/a/submissions/accepted/sol.py": "1\n",
+            "2025/crifx.toml": CONFIG,
+            "2025/b/submissions/accepted/sol.cpp": "1\n2\n",
+            "2025/b/submissions/wrong_answer/wa.py": "1\n",
+            ".hidden/c/submissions/accepted/sol.py": "1\n",
+        },
+        "Alice",
+    )
+    archive_root = empty_repo.workdir.rstrip(os.sep)
+    problemset_roots = find_problemset_roots(archive_root)
+    assert problemset_roots == [
+        os.path.join(archive_root, "2024"),
+        os.path.join(archive_root, "2025"),
+    ]
+    output_dir = os.path.join(tmp_path, "output")
+    crifx_dir_path = os.path.join(output_dir, ".crifx")
+    os.makedirs(crifx_dir_path)
+    options = ArchiveOptions(archive_root, crifx_dir_path, output_dir)
+    with (
+        mock.patch.object(ReportWriter, "write_pdf") as write_pdf_mock,
+        mock.patch.dict(archive._git_managers, clear=True),
+        mock.patch.dict(archive._configs, clear=True),
+    ):
+        entries = run_archive(problemset_roots, options)
+        assert len(archive._git_managers) == 1
+        assert len(archive._configs) == 1
+    assert write_pdf_mock.call_count == 2
+    assert [entry.name for entry in entries] == ["2024", "2025"]
+    assert all(entry.error is None for entry in entries)
+    assert entries[1].report_dir == os.path.join(output_dir, "2025")
+    assert os.path.isdir(os.path.join(output_dir, "2025", ".crifx"))
+    assert [problem.name for problem in entries[1].problems] == ["b"]
+    assert len(entries[1].submissions) == 2
+
+    write_archive_index(entries, output_dir)
+    with open(os.path.join(output_dir, "crifx-archive.csv"), newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [(row["problemset"], row["problem"]) for row in rows] == [
+        ("2024", "a"),
+        ("2025", "b"),
+    ]
+    assert rows[1]["submissions_wa"] == "1"
+    with open(os.path.join(output_dir, "crifx-archive.json")) as json_file:
+        index = json.load(json_file)
+    assert index["authors"] == {"Alice": {"submissions": 3, "accepted": 2}}
+    assert index["ac_languages"] == {"Python": 1, "C++": 1}
+
+
+def test_archive_error(empty_repo, commit_files):
+    """A problemset that cannot be parsed is recorded rather than raised."""
+    commit_files(empty_repo, {"a/submissions/accepted/sol.py": "1\n"})
+    archive_root = empty_repo.workdir.rstrip(os.sep)
+    options = ArchiveOptions(archive_root, os.path.join(archive_root, ".crifx"))
+    with mock.patch.dict(archive._configs, clear=True):
+        entries = run_archive([archive_root], options)
+    assert len(entries) == 1
+    assert entries[0].report_dir is None
+    assert entries[0].error is not None
+    assert entries[0].outstanding == 0
+
+
+def test_group_by_repository(empty_repo, tmp_path):
+    """Problemsets are grouped by repository so each has a single writer."""
+    archive_root = empty_repo.workdir.rstrip(os.sep)
+    other_root = os.path.join(tmp_path, "other")
+    pygit2.init_repository(other_root)
+    outside_root = os.path.join(tmp_path, "outside")
+    problemset_roots = [
+        os.path.join(archive_root, "2024"),
+        os.path.join(other_root, "2024"),
+        os.path.join(archive_root, "2025"),
+        outside_root,
+    ]
+    for problemset_root in problemset_roots:
+        os.makedirs(problemset_root, exist_ok=True)
+    assert group_by_repository(problemset_roots) == [
+        [problemset_roots[0], problemset_roots[2]],
+        [problemset_roots[1]],
+        [outside_root],
+    ]
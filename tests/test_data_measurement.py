@@ -0,0 +1,137 @@
+"""Tests for measuring test data."""
+
+import io
+import os
+import unittest.mock as mock
+
+from crifx.config_parser import DataConfig
+from crifx.contest_objects import Problem, ProblemTestCase
+from crifx.data_measurement import (
+    DataStatsCollector,
+    data_budget_warnings,
+    data_duplicate_warnings,
+    measure_file,
+)
+from crifx.report_objects import DEFAULT_REVIEW_STATUS
+from crifx.tree_reader import WorktreeReader
+
+
+def test_measure_file():
+    """Files are measured the same way regardless of the chunk size."""
+    content = b"1 2 3\n\n12345678\nabc"
+    digest = measure_file(io.BytesIO(content)).digest
+    for chunk_bytes in (1, 4, 1 << 20):
+        with mock.patch("crifx.data_measurement.DATA_READ_CHUNK_BYTES", chunk_bytes):
+            file_stats = measure_file(io.BytesIO(content))
+        assert file_stats.bytes_count == len(content)
+        assert file_stats.lines == 4
+        assert file_stats.line_length_max == 8
+        assert file_stats.digest == digest
+    assert measure_file(io.BytesIO(b"")).lines == 0
+
+
+def test_measure_problem(tmp_path):
+    """Test data is measured per group and measurements are cached."""
+    problem_root_dir = os.path.join(tmp_path, "problem")
+    files = {
+        "data/sample/1.in": "1\n",
+        "data/sample/1.ans": "2\n",
+        "data/secret/group/1.in": "1 2 3\n4\n",
+        "data/secret/group/1.ans": "10\n",
+    }
+    for relative_path, content in files.items():
+        path = os.path.join(problem_root_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as data_file:
+            data_file.write(content)
+    test_cases = [
+        ProblemTestCase(
+            "1", True, os.path.join(problem_root_dir, "data/sample"), [], None
+        ),
+        ProblemTestCase(
+            "1", False, os.path.join(problem_root_dir, "data/secret/group"), [], None
+        ),
+    ]
+    cache_dir = os.path.join(tmp_path, "cache")
+    os.mkdir(cache_dir)
+    collector = DataStatsCollector(cache_dir, jobs=2)
+    data_stats = collector.measure_problem(
+        WorktreeReader(), problem_root_dir, test_cases
+    )
+    collector.close()
+    collector.save_cache()
+    assert [group.group for group in data_stats.groups] == ["sample", "secret"]
+    secret_stats = data_stats.get_group("secret")
+    assert secret_stats.test_cases == 1
+    assert secret_stats.input_bytes == 8
+    assert secret_stats.lines == 3
+    assert secret_stats.line_length_max == 5
+    assert data_stats.total_bytes == 15
+
+    collector = DataStatsCollector(cache_dir)
+    with mock.patch(
+        "crifx.data_measurement.measure_file", side_effect=AssertionError("measured")
+    ):
+        assert (
+            collector.measure_problem(WorktreeReader(), problem_root_dir, test_cases)
+            == data_stats
+        )
+
+    problem = Problem("problem", test_cases, [], DEFAULT_REVIEW_STATUS, data_stats)
+    assert data_budget_warnings(problem, DataConfig(max_total_bytes=15)) == []
+    assert len(data_budget_warnings(problem, DataConfig(max_total_bytes=14))) == 1
+    assert len(data_budget_warnings(problem, DataConfig(max_file_bytes=7))) == 1
+
+
+def test_duplicate_inputs(tmp_path):
+    """Test cases with identical inputs are grouped, noting conflicting answers."""
+    problem_root_dir = os.path.join(tmp_path, "problem")
+    files = {
+        "data/sample/1.in": "1 2\n",
+        "data/sample/1.ans": "3\n",
+        "data/secret/1.in": "1 2\n",
+        "data/secret/1.ans": "4\n",
+        "data/secret/2.in": "5 5\n",
+        "data/secret/2.ans": "10\n",
+        "data/secret/3.in": "5 5\n",
+        "data/secret/3.ans": "10\n",
+        "data/secret/4.in": "7 7\n",
+        "data/secret/4.ans": "14\n",
+    }
+    for relative_path, content in files.items():
+        path = os.path.join(problem_root_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as data_file:
+            data_file.write(content)
+    test_cases = [
+        ProblemTestCase(
+            name,
+            group == "sample",
+            os.path.join(problem_root_dir, "data", group),
+            [],
+            None,
+        )
+        for group, name in [
+            ("sample", "1"),
+            ("secret", "1"),
+            ("secret", "2"),
+            ("secret", "3"),
+            ("secret", "4"),
+        ]
+    ]
+    data_stats = DataStatsCollector().measure_problem(
+        WorktreeReader(), problem_root_dir, test_cases
+    )
+    assert [
+        (duplicate_inputs.test_cases, duplicate_inputs.conflicting_answers)
+        for duplicate_inputs in data_stats.duplicate_inputs
+    ] == [
+        (("sample/1", "secret/1"), True),
+        (("secret/2", "secret/3"), False),
+    ]
+    problem = Problem("problem", test_cases, [], DEFAULT_REVIEW_STATUS, data_stats)
+    assert data_duplicate_warnings(problem) == [
+        "problem has test cases sample/1, secret/1 with identical inputs but "
+        "different answers.",
+        "problem has test cases secret/2, secret/3 with identical inputs.",
+    ]
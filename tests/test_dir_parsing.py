@@ -10,6 +10,7 @@ from crifx.dir_layout_parsing import (
     is_contest_problems_root,
     is_problem_root_dir,
 )
+from crifx.tree_reader import WorktreeReader
 
 
 def test_is_problem_root_dir(tmp_path):
@@ -82,3 +83,27 @@ def test_find_contest_problem_root(tmp_path, make_problem_skeleton_dir):
         "os.getcwd", return_value=os.path.join(problem_path, "submissions/data/secret")
     ):
         assert find_contest_problems_root() == str(tmp_path)
+
+
+def test_worktree_reader_scans_once(tmp_path):
+    """Each directory is scanned once to answer questions about its entries."""
+    data_dir = os.path.join(tmp_path, "data")
+    os.mkdir(data_dir)
+    with open(os.path.join(data_dir, "1.in"), "w") as in_file:
+        in_file.write("1\n")
+    reader = WorktreeReader()
+    with mock.patch("os.scandir", wraps=os.scandir) as scandir_mock:
+        assert reader.is_dir(data_dir)
+        assert [entry.name for entry in reader.list_dir(data_dir)] == ["1.in"]
+        assert reader.is_file(os.path.join(data_dir, "1.in"))
+        assert not reader.exists(os.path.join(data_dir, "1.desc"))
+        assert reader.size(os.path.join(data_dir, "1.in")) == 2
+        # The parent directory of the probed directory is not scanned.
+        assert scandir_mock.call_count == 1
+    assert reader.is_dir(os.path.abspath(os.sep))
+
+    # New files are only seen once the directory scan is invalidated.
+    open(os.path.join(data_dir, "1.desc"), "a").close()
+    assert not reader.is_file(os.path.join(data_dir, "1.desc"))
+    reader.invalidate(data_dir)
+    assert reader.is_file(os.path.join(data_dir, "1.desc"))
@@ -1,8 +1,14 @@
 """Tests for the GitManager class."""
 
+import multiprocessing
 import os
+import unittest.mock as mock
+from datetime import date
 
-from crifx.git_manager import GitManager
+import pygit2
+import pytest
+
+from crifx.git_manager import AttributionMethod, GitManager, GitUser
 
 
 def test_guess_existing_file_author():
@@ -46,3 +52,204 @@ def test_guess_untracked_file_author(
     assert git_user is not None
     assert git_user.name == "Test User"
     assert git_user.email == "tester@example.com"
+
+
+def test_blame_cache(tmp_path, empty_repo, commit_files):
+    """Blame results are cached by file content and invalidated by rewrites."""
+    cache_dir = os.path.join(tmp_path, "cache")
+    os.mkdir(cache_dir)
+    commit_files(empty_repo, {"sol.py": "print(1)\nprint(2)\n"}, "Alice")
+    git_manager = GitManager(empty_repo.workdir, cache_dir)
+    sol_path = os.path.join(empty_repo.workdir, "sol.py")
+    assert git_manager.guess_file_author(sol_path).name == "Alice"
+    git_manager.save_caches()
+
+    # Unrelated commits do not invalidate the cached result.
+    commit_files(empty_repo, {"other.py": "print(3)\n"}, "Bob")
+    git_manager = GitManager(empty_repo.workdir, cache_dir)
+    with mock.patch.object(
+        git_manager.repo, "blame", side_effect=AssertionError("blame was run")
+    ):
+        assert git_manager.guess_file_author(sol_path).name == "Alice"
+
+    # Changing the file and reverting it invalidates the cached result, since
+    # the revert now owns the lines.
+    commit_files(empty_repo, {"sol.py": "print(0)\n"}, "Bob")
+    commit_files(empty_repo, {"sol.py": "print(1)\nprint(2)\n"}, "Carol")
+    git_manager = GitManager(empty_repo.workdir, cache_dir)
+    assert git_manager.guess_file_author(sol_path).name == "Carol"
+    git_manager.save_caches()
+
+    # Rewriting history invalidates the cached result.
+    empty_repo.set_head("refs/heads/rewritten")
+    commit_files(empty_repo, {"sol.py": "print(1)\nprint(2)\n"}, "Dave")
+    git_manager = GitManager(empty_repo.workdir, cache_dir)
+    assert git_manager.guess_file_author(sol_path).name == "Dave"
+
+
+def test_guess_file_authors_in_parallel(empty_repo, commit_files):
+    """Attributing files in worker processes matches serial attribution."""
+    commit_files(empty_repo, {"a.py": "1\n2\n", "b.py": "1\n"}, "Alice")
+    commit_files(empty_repo, {"b.py": "1\n2\n3\n", "c.py": "1\n"}, "Bob")
+    paths = [
+        os.path.join(empty_repo.workdir, filename)
+        for filename in ("a.py", "b.py", "c.py")
+    ]
+    serial_authors = GitManager(empty_repo.workdir).guess_file_authors(paths)
+    git_manager = GitManager(empty_repo.workdir, jobs=2)
+    try:
+        parallel_authors = git_manager.guess_file_authors(paths)
+    finally:
+        git_manager.close()
+    assert parallel_authors == serial_authors
+
+    # Closing a derived manager shuts down the pool that it shares.
+    git_manager = GitManager(empty_repo.workdir, jobs=2)
+    derived_git_manager = git_manager.at_commit(empty_repo.head.target)
+    assert derived_git_manager.guess_file_authors(paths) == serial_authors
+    derived_git_manager.close()
+    assert not multiprocessing.active_children()
+    assert [parallel_authors[path].name for path in paths] == ["Alice", "Bob", "Bob"]
+
+
+def test_guess_file_authors_by_history(empty_repo, commit_files):
+    """Files are attributed to the committer who added the most lines."""
+    commit_files(empty_repo, {"sub/a.py": "1\n2\n3\n", "sub/b.py": "1\n"}, "Alice")
+    commit_files(empty_repo, {"sub/a.py": "1\n2\n4\n", "sub/b.py": "1\n2\n3\n"}, "Bob")
+    commit_files(empty_repo, {"other/c.py": "1\n2\n3\n4\n"}, "Carol")
+    git_manager = GitManager(
+        empty_repo.workdir, attribution_method=AttributionMethod.HISTORY
+    )
+    sub_path = os.path.join(empty_repo.workdir, "sub")
+    git_manager.prepare_attribution([sub_path])
+    authors = git_manager.guess_file_authors(
+        [os.path.join(sub_path, "a.py"), os.path.join(sub_path, "b.py")]
+    )
+    assert authors[os.path.join(sub_path, "a.py")].name == "Alice"
+    assert authors[os.path.join(sub_path, "b.py")].name == "Bob"
+
+
+def test_history_index_at_later_commit(empty_repo, commit_files):
+    """A manager at a later commit only walks the commits since the index."""
+    alice_commit_id = commit_files(empty_repo, {"sub/a.py": "1\n"}, "Alice")
+    commit_files(empty_repo, {"sub/a.py": "1\n2\n3\n"}, "Bob")
+    carol_commit_id = commit_files(empty_repo, {"sub/b.py": "1\n"}, "Carol")
+    sub_path = os.path.join(empty_repo.workdir, "sub")
+    paths = [os.path.join(sub_path, "a.py"), os.path.join(sub_path, "b.py")]
+    git_manager = GitManager(
+        empty_repo.workdir, attribution_method=AttributionMethod.HISTORY
+    )
+    old_git_manager = git_manager.at_commit(alice_commit_id)
+    old_git_manager.prepare_attribution([sub_path])
+    assert old_git_manager.guess_file_authors(paths[:1])[paths[0]].name == "Alice"
+
+    walked_commits = []
+    original_count_lines_added = GitManager._count_lines_added
+
+    def count_lines_added(self, commits, dir_paths):
+        commits = list(commits)
+        walked_commits.extend(commits)
+        original_count_lines_added(self, commits, dir_paths)
+
+    with mock.patch.object(GitManager, "_count_lines_added", count_lines_added):
+        new_git_manager = old_git_manager.at_commit(carol_commit_id)
+        new_git_manager.prepare_attribution([sub_path])
+        authors = new_git_manager.guess_file_authors(paths)
+    assert len(walked_commits) == 2
+    assert [authors[path].name for path in paths] == ["Bob", "Carol"]
+    # The earlier manager keeps its own index.
+    assert old_git_manager.guess_file_authors(paths[:1])[paths[0]].name == "Alice"
+
+
+def test_bounded_blame(empty_repo, commit_files):
+    """Lines older than the blame horizon are attributed to the boundary commit."""
+    commit_files(empty_repo, {"sol.py": "1\n2\n3\n"}, "Alice")
+    bob_commit_id = commit_files(empty_repo, {"sol.py": "1\n2\n3\n4\n"}, "Bob")
+    commit_files(empty_repo, {"sol.py": "1\n2\n3\n4\n5\n"}, "Carol")
+    sol_path = os.path.join(empty_repo.workdir, "sol.py")
+    assert GitManager(empty_repo.workdir).guess_file_author(sol_path).name == "Alice"
+
+    git_manager = GitManager(empty_repo.workdir, blame_oldest_commit=str(bob_commit_id))
+    assert git_manager.guess_file_author(sol_path).name == "Bob"
+
+    git_manager = GitManager(empty_repo.workdir, blame_since=date(1970, 1, 2))
+    assert git_manager.guess_file_author(sol_path).name == "Alice"
+    git_manager = GitManager(empty_repo.workdir, blame_since=date(9999, 1, 1))
+    assert git_manager.guess_file_author(sol_path).name == "Carol"
+
+    with pytest.raises(ValueError, match="revision 'missing'"):
+        GitManager(empty_repo.workdir, blame_oldest_commit="missing")
+
+
+def test_committers_cache(tmp_path, empty_repo, commit_files):
+    """Only commits that are new since the cached commit are walked."""
+    cache_dir = os.path.join(tmp_path, "cache")
+    os.mkdir(cache_dir)
+    commit_files(empty_repo, {"a.py": "1\n"}, "Alice")
+    git_manager = GitManager(empty_repo.workdir, cache_dir)
+    assert [user.name for user in git_manager.get_committers_and_authors()] == ["Alice"]
+    git_manager.save_caches()
+
+    commit_files(empty_repo, {"b.py": "1\n"}, "Bob")
+    git_manager = GitManager(empty_repo.workdir, cache_dir)
+    with mock.patch.object(
+        GitUser, "from_signature", wraps=GitUser.from_signature
+    ) as from_signature_mock:
+        users = git_manager.get_committers_and_authors()
+    assert [user.name for user in users] == ["Alice", "Bob"]
+    # Only the author and committer of the new commit are read.
+    assert from_signature_mock.call_count == 2
+    git_manager.save_caches()
+
+    # Rewriting history causes a full walk.
+    empty_repo.set_head("refs/heads/rewritten")
+    commit_files(empty_repo, {"c.py": "1\n"}, "Carol")
+    git_manager = GitManager(empty_repo.workdir, cache_dir)
+    assert [user.name for user in git_manager.get_committers_and_authors()] == ["Carol"]
+
+
+def test_path_restricted_committers(empty_repo, commit_files):
+    """Only users with commits that change the directory are found."""
+    commit_files(empty_repo, {"contest/a/sol.py": "1\n"}, "Alice")
+    commit_files(empty_repo, {"tools/build.sh": "make\n"}, "Bob")
+    commit_files(empty_repo, {"contest/b/sol.py": "1\n"}, "Carol")
+    git_manager = GitManager(empty_repo.workdir)
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+    committers = git_manager.get_committers_and_authors(contest_path)
+    assert [user.name for user in committers] == ["Alice", "Carol"]
+    committers = git_manager.get_committers_and_authors()
+    assert [user.name for user in committers] == ["Alice", "Bob", "Carol"]
+
+
+def test_status_snapshot(empty_repo, commit_files, global_git_config_path):
+    """The working tree status and git config are each read once per batch."""
+    with open(global_git_config_path, "w") as global_git_config:
+        global_git_config.write("[user]\nname = Test User\nemail = t@example.com\n")
+    commit_files(empty_repo, {"a.py": "1\n"}, "Alice")
+    for filename in ("b.py", "c.py"):
+        with open(os.path.join(empty_repo.workdir, filename), "w") as new_file:
+            new_file.write("1\n")
+    git_manager = GitManager(empty_repo.workdir)
+    paths = [
+        os.path.join(empty_repo.workdir, filename)
+        for filename in ("a.py", "b.py", "c.py")
+    ]
+    with (
+        mock.patch.object(
+            git_manager.repo, "status", wraps=git_manager.repo.status
+        ) as status_mock,
+        mock.patch.object(
+            pygit2.Config,
+            "get_global_config",
+            autospec=True,
+            side_effect=pygit2.Config.get_global_config,
+        ) as config_mock,
+    ):
+        authors = git_manager.guess_file_authors(paths)
+    assert [authors[path].name for path in paths] == [
+        "Alice",
+        "Test User",
+        "Test User",
+    ]
+    assert status_mock.call_count == 1
+    assert config_mock.call_count == 1
@@ -0,0 +1,130 @@
+"""Tests for incremental compilation of the report."""
+
+import os
+import sys
+
+import pytest
+from pylatex.errors import CompilerError
+
+from crifx.config_parser import LatexConfig
+from crifx.latex_build import LatexBuilder
+
+# A stand-in for pdflatex. The aux file lists the sections of the tex file,
+# and each \input file is recorded as an input. The pdf is only written
+# outside of draft mode, and a tex file containing "\fail" fails.
+FAKE_PDFLATEX = """\
+import os
+import sys
+
+args = sys.argv[1:]
+tex_path = args[-1]
+output_dir = next(
+    arg.split("=", 1)[1] for arg in args if arg.startswith("-output-directory=")
+)
+jobname = os.path.splitext(os.path.basename(tex_path))[0]
+with open(tex_path) as tex_file:
+    lines = tex_file.read().splitlines()
+with open(os.path.join(output_dir, "runs.log"), "a") as log_file:
+    log_file.write(("draft" if "-draftmode" in args else "final") + "\\n")
+if "\\\\fail" in lines:
+    sys.exit(1)
+with open(os.path.join(output_dir, jobname + ".aux"), "w") as aux_file:
+    aux_file.writelines(
+        line + "\\n" for line in lines if line.startswith("\\\\section")
+    )
+with open(os.path.join(output_dir, jobname + ".fls"), "w") as fls_file:
+    fls_file.write(f"PWD {os.getcwd()}\\nINPUT {tex_path}\\n")
+    for line in lines:
+        if line.startswith("\\\\input "):
+            fls_file.write(f"INPUT {line.split(' ', 1)[1]}\\n")
+if "-draftmode" not in args:
+    with open(os.path.join(output_dir, jobname + ".pdf"), "w") as pdf_file:
+        pdf_file.write("\\n".join(lines))
+"""
+
+
+@pytest.fixture
+def fake_pdflatex(tmp_path):
+    """Write an executable stand-in for pdflatex and get its path."""
+    bin_dir = os.path.join(tmp_path, "bin")
+    os.mkdir(bin_dir)
+    compiler_path = os.path.join(bin_dir, "pdflatex")
+    with open(compiler_path, "w") as compiler_file:
+        compiler_file.write(f"#!{sys.executable}\n{FAKE_PDFLATEX}")
+    os.chmod(compiler_path, 0o755)
+    yield compiler_path
+
+
+def test_incremental_build(fake_pdflatex, tmp_path):
+    """The compiler only runs as often as the auxiliary files require."""
+    build_dir = os.path.join(tmp_path, "build")
+    os.mkdir(build_dir)
+    tex_path = os.path.join(build_dir, "report.tex")
+    runs_path = os.path.join(build_dir, "runs.log")
+    input_path = os.path.join(tmp_path, "included.tex")
+    with open(input_path, "w") as input_file:
+        input_file.write("included")
+
+    def build(tex: str) -> list[str]:
+        with open(tex_path, "w") as tex_file:
+            tex_file.write(tex)
+        if os.path.exists(runs_path):
+            os.remove(runs_path)
+        builder = LatexBuilder(build_dir, LatexConfig(compiler=fake_pdflatex))
+        pdf_path = builder.build("report")
+        assert pdf_path == os.path.join(build_dir, "report.pdf")
+        if not os.path.exists(runs_path):
+            return []
+        with open(runs_path) as runs_file:
+            runs = runs_file.read().split()
+        assert len(runs) == builder.runs
+        return runs
+
+    tex = f"\\section A\ntext\n\\input {input_path}\n"
+    # Without auxiliary files, draft runs until they settle, then a final run.
+    assert build(tex) == ["draft", "draft", "final"]
+    # Nothing changed, so the compiler is not run.
+    assert build(tex) == []
+    # The text changed but not the auxiliary files, so one run is enough.
+    assert build(tex.replace("text", "more text")) == ["final"]
+    # A new section changes the auxiliary files.
+    assert build(tex + "\\section B\n") == ["final", "draft", "final"]
+    # An input file changed.
+    with open(input_path, "w") as input_file:
+        input_file.write("included, and changed")
+    assert build(tex + "\\section B\n") == ["final"]
+    assert build(tex + "\\section B\n") == []
+
+    with pytest.raises(CompilerError):
+        build(tex + "\\fail\n")
+    assert not os.path.exists(os.path.join(build_dir, "report.aux"))
+    assert build(tex) == ["draft", "draft", "final"]
+
+
+def test_build_without_draft_passes(fake_pdflatex, tmp_path):
+    """Every run writes the pdf if draft passes are disabled."""
+    with open(os.path.join(tmp_path, "report.tex"), "w") as tex_file:
+        tex_file.write("\\section A\n")
+    builder = LatexBuilder(
+        str(tmp_path), LatexConfig(compiler=fake_pdflatex, draft_passes=False)
+    )
+    builder.build("report")
+    with open(os.path.join(tmp_path, "runs.log")) as runs_file:
+        assert runs_file.read().split() == ["final", "final"]
+
+
+def test_latex_config():
+    """Invalid LaTeX settings are rejected."""
+    assert LatexConfig.from_toml_dict({}) == LatexConfig()
+    config = LatexConfig.from_toml_dict(
+        {"compiler": "lualatex", "options": ["-shell-escape"], "passes_max": 2}
+    )
+    assert config.options == ("-shell-escape",)
+    for toml_dict in (
+        {"compiler": "word"},
+        {"options": "-shell-escape"},
+        {"passes_max": 0},
+        {"incremental": "yes"},
+    ):
+        with pytest.raises(ValueError):
+            LatexConfig.from_toml_dict(toml_dict)
@@ -1,6 +1,6 @@
 """Tests for methods on the Problem object."""
 
-from crifx.contest_objects import Judgement, Problem, ProgrammingLanguage
+from crifx.contest_objects import Judgement, LanguageGroup, Problem, ProgrammingLanguage
 from crifx.report_objects import DEFAULT_REVIEW_STATUS
 
 
@@ -78,6 +78,11 @@ def test_independent_author_count(make_authored_submission):
     assert problem.independent_ac_count() == 1
     problem = Problem("problem", [], [alice_c_wa, bob_java_tle], DEFAULT_REVIEW_STATUS)
     assert problem.independent_ac_count() == 0
+    # Changing a returned list does not change the problem.
+    problem.ac_submissions.append(finn_java_ac_1)
+    problem.wa_submissions.clear()
+    assert problem.independent_ac_count() == 0
+    assert problem.wa_submissions == [alice_c_wa]
     problem = Problem(
         "problem",
         [],
@@ -85,3 +90,34 @@ def test_independent_author_count(make_authored_submission):
         DEFAULT_REVIEW_STATUS,
     )
     assert problem.independent_ac_count() == 1
+
+
+def test_readiness(make_authored_submission):
+    """Readiness metrics are computed once from the AC submissions."""
+    submissions = [
+        make_authored_submission("Finn", None, language=ProgrammingLanguage.C),
+        make_authored_submission("Finn", "finn", language=ProgrammingLanguage.JAVA),
+        make_authored_submission("F. L.", "finn", language=ProgrammingLanguage.JAVA),
+        make_authored_submission("Alice", None, language=ProgrammingLanguage.PYTHON),
+        make_authored_submission(
+            "Bob", "bob", Judgement.WRONG_ANSWER, ProgrammingLanguage.RUST
+        ),
+    ]
+    for lines_of_code, submission in zip([40, 10, 30, 20, 5], submissions):
+        submission.lines_of_code = lines_of_code
+    problem = Problem("problem", [], submissions, DEFAULT_REVIEW_STATUS)
+    readiness = problem.readiness
+    assert readiness is problem.readiness
+    assert readiness.independent_ac == 2
+    assert readiness.ac_lines_of_code_min == 10
+    assert readiness.ac_lines_of_code_median == 25
+    assert readiness.ac_author_names == ("Alice", "F. L.", "Finn")
+    assert readiness.ac_languages == {
+        ProgrammingLanguage.C: 1,
+        ProgrammingLanguage.JAVA: 2,
+        ProgrammingLanguage.PYTHON: 1,
+    }
+    jvm = LanguageGroup(ProgrammingLanguage.JAVA, ProgrammingLanguage.KOTLIN)
+    rust = LanguageGroup(ProgrammingLanguage.RUST)
+    assert readiness.language_groups_ac_covered([jvm, rust]) == [jvm]
+    assert readiness.language_group_ac_count(jvm) == 2
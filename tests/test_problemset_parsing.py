@@ -1,11 +1,21 @@
 """Tests for parsing problemsets."""
 
+import io
 import os
+import shutil
+import unittest.mock as mock
+from concurrent.futures import ThreadPoolExecutor
 
-from crifx.config_parser import parse_config
+from crifx.config_parser import AliasGroup, parse_config
 from crifx.contest_objects import ProgrammingLanguage
 from crifx.git_manager import GitManager
-from crifx.problemset_parser import ProblemSetParser
+from crifx.problem_cache import ProblemCache, problem_to_cache_dict
+from crifx.problemset_parser import (
+    PARSE_AHEAD_PER_JOB,
+    ProblemSetParser,
+    scan_submission,
+)
+from crifx.tree_reader import GitTreeReader
 
 
 def test_scenario_1(scenarios_path):
@@ -42,3 +52,253 @@ def test_scenario_1(scenarios_path):
         if sub.language is ProgrammingLanguage.JAVA
     )
     assert problem_a_java_ac.author.primary_name == "Jane Doe"
+
+
+def test_parse_revision(empty_repo, commit_files):
+    """A problemset can be parsed from a commit without checking it out."""
+    first_commit = commit_files(
+        empty_repo,
+        {
+            "contest/hello/problem.yaml": "name: hello\n",
+            "contest/hello/data/secret/1.in": "1\n",
+            "contest/hello/data/secret/1.ans": "1\n",
+            "contest/hello/data/secret/1.desc": "First case\n",
+            "contest/hello/submissions/accepted/sol.py": "print(1)\n",
+        },
+        "Alice",
+    )
+    commit_files(
+        empty_repo,
+        {
+            "contest/hello/data/secret/1.desc": "Changed\n",
+            "contest/hello/submissions/accepted/other.py": "print(1)\n",
+        },
+        "Bob",
+    )
+    # Remove the working tree files to show that they are not read.
+    shutil.rmtree(os.path.join(empty_repo.workdir, "contest", "hello"))
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+    reader = GitTreeReader.from_rev(contest_path, str(first_commit))
+    git_manager = GitManager(contest_path, rev=str(first_commit))
+    parser = ProblemSetParser(contest_path, git_manager, [], True, reader)
+    problemset = parser.parse_problemset()
+    assert [problem.name for problem in problemset.problems] == ["hello"]
+    problem = problemset.problems[0]
+    assert problem.test_cases[0].description_lines == ["First case\n"]
+    assert [submission.filename for submission in problem.submissions] == ["sol.py"]
+    assert problem.submissions[0].author.primary_name == "Alice"
+    assert problem.submissions[0].lines_of_code == 1
+
+
+def test_judges_by_alias(empty_repo, commit_files):
+    """Judges are found case-insensitively by alias, the first judge winning."""
+    commit_files(empty_repo, {"contest/hello/problem.yaml": "name: hello\n"}, "Alice")
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+    alias_groups = [
+        AliasGroup("Alice", "Alice", ["ali", "shared"]),
+        AliasGroup("Bob Smith", None, ["bob", "shared"]),
+    ]
+    parser = ProblemSetParser(
+        contest_path, GitManager(contest_path), alias_groups, False
+    )
+    assert parser.judges_by_alias.get("ALI").primary_name == "Alice"
+    assert parser.judges_by_alias.get("bob smith").primary_name == "Bob Smith"
+    assert parser.judges_by_alias.get("shared").primary_name == "Alice"
+    assert [
+        (alias, judge.primary_name, other_judge.primary_name)
+        for alias, judge, other_judge in parser.judges_by_alias.collisions
+    ] == [("shared", "Alice", "Bob Smith")]
+    assert parser.guess_author_by_filename("sol_Bob.py").primary_name == "Bob Smith"
+    assert parser.guess_author_by_filename("sol_carol.py") is None
+
+
+def test_parse_problems_concurrently(empty_repo, commit_files):
+    """Problems parse concurrently in order, and failures do not stop parsing."""
+    files = {}
+    for name in ("alpha", "beta", "gamma", "delta"):
+        files[f"contest/{name}/problem.yaml"] = f"name: {name}\n"
+        files[f"contest/{name}/submissions/accepted/sol.py"] = "print(1)\n"
+    commit_files(empty_repo, files, "Alice")
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+    git_manager = GitManager(contest_path, jobs=2)
+    parser = ProblemSetParser(contest_path, git_manager, [], False, jobs=3)
+    parse_problem = ProblemSetParser.parse_problem
+
+    def parse_or_fail(self, problem_root_dir):
+        if problem_root_dir.endswith("gamma"):
+            raise ValueError("broken problem")
+        return parse_problem(self, problem_root_dir)
+
+    try:
+        with mock.patch.object(
+            ProblemSetParser, "parse_problem", autospec=True, side_effect=parse_or_fail
+        ):
+            problemset = parser.parse_problemset()
+    finally:
+        git_manager.close()
+    assert [problem.name for problem in problemset.problems] == [
+        "alpha",
+        "beta",
+        "delta",
+    ]
+    assert [
+        submission.author.primary_name
+        for problem in problemset.problems
+        for submission in problem.submissions
+    ] == ["Alice", "Alice", "Alice"]
+    assert [failure.name for failure in problemset.parse_failures] == ["gamma"]
+    assert problemset.parse_failures[0].message == "ValueError: broken problem"
+
+
+def test_parse_ahead_is_bounded(empty_repo, commit_files):
+    """Only a few problems are parsed ahead of the problem being yielded."""
+    commit_files(empty_repo, {"alpha/submissions/accepted/sol.py": "print(1)\n"})
+    git_manager = GitManager(empty_repo.workdir)
+    parser = ProblemSetParser(empty_repo.workdir, git_manager, [], False, jobs=2)
+    problem_root_dirs = [f"problem{i}" for i in range(10)]
+    with (
+        mock.patch.object(
+            ProblemSetParser, "_try_parse_problem", autospec=True
+        ) as try_parse_problem_mock,
+        mock.patch.object(
+            ThreadPoolExecutor,
+            "submit",
+            autospec=True,
+            side_effect=ThreadPoolExecutor.submit,
+        ) as submit_mock,
+    ):
+        try_parse_problem_mock.side_effect = lambda self, path: path
+        problems = parser.iter_problems(problem_root_dirs)
+        assert next(problems) == "problem0"
+        assert submit_mock.call_count == 2 * PARSE_AHEAD_PER_JOB + 1
+        assert list(problems) == problem_root_dirs[1:]
+    assert submit_mock.call_count == len(problem_root_dirs)
+
+
+def test_scan_submission():
+    """Submissions are scanned as bytes, across chunk boundaries."""
+    content = "x = 1\n# crifx!(author=Jane Doe)\nprint('é')".encode("latin-1")
+    for chunk_bytes in (1, 7, 1 << 16):
+        with mock.patch(
+            "crifx.problemset_parser.SUBMISSION_READ_CHUNK_BYTES", chunk_bytes
+        ):
+            submission_scan = scan_submission(io.BytesIO(content))
+        assert submission_scan.lines_of_code == 3
+        assert submission_scan.file_bytes == len(content)
+        assert submission_scan.author_name_override == "Jane Doe"
+        assert submission_scan.author_line_number == 2
+    assert scan_submission(io.BytesIO(b"")).lines_of_code == 0
+    assert scan_submission(io.BytesIO(b"a\r\nb\r\n")).lines_of_code == 2
+    assert scan_submission(io.BytesIO(b"a\nb")).author_name_override is None
+    # Only the end of a long line is carried between chunks.
+    content = b"x" * 10000 + b"crifx!(author=Jane Doe)" + b"y" * 10000
+    with mock.patch("crifx.problemset_parser.SUBMISSION_READ_CHUNK_BYTES", 7):
+        submission_scan = scan_submission(io.BytesIO(content))
+    assert submission_scan.author_name_override == "Jane Doe"
+    assert submission_scan.author_line_number == 1
+
+
+def test_iter_problems_lazily(empty_repo, commit_files):
+    """Problems are yielded one at a time and file contents are read on use."""
+    commit_files(
+        empty_repo,
+        {
+            "contest/alpha/problem.yaml": "name: alpha\n",
+            "contest/alpha/data/secret/1.in": "1\n",
+            "contest/alpha/data/secret/1.ans": "1\n",
+            "contest/alpha/data/secret/1.desc": "First\nSecond\n",
+            "contest/alpha/submissions/accepted/sol.py": "print(1)\n",
+            "contest/beta/problem.yaml": "name: beta\n",
+        },
+        "Alice",
+    )
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+    parser = ProblemSetParser(contest_path, GitManager(contest_path), [], False)
+    problems = parser.iter_problems()
+    with mock.patch.object(
+        ProblemSetParser, "_read_lines", autospec=True, return_value=["First\n"]
+    ) as read_lines_mock:
+        problem = next(problems)
+        assert problem.name == "alpha"
+        description_lines = problem.test_cases[0].description_lines
+        assert description_lines
+        assert read_lines_mock.call_count == 0
+        assert description_lines == ["First\n"]
+        assert read_lines_mock.call_count == 1
+    assert problem.submissions[0].read_source() == b"print(1)\n"
+    assert [problem.name for problem in problems] == ["beta"]
+
+
+def test_problem_cache(tmp_path, empty_repo, commit_files):
+    """Problems are reused from the cache while their directories are clean."""
+    commit_files(
+        empty_repo,
+        {
+            "contest/hello/problem.yaml": "name: hello\n",
+            "contest/hello/data/secret/1.in": "1\n",
+            "contest/hello/data/secret/1.ans": "1\n",
+            "contest/hello/data/secret/1.desc": "First case\n",
+            "contest/hello/submissions/accepted/sol.py": "print(1)\n",
+            "contest/hello/crifx-problem-status.toml": "github_issue_id = 7\n",
+        },
+        "Alice",
+    )
+    cache_dir = os.path.join(tmp_path, "cache")
+    os.mkdir(cache_dir)
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+
+    def parse(git_manager):
+        parser = ProblemSetParser(
+            contest_path, git_manager, [], True, problem_cache=ProblemCache(cache_dir)
+        )
+        return parser.parse_problemset().problems[0]
+
+    problem = parse(GitManager(contest_path))
+    with mock.patch.object(
+        ProblemSetParser, "_parse_problem", side_effect=AssertionError("parsed")
+    ):
+        cached_problem = parse(GitManager(contest_path))
+    assert problem_to_cache_dict(cached_problem) == problem_to_cache_dict(problem)
+    assert cached_problem.test_cases[0].description_lines == ["First case\n"]
+    assert cached_problem.submissions[0].author.primary_name == "Alice"
+    assert cached_problem.submissions[0].read_source() == b"print(1)\n"
+    assert cached_problem.review_status.github_issue_id == 7
+
+    # A problem with changes in the working tree is parsed again.
+    submission_path = os.path.join(
+        contest_path, "hello", "submissions", "accepted", "sol.py"
+    )
+    with open(submission_path, "w") as submission_file:
+        submission_file.write("print(1)\nprint(2)\n")
+    assert parse(GitManager(contest_path)).submissions[0].lines_of_code == 2
+
+    # Commits that do not change the problem keep the cached problem valid.
+    commit_files(
+        empty_repo,
+        {
+            "contest/hello/submissions/accepted/sol.py": "print(1)\n",
+            "contest/bob.txt": "1\n",
+        },
+        "Bob",
+    )
+    commit_files(empty_repo, {"contest/carol.txt": "1\n"}, "Carol")
+    assert parse(GitManager(contest_path)).submissions[0].author.primary_name == "Alice"
+    commit_files(empty_repo, {"contest/alice.txt": "1\n"}, "Alice")
+    with mock.patch.object(
+        ProblemSetParser, "_parse_problem", side_effect=AssertionError("parsed")
+    ):
+        assert parse(GitManager(contest_path)).submissions[0].author.primary_name == (
+            "Alice"
+        )
+
+    # A problem that was changed and then reverted is parsed again, since the
+    # revert now owns its lines.
+    commit_files(
+        empty_repo, {"contest/hello/submissions/accepted/sol.py": "1\n"}, "Bob"
+    )
+    commit_files(
+        empty_repo, {"contest/hello/submissions/accepted/sol.py": "print(1)\n"}, "Carol"
+    )
+    assert parse(GitManager(contest_path)).submissions[0].author.primary_name == (
+        "Carol"
+    )
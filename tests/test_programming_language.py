@@ -1,5 +1,8 @@
 """Tests for the ProgrammingLanguage enumeration object."""
 
+import pytest
+
+from crifx.config_parser import Config
 from crifx.contest_objects import ProgrammingLanguage
 
 
@@ -13,6 +16,10 @@ def test_guess_language():
         ("sol.java", ProgrammingLanguage.JAVA),
         ("sol.kt", ProgrammingLanguage.KOTLIN),
         ("sol.rs", ProgrammingLanguage.RUST),
+        ("sol.go", ProgrammingLanguage.GO),
+        ("sol.hs", ProgrammingLanguage.HASKELL),
+        ("sol.cs", ProgrammingLanguage.CSHARP),
+        ("sol.ml", ProgrammingLanguage.OCAML),
         ("validator.ctd", ProgrammingLanguage.CTD),
         ("validator.viva", ProgrammingLanguage.VIVA),
         ("sol.bf", None),
@@ -25,3 +32,25 @@ def test_guess_language():
     # All languages are tested.
     languages_tested = set(language for _, language in cases if language is not None)
     assert len(languages_tested) == len(ProgrammingLanguage)
+
+
+def test_custom_language():
+    """Languages defined in the configuration can be used in language groups."""
+    config = Config(
+        {
+            "language": [{"name": "Zig", "extensions": [".zig"]}],
+            "language_group": [{"name": "Systems", "languages": ["zig", "rust"]}],
+        }
+    )
+    registry = config.language_registry
+    zig = registry.from_filename("sol.zig")
+    assert zig is not None and zig.value == "Zig"
+    assert registry.from_filename("sol.rs") is ProgrammingLanguage.RUST
+    assert registry.from_filename("sol.bf") is None
+    language_group = config.language_group_configs[0].language_group
+    assert language_group.has_language(zig)
+    assert language_group.mask == zig.bit | ProgrammingLanguage.RUST.bit
+    with pytest.raises(ValueError):
+        Config({"language": [{"name": "Go", "extensions": ["go2"]}]})
+    with pytest.raises(ValueError):
+        Config({"language": [{"name": "Zig", "extensions": []}]})
@@ -0,0 +1,97 @@
+"""Tests for detecting AC submissions that are copies."""
+
+import dataclasses
+
+from crifx.contest_objects import Problem, ProgrammingLanguage
+from crifx.report_objects import DEFAULT_REVIEW_STATUS
+from crifx.similarity import SimilarityDetector, normalize_tokens
+
+ORIGINAL_SOURCE = b"""
+n = int(input())
+values = [int(x) for x in input().split()]
+best = 0
+for value in values:
+    if value > best:
+        best = value
+print(best * n)
+"""
+EDITED_SOURCE = b"""
+# Read the input.
+count = int(input())
+numbers = [int(token) for token in input().split()]
+largest = 0
+for number in numbers:
+    if number > largest:
+        largest = number
+print(largest * count)  # Done.
+"""
+OTHER_SOURCE = b"""
+import sys
+data = sys.stdin.read().split()
+total = sum(map(int, data[1:]))
+while total % 2 == 0 and total > 0:
+    total //= 2
+print(total)
+"""
+
+
+def test_normalize_tokens():
+    """Comments, names and literals do not affect the normalized tokens."""
+    assert normalize_tokens(ORIGINAL_SOURCE, ProgrammingLanguage.PYTHON) == (
+        normalize_tokens(EDITED_SOURCE, ProgrammingLanguage.PYTHON)
+    )
+    c_tokens = normalize_tokens(
+        b'int x = 1; // "a" comment\n/* block */ puts("// not a comment");',
+        ProgrammingLanguage.C,
+    )
+    assert c_tokens == ["int", "I", "=", "N", ";", "I", "(", "S", ")", ";"]
+
+
+def test_find_suspected_copies(tmp_path, make_authored_submission):
+    """Lightly edited copies by different authors are detected and cached."""
+    sources = {
+        "alice": ORIGINAL_SOURCE,
+        "bob": EDITED_SOURCE,
+        "carol": OTHER_SOURCE,
+    }
+    submissions = [
+        dataclasses.replace(
+            make_authored_submission(name, name, language=ProgrammingLanguage.PYTHON),
+            filename=f"{name}.py",
+            source_loader=lambda source=source: source,
+        )
+        for name, source in sources.items()
+    ]
+    detector = SimilarityDetector(str(tmp_path))
+    suspected_copies = detector.find_suspected_copies(submissions)
+    assert [
+        (copy.submission.filename, copy.other.filename) for copy in suspected_copies
+    ] == [("alice.py", "bob.py")]
+    assert suspected_copies[0].similarity == 1
+    detector.save_cache()
+    assert len(SimilarityDetector(str(tmp_path)).cache.entries) == 3
+
+    problem = Problem(
+        "problem", [], submissions, DEFAULT_REVIEW_STATUS, None, suspected_copies
+    )
+    assert problem.independent_ac_count() == 3
+    assert problem.independent_ac_count(merge_copies=True) == 2
+
+
+def test_copies_by_authors_without_git_names(tmp_path, make_authored_submission):
+    """Authors without git names are only the same if their names match."""
+    submissions = [
+        dataclasses.replace(
+            make_authored_submission(name, None, language=ProgrammingLanguage.PYTHON),
+            filename=f"{name}.py",
+            source_loader=lambda source=source: source,
+        )
+        for name, source in (("dave", ORIGINAL_SOURCE), ("erin", EDITED_SOURCE))
+    ]
+    assert not submissions[0].author.is_same(submissions[1].author)
+    suspected_copies = SimilarityDetector(str(tmp_path)).find_suspected_copies(
+        submissions
+    )
+    assert [
+        (copy.submission.filename, copy.other.filename) for copy in suspected_copies
+    ] == [("dave.py", "erin.py")]
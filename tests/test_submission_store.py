@@ -0,0 +1,79 @@
+"""Tests for the columnar submission store."""
+
+import dataclasses
+
+import pytest
+
+from crifx.contest_objects import Judgement, Problem, ProblemSet, ProgrammingLanguage
+from crifx.report_objects import DEFAULT_REVIEW_STATUS
+from crifx.submission_store import SubmissionRow, SubmissionStore, numpy
+
+
+@pytest.mark.parametrize(
+    "use_numpy",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(numpy is None, reason="NumPy is not installed"),
+        ),
+    ],
+)
+def test_submission_store(use_numpy, make_authored_submission):
+    """Aggregates over the stored submissions match the submissions."""
+
+    def _submission(name, judgement, language, lines_of_code):
+        return dataclasses.replace(
+            make_authored_submission(name, None, judgement, language),
+            lines_of_code=lines_of_code,
+        )
+
+    problem_a = Problem(
+        "a",
+        [],
+        [
+            _submission("Alice", Judgement.ACCEPTED, ProgrammingLanguage.C, 10),
+            _submission("Alice", Judgement.ACCEPTED, ProgrammingLanguage.JAVA, 40),
+            _submission("Bob", Judgement.ACCEPTED, ProgrammingLanguage.C, 20),
+            _submission("Bob", Judgement.WRONG_ANSWER, ProgrammingLanguage.C, 5),
+        ],
+        DEFAULT_REVIEW_STATUS,
+    )
+    problem_b = Problem(
+        "b",
+        [],
+        [_submission("Carol", Judgement.ACCEPTED, ProgrammingLanguage.PYTHON, 7)],
+        DEFAULT_REVIEW_STATUS,
+    )
+    store = SubmissionStore(use_numpy)
+    first = store.add_problemset(ProblemSet([problem_a]), "2023")
+    second = store.add_problemset(ProblemSet([problem_a, problem_b]), "2024")
+    assert len(store) == 9
+    assert store.author_counts() == {"Alice": 4, "Bob": 4, "Carol": 1}
+    assert store.author_counts(Judgement.WRONG_ANSWER) == {"Bob": 2}
+    assert store.language_histogram(Judgement.ACCEPTED) == {
+        ProgrammingLanguage.C: 4,
+        ProgrammingLanguage.JAVA: 2,
+        ProgrammingLanguage.PYTHON: 1,
+    }
+    assert store.lines_of_code_percentiles([0, 50, 100]) == {
+        ("2023", "a"): [10, 20, 40],
+        ("2024", "a"): [10, 20, 40],
+        ("2024", "b"): [7, 7, 7],
+    }
+    assert first.submission_authors() == ["Alice", "Bob"]
+    assert second.submission_authors() == ["Alice", "Bob", "Carol"]
+    view = store.get_problem("2024", "a")
+    assert view.ac_author_count() == problem_a.independent_ac_count()
+    assert view.ac_languages() == problem_a.ac_languages()
+    assert view.judgement_counts()[Judgement.WRONG_ANSWER] == 1
+    with pytest.raises(ValueError):
+        store.add_problem(problem_b, "2024")
+
+    # Rows added out of order are selected by scanning every row.
+    store.add_rows(SubmissionRow.from_problem(problem_b, "2023"))
+    store.add_rows(SubmissionRow.from_problem(problem_a, "2023"))
+    assert first.author_counts() == {"Alice": 4, "Bob": 4}
+    assert first.author_counts(Judgement.WRONG_ANSWER) == {"Bob": 2}
+    assert store.get_problem("2023", "a").judgement_counts()[Judgement.ACCEPTED] == 6
+    assert view.judgement_counts()[Judgement.ACCEPTED] == 3
@@ -0,0 +1,85 @@
+"""Tests for computing readiness metrics over the git history."""
+
+import multiprocessing
+import os
+import unittest.mock as mock
+from concurrent.futures import ProcessPoolExecutor
+
+from crifx.config_parser import Config
+from crifx.git_manager import GitManager
+from crifx.problemset_parser import ProblemSetParser
+from crifx.timeline import compute_timeline
+
+
+def test_compute_timeline(empty_repo, commit_files):
+    """Metrics are computed per commit and only changed problems are parsed."""
+    commit_files(
+        empty_repo,
+        {
+            "a/submissions/accepted/sol_alice.py": "1\n",
+            "b/submissions/accepted/sol_alice.py": "1\n",
+        },
+        "Alice",
+    )
+    commit_files(empty_repo, {"a/submissions/accepted/sol_bob.py": "1\n"}, "Bob")
+    commit_files(empty_repo, {"a/submissions/wrong_answer/wa.py": "1\n"}, "Bob")
+    config = Config({})
+    git_manager = GitManager(empty_repo.workdir)
+    parser = ProblemSetParser(
+        empty_repo.workdir.rstrip(os.sep), git_manager, config.alias_groups, False
+    )
+    with mock.patch.object(
+        ProblemSetParser,
+        "parse_problem",
+        autospec=True,
+        side_effect=ProblemSetParser.parse_problem,
+    ) as parse_problem_mock:
+        points = compute_timeline(parser, config)
+    # Problem a is parsed at every commit, problem b only at the first commit.
+    assert parse_problem_mock.call_count == 4
+    assert len(points) == 3
+    assert [
+        [(problem.name, problem.independent_ac) for problem in point.problems]
+        for point in points
+    ] == [[("a", 1), ("b", 1)], [("a", 2), ("b", 1)], [("a", 2), ("b", 1)]]
+    assert [point.problems[0].submissions_wa for point in points] == [0, 0, 1]
+    requirements = config.review_requirements
+    assert points[0].outstanding(requirements) > points[2].outstanding(requirements)
+
+    points = compute_timeline(parser, config, every=2)
+    assert len(points) == 2
+
+
+def test_timeline_shares_blame_workers(empty_repo, commit_files):
+    """The managers of the sampled commits share the pool of blame workers."""
+    commit_files(
+        empty_repo,
+        {
+            "a/submissions/accepted/sol_1.py": "1\n",
+            "a/submissions/accepted/sol_2.py": "1\n",
+        },
+        "Alice",
+    )
+    commit_files(
+        empty_repo,
+        {
+            "a/submissions/accepted/sol_1.py": "1\n2\n",
+            "a/submissions/accepted/sol_2.py": "1\n2\n",
+        },
+        "Bob",
+    )
+    config = Config({})
+    git_manager = GitManager(empty_repo.workdir, jobs=2)
+    parser = ProblemSetParser(
+        empty_repo.workdir.rstrip(os.sep), git_manager, config.alias_groups, False
+    )
+    try:
+        with mock.patch(
+            "crifx.git_manager.ProcessPoolExecutor", wraps=ProcessPoolExecutor
+        ) as pool_mock:
+            points = compute_timeline(parser, config)
+    finally:
+        git_manager.close()
+    assert len(points) == 2
+    assert pool_mock.call_count == 1
+    assert not multiprocessing.active_children()
@@ -0,0 +1,92 @@
+"""Tests for watching a problemset for changes."""
+
+import os
+
+from crifx.contest_objects import ProblemSet
+from crifx.git_manager import GitManager
+from crifx.problem_cache import PROBLEM_CACHE_FILENAME, ProblemCache
+from crifx.problemset_parser import ProblemSetParser
+from crifx.watch import ProblemSetWatcher, problem_signature
+
+
+def test_problem_signature(tmp_path):
+    """The signature of a problem changes when a file is added or modified."""
+    problem_path = tmp_path / "hello"
+    (problem_path / "data").mkdir(parents=True)
+    (problem_path / "data" / "1.in").write_text("1\n")
+    signature = problem_signature(str(problem_path))
+    assert signature == problem_signature(str(problem_path))
+    (problem_path / "data" / "1.in").write_text("12\n")
+    modified_signature = problem_signature(str(problem_path))
+    assert modified_signature != signature
+    (problem_path / "data" / "1.ans").write_text("12\n")
+    assert problem_signature(str(problem_path)) != modified_signature
+
+
+def test_watch_reparses_changed_problems(
+    empty_repo, commit_files, global_git_config_path
+):
+    """Only the problems that changed since the last poll are parsed again."""
+    with open(global_git_config_path, "w") as global_git_config:
+        global_git_config.write("[user]\nname = Test User\nemail = t@example.com\n")
+    commit_files(
+        empty_repo,
+        {
+            "contest/alpha/problem.yaml": "name: alpha\n",
+            "contest/alpha/submissions/accepted/sol.py": "print(1)\n",
+            "contest/beta/problem.yaml": "name: beta\n",
+        },
+        "Alice",
+    )
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+    parser = ProblemSetParser(contest_path, GitManager(contest_path), [], False)
+    problemsets: list[ProblemSet] = []
+    watcher = ProblemSetWatcher(parser, problemsets.append, interval=0)
+    watcher.run(polls_max=2)
+    assert len(problemsets) == 1
+    assert [problem.name for problem in problemsets[0].problems] == ["alpha", "beta"]
+
+    parsed_dirs = []
+    iter_problems = parser.iter_problems
+
+    def _iter_problems(problem_root_dirs=None):
+        parsed_dirs.extend(problem_root_dirs)
+        return iter_problems(problem_root_dirs)
+
+    parser.iter_problems = _iter_problems
+    submission_path = os.path.join(
+        contest_path, "beta", "submissions", "accepted", "sol.py"
+    )
+    os.makedirs(os.path.dirname(submission_path))
+    with open(submission_path, "w") as submission_file:
+        submission_file.write("print(2)\n")
+    assert watcher.poll()
+    assert parsed_dirs == [os.path.join(contest_path, "beta")]
+    problemset = watcher.get_problemset()
+    beta = next(problem for problem in problemset.problems if problem.name == "beta")
+    assert len(beta.submissions) == 1
+    assert not watcher.poll()
+
+
+def test_watch_saves_caches(tmp_path, empty_repo, commit_files, global_git_config_path):
+    """The caches of the parser are saved after each poll."""
+    with open(global_git_config_path, "w") as global_git_config:
+        global_git_config.write("[user]\nname = Test User\nemail = t@example.com\n")
+    commit_files(
+        empty_repo,
+        {"contest/alpha/submissions/accepted/sol.py": "print(1)\n"},
+        "Alice",
+    )
+    contest_path = os.path.join(empty_repo.workdir, "contest")
+    cache_dir = os.path.join(tmp_path, "cache")
+    os.mkdir(cache_dir)
+    parser = ProblemSetParser(
+        contest_path,
+        GitManager(contest_path),
+        [],
+        False,
+        problem_cache=ProblemCache(cache_dir),
+    )
+    watcher = ProblemSetWatcher(parser, lambda problemset: None, interval=0)
+    assert watcher.poll()
+    assert os.path.isfile(os.path.join(cache_dir, PROBLEM_CACHE_FILENAME))
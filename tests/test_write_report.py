@@ -1,10 +1,12 @@
 """Tests for writing the report."""
 
 import os
+import unittest.mock as mock
 
 from crifx.config_parser import Config
-from crifx.contest_objects import ProblemSet
+from crifx.contest_objects import Problem, ProblemParseFailure, ProblemSet
 from crifx.git_manager import GitManager
+from crifx.report_objects import DEFAULT_REVIEW_STATUS
 from crifx.report_writer import ReportWriter
 
 
@@ -24,3 +26,59 @@ def test_write_report(tmp_path, scenarios_path):
         lines = tmp_file.readlines()
     expected_title = "\\title{CRIFX Contest Preparation Status Report}%\n"
     assert expected_title in lines
+
+
+def test_write_report_parse_failures(tmp_path, scenarios_path):
+    """Problems that could not be parsed are listed in the report."""
+    problemset = ProblemSet(
+        [], [ProblemParseFailure("broken", "/broken", "ValueError: bad yaml")]
+    )
+    writer = ReportWriter(problemset, Config({}), GitManager(scenarios_path))
+    writer.build_report(tmp_path)
+    writer.write_tex(tmp_path)
+    with open(os.path.join(tmp_path, "crifx-report.tex"), "r") as tmp_file:
+        report = tmp_file.read()
+    assert "Parse failures" in report
+    assert "broken: ValueError: bad yaml" in report
+
+
+def test_write_report_problem_fragments(
+    tmp_path, scenarios_path, make_authored_submission
+):
+    """Problem details are only rendered again if the problem changed."""
+    submission = make_authored_submission("Alice", None)
+    problems = [
+        Problem("a", [], [submission], DEFAULT_REVIEW_STATUS),
+        Problem("b", [], [], DEFAULT_REVIEW_STATUS),
+    ]
+    config = Config({"review_requirements": {"language_groups_ac": 0}})
+    git_manager = GitManager(scenarios_path)
+    fragments_path = os.path.join(tmp_path, "fragments")
+
+    def build(problemset: ProblemSet) -> list[str]:
+        writer = ReportWriter(problemset, config, git_manager)
+        with mock.patch.object(
+            ReportWriter,
+            "_write_problem_details",
+            autospec=True,
+            side_effect=ReportWriter._write_problem_details,
+        ) as write_problem_details_mock:
+            writer.build_report(tmp_path)
+        writer.write_tex(tmp_path)
+        return [call.args[2].name for call in write_problem_details_mock.mock_calls]
+
+    assert build(ProblemSet(problems)) == ["a", "b"]
+    fragment_filenames = sorted(os.listdir(fragments_path))
+    assert len(fragment_filenames) == 2
+    with open(os.path.join(tmp_path, "crifx-report.tex"), "r") as tmp_file:
+        report = tmp_file.read()
+    for filename in fragment_filenames:
+        assert f"\\input{{{os.path.join(fragments_path, filename)}}}" in report
+    with open(os.path.join(fragments_path, fragment_filenames[0]), "r") as tmp_file:
+        assert "\\section{a}" in tmp_file.read()
+
+    assert build(ProblemSet(problems)) == []
+    problems[1] = Problem("b", [], [submission], DEFAULT_REVIEW_STATUS)
+    assert build(ProblemSet(problems)) == ["b"]
+    assert build(ProblemSet(problems[:1])) == []
+    assert os.listdir(fragments_path) == fragment_filenames[:1]